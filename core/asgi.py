@@ -5,6 +5,12 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+The live message stream (/api/points/messages/stream/) keeps connections
+open and needs an ASGI server. Its broker is in-process, so serve the whole
+API from a single process, e.g.:
+
+    uvicorn core.asgi:application --workers 1
 """
 
 import os
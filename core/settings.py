@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -40,6 +41,9 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "geo_api.middleware.MetricsMiddleware",
+    "geo_api.middleware.ProfilingMiddleware",
+    "geo_api.middleware.WriteStickinessMiddleware",
 ]
 
 ROOT_URLCONF = "core.urls"
@@ -72,6 +76,61 @@ DATABASES = {
     }
 }
 
+# Read replicas serving the radius searches (see geo_api/routers.py):
+# comma-separated SQLite files, e.g. copies refreshed by
+# `manage.py copy_replicas`, as aliases replica1, replica2, ...
+READ_REPLICAS = []
+for number, path in enumerate(
+    filter(None, os.environ.get("GEO_API_REPLICAS", "").split(",")), start=1
+):
+    alias = f"replica{number}"
+    DATABASES[alias] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": path,
+        "TEST": {"MIRROR": "default"},
+    }
+    READ_REPLICAS.append(alias)
+
+# Stickiness to the primary (REPLICA_STICKY_SECONDS) is kept in the default
+# cache, which must be shared by all processes serving requests
+if READ_REPLICAS:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": BASE_DIR / "cache",
+        }
+    }
+
+DATABASE_ROUTERS = ["geo_api.routers.ReplicaRouter"]
+
+# SQLite connection profiles, chosen with GEO_API_DB_PROFILE. "production"
+# keeps connections open between requests (checked before reuse) and runs
+# its PRAGMAS on every new connection (see geo_api/sqlite.py): WAL lets
+# readers run alongside the writer, NORMAL sync is durable in WAL mode
+# except on power loss, and writers wait for the lock instead of failing
+SQLITE_PROFILES = {
+    # Django defaults: rollback journal, one connection per request
+    "default": {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False, "PRAGMAS": {}},
+    "production": {
+        "CONN_MAX_AGE": 600,
+        "CONN_HEALTH_CHECKS": True,
+        "PRAGMAS": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 5000,
+            # 256 MiB memory-mapped reads, 64 MiB page cache per connection
+            "mmap_size": 256 * 1024 * 1024,
+            "cache_size": -64 * 1024,
+            "temp_store": "MEMORY",
+        },
+    },
+}
+DB_PROFILE = os.environ.get("GEO_API_DB_PROFILE", "default")
+
+for database in DATABASES.values():
+    database["CONN_MAX_AGE"] = SQLITE_PROFILES[DB_PROFILE]["CONN_MAX_AGE"]
+    database["CONN_HEALTH_CHECKS"] = SQLITE_PROFILES[DB_PROFILE]["CONN_HEALTH_CHECKS"]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -124,3 +183,26 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ],
 }
+
+
+# Overrides of the geo_api defaults, which are listed and documented in
+# geo_api/conf.py DEFAULTS
+GEO_API = {
+    # Metrics of several worker processes (e.g. gunicorn) are aggregated in
+    # a shared directory; /metrics needs this bearer token when it is set
+    "METRICS_DIR": os.environ.get("GEO_API_METRICS_DIR"),
+    "METRICS_TOKEN": os.environ.get("GEO_API_METRICS_TOKEN"),
+    # Opt-in per-request profiling (see geo_api/middleware.py)
+    "PROFILING": os.environ.get("GEO_API_PROFILING") == "1",
+    "PROFILING_SQL": DEBUG,
+    "QUERY_BUDGET_LOG": True,
+    # Write-behind message ingestion (see geo_api/ingest.py): with "queue",
+    # run `manage.py run_message_queue` next to the web server
+    "MESSAGE_INGEST": os.environ.get("GEO_API_MESSAGE_INGEST", "sync"),
+    "MESSAGE_QUEUE_PATH": os.environ.get("GEO_API_MESSAGE_QUEUE_PATH"),
+    # Replicas from GEO_API_REPLICAS; stickiness to the primary is kept in
+    # the default cache, so a per-process one is an error (see CACHES above)
+    "READ_REPLICAS": READ_REPLICAS,
+    # Pragmas run on new SQLite connections, from the database profile
+    "SQLITE_PRAGMAS": SQLITE_PROFILES[DB_PROFILE]["PRAGMAS"],
+}
@@ -1,7 +1,10 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from geo_api.views import MetricsView
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("geo_api.urls")),
+    path("metrics", MetricsView.as_view(), name="metrics"),
 ]
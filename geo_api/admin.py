@@ -1,3 +1,231 @@
+"""
+Admin for large GeoPoint / PointMessage tables.
+
+Change lists never count or offset through a whole table:
+
+- the paginator counts at most GEO_API["ADMIN_COUNT_LIMIT"] rows and the
+  unfiltered total shown is an estimate (SQLite ANALYZE statistics or the
+  largest id);
+- rows are ordered by descending id and pages past the counted ones are
+  reached with "Older" links (?before=<id>, keyset pagination);
+- the area filter (?bbox= or ?near=) goes through the indexed bbox search;
+- foreign keys use autocomplete widgets instead of <select> of all rows.
+"""
+
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR, ChangeList
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connection
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+from .conf import get_setting
+from .models import GeoPoint, PointMessage
+from .search import bbox_queryset, parse_bbox
+from .utils import radius_bbox
+
+KEYSET_VAR = "before"
+
+
+def estimated_count(model):
+    """
+    Approximate number of rows of a table without scanning it
+    """
+    table = model._meta.db_table
+
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                # Filled by ANALYZE: the first number is the row count
+                cursor.execute(
+                    "SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table]
+                )
+                row = cursor.fetchone()
+                if row:
+                    return int(row[0].split()[0])
+            elif connection.vendor == "postgresql":
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [table],
+                )
+                row = cursor.fetchone()
+                if row and row[0] >= 0:
+                    return row[0]
+    except DatabaseError:
+        # No statistics collected yet
+        pass
+
+    # Ids are never reused, so the largest one bounds the row count
+    return model.objects.aggregate(largest=Max("pk"))["largest"] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Count at most ADMIN_COUNT_LIMIT rows: pages past them are reached
+    with keyset links
+    """
+
+    @cached_property
+    def count(self):
+        limit = get_setting("ADMIN_COUNT_LIMIT")
+        return self.object_list.order_by()[:limit].count()
+
+
+class KeysetChangeList(ChangeList):
+    """
+    Change list ordered by descending id, continued with ?before=<id>
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.before = None
+
+        # The cursor is not a field lookup: hide it from the filters
+        if KEYSET_VAR in request.GET:
+            params = request.GET.copy()
+            before = params.pop(KEYSET_VAR)[-1]
+            request.GET = params
+            if ORDER_VAR not in params:
+                try:
+                    self.before = int(before)
+                except ValueError:
+                    raise IncorrectLookupParameters
+
+        super().__init__(request, *args, **kwargs)
+
+    def get_queryset(self, request, *args, **kwargs):
+        queryset = super().get_queryset(request, *args, **kwargs)
+        if self.before is not None:
+            queryset = queryset.filter(pk__lt=self.before)
+        return queryset
+
+    def get_results(self, request):
+        super().get_results(request)
+
+        # Show the estimated total of an unfiltered table past the limit
+        limited = self.result_count >= get_setting("ADMIN_COUNT_LIMIT")
+        if limited and not self.queryset.query.has_filters():
+            self.result_count = max(self.result_count, estimated_count(self.model))
+
+    @property
+    def older_url(self):
+        """
+        Next page of older rows, past the last row shown
+        """
+        if ORDER_VAR in self.params or len(self.result_list) < self.list_per_page:
+            return None
+
+        last = list(self.result_list)[-1]
+        return self.get_query_string({KEYSET_VAR: last.pk}, [PAGE_VAR])
+
+    @property
+    def newest_url(self):
+        return self.get_query_string(remove=[PAGE_VAR])
+
+
+class AreaFilter(admin.ListFilter):
+    """
+    Rows inside a bbox (?bbox=west,south,east,north) or around a position
+    (?near=latitude,longitude,radius_km), found with the indexed bbox search
+    """
+
+    title = "area"
+    template = "admin/geo_api/area_filter.html"
+    point_lookup = "pk__in"
+    parameters = {
+        "bbox": "west,south,east,north",
+        "near": "latitude,longitude,radius km",
+    }
+
+    def __init__(self, request, params, model, model_admin):
+        super().__init__(request, params, model, model_admin)
+        for name in self.parameters:
+            if name in params:
+                value = params.pop(name)
+                self.used_parameters[name] = (
+                    value[-1] if isinstance(value, list) else value
+                )
+
+    def has_output(self):
+        return True
+
+    def expected_parameters(self):
+        return list(self.parameters)
+
+    def area(self):
+        if "bbox" in self.used_parameters:
+            bbox, error = parse_bbox(self.used_parameters["bbox"])
+        else:
+            try:
+                lat, lon, radius_km = map(
+                    float, self.used_parameters["near"].split(",")
+                )
+            except ValueError:
+                raise IncorrectLookupParameters
+            bbox, error = radius_bbox(lat, lon, radius_km), None
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180 and radius_km > 0):
+                error = "Invalid position or radius"
+
+        if error:
+            raise IncorrectLookupParameters(error)
+        return bbox
+
+    def queryset(self, request, queryset):
+        if not self.used_parameters:
+            return queryset
+
+        points = bbox_queryset(*self.area()).values("pk")
+        return queryset.filter(**{self.point_lookup: points})
+
+    def choices(self, changelist):
+        hidden = [
+            (name, value)
+            for name, value in changelist.params.items()
+            if name not in self.parameters and name != PAGE_VAR
+        ]
+        for name, placeholder in self.parameters.items():
+            yield {
+                "name": name,
+                "value": self.used_parameters.get(name, ""),
+                "placeholder": placeholder,
+                "hidden": hidden,
+            }
+
+
+class MessageAreaFilter(AreaFilter):
+    point_lookup = "point__in"
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Change list settings safe for tables with millions of rows
+    """
+
+    ordering = ("-id",)
+    sortable_by = ()
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    change_list_template = "admin/geo_api/change_list.html"
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+
+@admin.register(GeoPoint)
+class GeoPointAdmin(LargeTableAdmin):
+    list_display = ("id", "name", "latitude", "longitude", "created_by", "created_at")
+    list_select_related = ("created_by",)
+    list_filter = (AreaFilter,)
+    search_fields = ("=id", "^name")
+    autocomplete_fields = ("created_by",)
+    readonly_fields = ("latitude", "longitude", "change_seq")
+
 
-# Register your models here.
+@admin.register(PointMessage)
+class PointMessageAdmin(LargeTableAdmin):
+    list_display = ("id", "text", "point", "user", "created_at")
+    list_select_related = ("point", "user")
+    list_filter = (MessageAreaFilter,)
+    search_fields = ("=id",)
+    autocomplete_fields = ("point", "user")
+    readonly_fields = ("change_seq",)
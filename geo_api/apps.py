@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class GeoApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "geo_api"
+
+    def ready(self):
+        # Connect signal handlers and register system checks
+        from . import checks, signals  # noqa: F401
@@ -0,0 +1,165 @@
+"""
+Retention of point messages: hot table + compressed monthly archive.
+
+PointMessage holds the hot messages: everything the API writes and, by
+default, everything the searches read. `manage.py archive_messages` moves
+messages older than GEO_API["MESSAGE_RETENTION_DAYS"] in batches into
+MessageArchive rows, one per point and month, each a zlib-compressed JSON
+list. Every batch adds new rows, so earlier archives of the same month are
+never decompressed and rewritten. Message search reads the archives of the
+points it visits only with `?include_archived=1`.
+
+Archived messages keep their ids but leave the hot aggregates: the FTS
+index (via its triggers), the message locations read by search, heatmap
+and tile message counts. Search ETags of their area change when they are
+archived.
+"""
+
+import datetime
+import json
+import zlib
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import fulltext, heatmap, locations, tiles, versions
+from .conf import get_setting
+from .models import MessageArchive, PointMessage
+
+
+class ArchivedMessage:
+    """
+    Read-only message restored from an archive, with the attributes of
+    PointMessage used by search results
+    """
+
+    __slots__ = ("id", "point", "user", "user_id", "text", "created_at", "change_seq")
+
+    def __init__(self, point, user, record):
+        self.point = point
+        # None when the author has been deleted since
+        self.user = user
+        self.id, self.user_id, self.text, created_at, self.change_seq = record
+        self.created_at = parse_datetime(created_at)
+
+
+def encode(records):
+    return zlib.compress(json.dumps(records, ensure_ascii=False).encode())
+
+
+def decode(data):
+    return json.loads(zlib.decompress(data)) if data else []
+
+
+def message_record(message):
+    """
+    Archived form of a message: [id, user_id, text, created_at, change_seq]
+    """
+    return [
+        message.id,
+        message.user_id,
+        message.text,
+        message.created_at.isoformat(),
+        message.change_seq,
+    ]
+
+
+def month_of(created_at):
+    return created_at.date().replace(day=1)
+
+
+def retention_cutoff(days=None):
+    """
+    Messages created before the cutoff are archived, None - keep all
+    """
+    if days is None:
+        days = get_setting("MESSAGE_RETENTION_DAYS")
+    if days is None:
+        return None
+
+    return timezone.now() - datetime.timedelta(days=days)
+
+
+@transaction.atomic
+def archive_batch(cutoff, batch_size):
+    """
+    Move up to batch_size of the oldest messages created before the
+    cutoff to the archive. Returns the number of messages moved
+    """
+    messages = list(
+        PointMessage.objects.filter(created_at__lt=cutoff)
+        .select_related("point")
+        .order_by("created_at", "id")[:batch_size]
+    )
+    if not messages:
+        return 0
+
+    groups = defaultdict(list)
+    points = {}
+    for message in messages:
+        groups[message.point_id, month_of(message.created_at)].append(
+            message_record(message)
+        )
+        points[message.point_id] = message.point
+
+    MessageArchive.objects.bulk_create(
+        MessageArchive(
+            point_id=point_id, month=month, count=len(records), data=encode(records)
+        )
+        for (point_id, month), records in groups.items()
+    )
+
+    # A single DELETE instead of per-row delete signals; their effect is
+    # applied once per point below. FTS triggers still fire
+    locations.delete_messages([message.id for message in messages])
+    table = PointMessage._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {table} WHERE id IN ({', '.join(['%s'] * len(messages))})",
+            [message.id for message in messages],
+        )
+
+    moved = defaultdict(int)
+    for message in messages:
+        moved[message.point_id] += 1
+
+    for point_id, count in moved.items():
+        point = points[point_id]
+        if point.latitude is None or point.longitude is None:
+            continue
+        heatmap.add(point.latitude, point.longitude, messages=-count)
+        tiles.invalidate_point(point.latitude, point.longitude, messages_only=True)
+        versions.bump(versions.MESSAGES, point.latitude, point.longitude)
+
+    return len(messages)
+
+
+def move_archives(source, target):
+    """
+    Reassign the archived messages of a point merged into another one
+    """
+    MessageArchive.objects.filter(point=source).update(point=target)
+
+
+def point_messages(point_ids, words=()):
+    """
+    Archived messages of the points, restricted to those containing all
+    the keywords
+    """
+    archives = list(
+        MessageArchive.objects.filter(point_id__in=point_ids).select_related("point")
+    )
+
+    records = [
+        (archive.point, record)
+        for archive in archives
+        for record in decode(archive.data)
+        if not words or fulltext.contains_keywords(record[2], words)
+    ]
+    users = User.objects.in_bulk({record[1] for _, record in records})
+
+    for point, record in records:
+        yield ArchivedMessage(point, users.get(record[1]), record)
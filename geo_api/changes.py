@@ -0,0 +1,64 @@
+"""
+Incremental change feed of points and messages.
+
+Every GeoPoint / PointMessage save takes the next value of a global
+sequence (WriteCounter "changes") into its indexed `change_seq` column.
+A feed cursor is the last sequence value seen by the client: the next page
+holds the rows with a greater `change_seq`, read in sequence order from the
+index, so resuming costs the same no matter how old the cursor is.
+
+A row changed several times appears once, at its latest position.
+Deletions are not reported.
+"""
+
+from .models import CHANGE_SEQ_KEY, GeoPoint, PointMessage, WriteCounter
+from .search import bbox_queryset
+
+
+def current_seq():
+    """
+    Last value of the sequence: a cursor past every change saved so far
+    """
+    return (
+        WriteCounter.objects.filter(key=CHANGE_SEQ_KEY)
+        .values_list("version", flat=True)
+        .first()
+        or 0
+    )
+
+
+def changed_points(since, bbox=None):
+    points = bbox_queryset(*bbox) if bbox else GeoPoint.objects.all()
+    return (
+        points.filter(change_seq__gt=since)
+        .select_related("created_by")
+        .order_by("change_seq")
+    )
+
+
+def changed_messages(since, bbox=None):
+    messages = PointMessage.objects.filter(change_seq__gt=since)
+    if bbox:
+        messages = messages.filter(point__in=bbox_queryset(*bbox).values("pk"))
+    return messages.select_related("user").order_by("change_seq")
+
+
+def changes_page(since, limit, bbox=None):
+    """
+    Return (points, messages, next_cursor, has_more) with the first `limit`
+    changes after the cursor `since`
+    """
+    points = list(changed_points(since, bbox)[: limit + 1])
+    messages = list(changed_messages(since, bbox)[: limit + 1])
+
+    # Both lists hold the first changes of their kind, so the first `limit`
+    # of the merged list are the first changes overall
+    merged = sorted(points + messages, key=lambda row: row.change_seq)
+    has_more = len(merged) > limit
+    merged = merged[:limit]
+
+    next_cursor = merged[-1].change_seq if merged else since
+    points = [row for row in merged if isinstance(row, GeoPoint)]
+    messages = [row for row in merged if isinstance(row, PointMessage)]
+
+    return points, messages, next_cursor, has_more
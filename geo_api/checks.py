@@ -0,0 +1,49 @@
+"""
+System checks of GEO_API settings that depend on the deployment.
+"""
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Warning, register
+
+from .conf import get_setting
+
+
+def per_process_cache():
+    """
+    Whether the default cache is private to each process, so that deleting
+    a key does not reach the other workers
+    """
+    return isinstance(caches["default"], LocMemCache)
+
+
+@register()
+def check_tile_cache(app_configs, **kwargs):
+    if get_setting("TILE_CACHE_TIMEOUT") is None and per_process_cache():
+        return [
+            Warning(
+                'GEO_API["TILE_CACHE_TIMEOUT"] is None with a per-process cache.',
+                hint=(
+                    "Tile invalidation only reaches the process handling the "
+                    "write; set a timeout or configure a shared cache in CACHES."
+                ),
+                id="geo_api.W001",
+            )
+        ]
+    return []
+
+
+@register()
+def check_replica_cache(app_configs, **kwargs):
+    if get_setting("READ_REPLICAS") and per_process_cache():
+        return [
+            Error(
+                'GEO_API["READ_REPLICAS"] is set with a per-process cache.',
+                hint=(
+                    "Writers stick to the primary through the default cache; "
+                    "configure a cache shared by all processes in CACHES."
+                ),
+                id="geo_api.E001",
+            )
+        ]
+    return []
@@ -0,0 +1,221 @@
+"""
+Grid-based point clustering for map rendering.
+
+For every zoom level from 0 to CLUSTER_MAX_ZOOM the map is split into a
+Web Mercator grid of (2 ** zoom * CLUSTER_GRID_SIZE) cells per axis.
+Each non-empty cell has a PointCluster row with the number of points,
+coordinate sums (for the centroid; longitudes as unit vectors) and a few
+sample point ids.
+Rows are updated incrementally on point create/move/delete (see signals.py)
+and can be rebuilt from scratch with `manage.py rebuild_clusters`.
+"""
+
+import math
+
+from django.db import connection, transaction
+from django.db.models import F, Q
+
+from .conf import get_setting
+from .models import GeoPoint, PointCluster
+from .search import bbox_queryset
+from .utils import mercator_bbox_cells, mercator_cell, mercator_lat_lon
+
+
+def grid_size(zoom):
+    """
+    Number of grid cells per axis at the given zoom level
+    """
+    return 2**zoom * get_setting("CLUSTER_GRID_SIZE")
+
+
+def point_cells(lat, lon):
+    """
+    Return (zoom, cell_x, cell_y) of the point for every precomputed zoom
+    """
+    return [
+        (zoom, *mercator_cell(lat, lon, grid_size(zoom)))
+        for zoom in range(get_setting("CLUSTER_MAX_ZOOM") + 1)
+    ]
+
+
+def longitude_vector(lon):
+    """
+    Longitude as a unit vector (cos, sin): vectors can be summed and
+    averaged across the antimeridian, degrees can not
+    """
+    lon_rad = math.radians(lon)
+    return math.cos(lon_rad), math.sin(lon_rad)
+
+
+def centroid(cluster):
+    """
+    (lat, lon) of the mean position of the cluster's points
+    """
+    lon = math.degrees(math.atan2(cluster.longitude_sin_sum, cluster.longitude_cos_sum))
+    return cluster.latitude_sum / cluster.count, lon
+
+
+def _cells_query(cells):
+    query = Q()
+    for zoom, cell_x, cell_y in cells:
+        query |= Q(zoom=zoom, cell_x=cell_x, cell_y=cell_y)
+    return query
+
+
+def add_point(point_id, lat, lon):
+    """
+    Add a point to its cluster on every zoom level
+    """
+    cells = point_cells(lat, lon)
+    cos_lon, sin_lon = longitude_vector(lon)
+    table = PointCluster._meta.db_table
+
+    # INSERT ... ON CONFLICT DO UPDATE creates missing clusters and updates
+    # existing ones in one statement, so concurrent first points of a cell
+    # cannot both insert it
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (zoom, cell_x, cell_y, count, latitude_sum, "
+            "longitude_cos_sum, longitude_sin_sum, sample_ids) "
+            f"VALUES {', '.join(['(%s, %s, %s, 1, %s, %s, %s, %s)'] * len(cells))} "
+            "ON CONFLICT (zoom, cell_x, cell_y) DO UPDATE SET "
+            f"count = {table}.count + 1, "
+            f"latitude_sum = {table}.latitude_sum + excluded.latitude_sum, "
+            f"longitude_cos_sum = {table}.longitude_cos_sum "
+            "+ excluded.longitude_cos_sum, "
+            f"longitude_sin_sum = {table}.longitude_sin_sum "
+            "+ excluded.longitude_sin_sum, "
+            f"sample_ids = CASE WHEN json_array_length({table}.sample_ids) < %s "
+            f"THEN json_insert({table}.sample_ids, '$[#]', %s) "
+            f"ELSE {table}.sample_ids END",
+            [
+                value
+                for cell in cells
+                for value in (*cell, lat, cos_lon, sin_lon, f"[{point_id}]")
+            ]
+            + [get_setting("CLUSTER_SAMPLE_SIZE"), point_id],
+        )
+
+
+@transaction.atomic
+def remove_point(point_id, lat, lon):
+    """
+    Remove a point from its cluster on every zoom level
+    """
+    cos_lon, sin_lon = longitude_vector(lon)
+    clusters = PointCluster.objects.filter(_cells_query(point_cells(lat, lon)))
+
+    clusters.update(
+        count=F("count") - 1,
+        latitude_sum=F("latitude_sum") - lat,
+        longitude_cos_sum=F("longitude_cos_sum") - cos_lon,
+        longitude_sin_sum=F("longitude_sin_sum") - sin_lon,
+    )
+    clusters.filter(count__lte=0).delete()
+
+    # Replace the point in the samples it was part of
+    sampled = [
+        cluster
+        for cluster in clusters.only("zoom", "cell_x", "cell_y", "count", "sample_ids")
+        if point_id in cluster.sample_ids
+    ]
+    sample_size = get_setting("CLUSTER_SAMPLE_SIZE")
+    for cluster in sampled:
+        cluster.sample_ids.remove(point_id)
+        missing = min(sample_size, cluster.count) - len(cluster.sample_ids)
+        if missing > 0:
+            cluster.sample_ids += _cell_point_ids(
+                cluster, exclude=cluster.sample_ids, limit=missing
+            )
+    PointCluster.objects.bulk_update(sampled, ["sample_ids"])
+
+
+def _cell_point_ids(cluster, exclude, limit):
+    """
+    Ids of up to `limit` points of the cluster's cell, lowest first
+    """
+    cells = grid_size(cluster.zoom)
+    north, west = mercator_lat_lon(cluster.cell_x / cells, cluster.cell_y / cells)
+    south, east = mercator_lat_lon(
+        (cluster.cell_x + 1) / cells, (cluster.cell_y + 1) / cells
+    )
+    # Latitudes beyond the Mercator limit belong to the edge rows
+    if cluster.cell_y == 0:
+        north = 90
+    if cluster.cell_y == cells - 1:
+        south = -90
+
+    candidates = (
+        bbox_queryset(west, south, east, north)
+        .exclude(id__in=exclude)
+        .order_by("id")
+        .values_list("id", "latitude", "longitude")
+    )
+    point_ids = []
+    for candidate_id, candidate_lat, candidate_lon in candidates.iterator():
+        # The bbox is inclusive, points on its edges may be in neighbour cells
+        if mercator_cell(candidate_lat, candidate_lon, cells) == (
+            cluster.cell_x,
+            cluster.cell_y,
+        ):
+            point_ids.append(candidate_id)
+            if len(point_ids) == limit:
+                break
+    return point_ids
+
+
+@transaction.atomic
+def rebuild():
+    """
+    Recompute all clusters from the GeoPoint table.
+    Returns the number of cluster rows created
+    """
+    sample_size = get_setting("CLUSTER_SAMPLE_SIZE")
+    clusters = {}
+
+    points = (
+        GeoPoint.objects.filter(latitude__isnull=False, longitude__isnull=False)
+        .order_by("id")
+        .values_list("id", "latitude", "longitude")
+    )
+    for point_id, lat, lon in points.iterator(chunk_size=2000):
+        cos_lon, sin_lon = longitude_vector(lon)
+        for cell in point_cells(lat, lon):
+            cluster = clusters.get(cell)
+            if cluster is None:
+                cluster = clusters[cell] = PointCluster(
+                    zoom=cell[0], cell_x=cell[1], cell_y=cell[2], sample_ids=[]
+                )
+
+            cluster.count += 1
+            cluster.latitude_sum += lat
+            cluster.longitude_cos_sum += cos_lon
+            cluster.longitude_sin_sum += sin_lon
+            if len(cluster.sample_ids) < sample_size:
+                cluster.sample_ids.append(point_id)
+
+    PointCluster.objects.all().delete()
+    PointCluster.objects.bulk_create(clusters.values(), batch_size=1000)
+
+    return len(clusters)
+
+
+def viewport_cells(zoom, west, south, east, north):
+    """
+    Grid cells covered by the bbox at the given zoom.
+    Returns (x_ranges, y_range, number of cells), see mercator_bbox_cells
+    """
+    return mercator_bbox_cells(grid_size(zoom), west, south, east, north)
+
+
+def clusters_queryset(zoom, x_ranges, y_range):
+    """
+    Clusters of the given zoom inside the grid cell ranges
+    """
+    x_query = Q()
+    for x_from, x_to in x_ranges:
+        x_query |= Q(cell_x__gte=x_from, cell_x__lte=x_to)
+
+    return PointCluster.objects.filter(
+        x_query, zoom=zoom, cell_y__gte=y_range[0], cell_y__lte=y_range[1]
+    )
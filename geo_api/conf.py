@@ -0,0 +1,143 @@
+from django.conf import settings
+
+# Default values for the GEO_API settings dict (see core/settings.py)
+DEFAULTS = {
+    # Maximum number of points returned by the bbox (viewport) search
+    "BBOX_MAX_RESULTS": 1000,
+    # Highest zoom level with precomputed clusters
+    "CLUSTER_MAX_ZOOM": 16,
+    # Cluster grid cells per 256px map tile axis (4 -> 64px cells).
+    # Run `manage.py rebuild_clusters` after changing these two
+    "CLUSTER_GRID_SIZE": 4,
+    # Number of point ids kept in every cluster
+    "CLUSTER_SAMPLE_SIZE": 5,
+    # Maximum number of grid cells a single cluster request may cover
+    "CLUSTER_MAX_CELLS": 4096,
+    # Highest zoom level served by the vector tile endpoint
+    "TILE_MAX_ZOOM": 20,
+    # Maximum number of points encoded in a single tile
+    "TILE_MAX_FEATURES": 20000,
+    # Server-side tile cache lifetime in seconds (None - until invalidated,
+    # only safe with a cache shared by all processes)
+    "TILE_CACHE_TIMEOUT": 60,
+    # Client-side (Cache-Control max-age) tile lifetime in seconds
+    "TILE_HTTP_MAX_AGE": 60,
+    # Size of grid cells (in degrees) with write counters for search ETags
+    "VERSION_CELL_DEGREES": 1.0,
+    # Searches covering more cells are versioned by the global counter
+    "VERSION_MAX_CELLS": 400,
+    # Collect search and request metrics exposed at /metrics
+    "METRICS_ENABLED": True,
+    # Directory shared by worker processes for multi-process metrics
+    # (cleared on deploy)
+    "METRICS_DIR": None,
+    # How often (seconds) a process dumps its metrics to METRICS_DIR
+    "METRICS_FLUSH_INTERVAL": 5,
+    # Bearer token required by /metrics (None - staff users only)
+    "METRICS_TOKEN": None,
+    # Add Server-Timing headers (db, compute, render) to responses
+    "PROFILING": False,
+    # Add X-SQL-Summary headers and log repeated SQL statements (debug only)
+    "PROFILING_SQL": False,
+    # Log requests exceeding the `query_budget` of their view
+    "QUERY_BUDGET_LOG": False,
+    # Maximum number of points returned by the polygon search
+    "POLYGON_MAX_RESULTS": 1000,
+    # Maximum number of vertices of a search polygon
+    "POLYGON_MAX_VERTICES": 10000,
+    # Number of prepared search polygons kept in memory
+    "POLYGON_CACHE_SIZE": 256,
+    # Corridor search limits: route positions, buffer and results
+    "ROUTE_MAX_VERTICES": 5000,
+    "ROUTE_MAX_BUFFER_KM": 50,
+    "ROUTE_MAX_RESULTS": 1000,
+    # Default and maximum number of changes in a change feed page
+    "CHANGES_PAGE_SIZE": 100,
+    "CHANGES_MAX_PAGE_SIZE": 1000,
+    # Size of grid cells (in degrees) indexing live message subscriptions
+    "LIVE_CELL_DEGREES": 0.5,
+    # Subscriptions covering more cells are checked for every message
+    "LIVE_MAX_CELLS": 64,
+    # Maximum radius and number of live subscriptions per process
+    "LIVE_MAX_RADIUS_KM": 100,
+    "LIVE_MAX_SUBSCRIBERS": 10000,
+    # Events buffered per connection before a slow client is disconnected
+    "LIVE_QUEUE_SIZE": 100,
+    # Comment frames keeping idle connections open, in seconds
+    "LIVE_HEARTBEAT_SECONDS": 15,
+    # Client reconnection delay sent in the stream, in milliseconds
+    "LIVE_RETRY_MS": 3000,
+    # Maximum number of missed messages replayed on reconnection
+    "LIVE_REPLAY_LIMIT": 100,
+    # Change feed polling interval of live connections with queued message
+    # ingestion, in seconds
+    "LIVE_POLL_SECONDS": 1.0,
+    # Geofence index: finest cell size (degrees), number of levels doubling
+    # the cell size, and maximum cells per fence
+    "GEOFENCE_CELL_DEGREES": 0.01,
+    "GEOFENCE_LEVELS": 16,
+    "GEOFENCE_MAX_CELLS": 16,
+    # Maximum radius of circle geofences
+    "GEOFENCE_MAX_RADIUS_KM": 500,
+    # Maximum number of matches returned for a geofence
+    "GEOFENCE_MATCHES_MAX_RESULTS": 1000,
+    # Highest heatmap resolution (2 ** resolution bins per axis)
+    "HEATMAP_MAX_RESOLUTION": 16,
+    # Maximum number of bins a single heatmap request may cover
+    "HEATMAP_MAX_CELLS": 16384,
+    # Maximum (and default) number of results of the radius searches
+    "SEARCH_MAX_RESULTS": 1000,
+    # Largest chunk of points read at once by the radius searches
+    "SEARCH_CHUNK_SIZE": 2000,
+    # Rows counted on either side by the planner of filtered searches
+    "SEARCH_PLAN_MAX_COUNT": 10000,
+    # Near-duplicate points: snap distance and minimum name similarity (0-1)
+    "DEDUPE_SNAP_METERS": 25,
+    "DEDUPE_NAME_SIMILARITY": 0.85,
+    # Default handling of duplicates on create: "off", "return" or "merge"
+    "DEDUPE_ON_CREATE": "off",
+    # Messages older than this many days are moved to the archive by
+    # `manage.py archive_messages` (None - keep all messages hot)
+    "MESSAGE_RETENTION_DAYS": 365,
+    # Messages moved to the archive per transaction
+    "ARCHIVE_BATCH_SIZE": 1000,
+    # Rows counted by admin change lists; later pages use keyset links
+    "ADMIN_COUNT_LIMIT": 10000,
+    # Messages feed: weights and half-lives of the distance and age parts
+    # of the score (weight * 0.5 ** (km or hours / half-life)), page size
+    "FEED_DISTANCE_WEIGHT": 1.0,
+    "FEED_DISTANCE_HALF_LIFE_KM": 5.0,
+    "FEED_AGE_WEIGHT": 1.0,
+    "FEED_AGE_HALF_LIFE_HOURS": 24.0,
+    "FEED_PAGE_SIZE": 20,
+    # Maximum number of cells (sources x destinations) of a distance matrix
+    "DISTANCE_MATRIX_MAX_CELLS": 4_000_000,
+    # Let identical concurrent radius searches share one computation
+    "SEARCH_COALESCING": True,
+    # Message creation: "sync" (insert in the request) or "queue"
+    # (write-behind, drained by `manage.py run_message_queue`)
+    "MESSAGE_INGEST": "sync",
+    # SQLite file of the message queue (None - BASE_DIR/message_queue.sqlite3)
+    "MESSAGE_QUEUE_PATH": None,
+    # Messages inserted per drain transaction
+    "MESSAGE_QUEUE_BATCH_SIZE": 1000,
+    # Searches drain the queue themselves once its oldest message is older
+    # than this many seconds, spending at most MESSAGE_QUEUE_DRAIN_SECONDS
+    "MESSAGE_QUEUE_MAX_STALENESS": 2.0,
+    "MESSAGE_QUEUE_DRAIN_SECONDS": 1.0,
+    # Pause of the queue worker when the queue is empty, in seconds
+    "MESSAGE_QUEUE_POLL_INTERVAL": 0.1,
+    # Database aliases serving search reads (see geo_api/routers.py)
+    "READ_REPLICAS": [],
+    # Users read from the primary this many seconds after a write
+    "REPLICA_STICKY_SECONDS": 5,
+    # PRAGMA name -> value run on every new SQLite connection
+    "SQLITE_PRAGMAS": {},
+}
+
+
+def get_setting(name):
+    """
+    Return a GEO_API setting, falling back to the default value
+    """
+    return getattr(settings, "GEO_API", {}).get(name, DEFAULTS[name])
@@ -0,0 +1,198 @@
+"""
+Near-duplicate points: the same place submitted again with a similar name
+within GEO_API["DEDUPE_SNAP_METERS"] of an existing point.
+
+On create the candidates are read with a bbox query over the (latitude,
+longitude) index around the new position. An existing table is
+deduplicated by `manage.py dedupe_points` with a sweep over points sorted
+by latitude: every point is compared only with the points of the latitude
+window behind it whose longitude is within the snap distance, looked up by
+bisection in a sorted list. Names are compared with difflib ratios of
+normalized names.
+"""
+
+import math
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from difflib import SequenceMatcher
+
+from django.db import transaction
+
+from . import archive, heatmap, tiles
+from .conf import get_setting
+from .models import GeoPoint
+from .search import bbox_queryset
+from .utils import EARTH_RADIUS_KM, haversine_distance, normalize_name, radius_bbox
+
+OFF = "off"
+RETURN = "return"
+MERGE = "merge"
+MODES = (OFF, RETURN, MERGE)
+
+
+def similar_names(first, second, similarity=None):
+    """
+    Whether two normalized names are similar enough to be one place
+    """
+    if similarity is None:
+        similarity = get_setting("DEDUPE_NAME_SIMILARITY")
+    if first == second:
+        return True
+
+    matcher = SequenceMatcher(None, first, second)
+    # The quick upper bounds reject most pairs without the full comparison
+    return (
+        matcher.real_quick_ratio() >= similarity
+        and matcher.quick_ratio() >= similarity
+        and matcher.ratio() >= similarity
+    )
+
+
+def snap_km():
+    return get_setting("DEDUPE_SNAP_METERS") / 1000
+
+
+def find_duplicate(lat, lon, name, exclude_id=None):
+    """
+    The nearest existing point within the snap distance with a similar
+    name, or None
+    """
+    name = normalize_name(name)
+    radius_km = snap_km()
+
+    candidates = bbox_queryset(*radius_bbox(lat, lon, radius_km))
+    if exclude_id is not None:
+        candidates = candidates.exclude(pk=exclude_id)
+
+    duplicates = []
+    for point in candidates.order_by("id"):
+        distance = haversine_distance(lat, lon, point.latitude, point.longitude)
+        if distance <= radius_km and similar_names(name, normalize_name(point.name)):
+            duplicates.append((distance, point.id, point))
+
+    return min(duplicates)[2] if duplicates else None
+
+
+class DisjointSets:
+    """
+    Union-find of point ids, merged into groups of the smallest id
+    """
+
+    def __init__(self):
+        self.parents = {}
+
+    def find(self, item):
+        root = item
+        while self.parents.get(root, root) != root:
+            root = self.parents[root]
+        while item != root:
+            item, self.parents[item] = self.parents[item], root
+        return root
+
+    def union(self, first, second):
+        first, second = sorted((self.find(first), self.find(second)))
+        if first != second:
+            self.parents[second] = first
+
+    def groups(self):
+        groups = {}
+        for item in list(self.parents):
+            root = self.find(item)
+            groups.setdefault(root, {root}).add(item)
+        return sorted(sorted(members) for members in groups.values())
+
+
+def _longitude_range(longitudes, lat, lon, radius_km):
+    """
+    (longitude, id) items of a sorted list within the circle's bbox
+    """
+    west, _, east, _ = radius_bbox(lat, lon, radius_km)
+    ranges = [(west, east)] if west <= east else [(west, 180), (-180, east)]
+
+    for low, high in ranges:
+        start = bisect_left(longitudes, (low, -math.inf))
+        end = bisect_right(longitudes, (high, math.inf))
+        yield from longitudes[start:end]
+
+
+def duplicate_groups(radius_km=None, similarity=None):
+    """
+    Lists of ids of near-duplicate points, the oldest first. Points
+    similar to a common neighbour end up in one group
+    """
+    if radius_km is None:
+        radius_km = snap_km()
+    window_degrees = math.degrees(radius_km / EARTH_RADIUS_KM)
+
+    rows = (
+        GeoPoint.objects.filter(latitude__isnull=False, longitude__isnull=False)
+        .order_by("latitude", "id")
+        .values_list("id", "latitude", "longitude", "name")
+    )
+
+    # Points within window_degrees of latitude behind the current one,
+    # their (longitude, id) sorted for range lookups and (lat, name) by id
+    window = deque()
+    longitudes = []
+    window_points = {}
+    duplicates = DisjointSets()
+
+    for point_id, lat, lon, name in rows.iterator(chunk_size=2000):
+        while window and window[0][1] < lat - window_degrees:
+            old_id, _, old_lon = window.popleft()
+            del longitudes[bisect_left(longitudes, (old_lon, old_id))]
+            del window_points[old_id]
+
+        name = normalize_name(name)
+        for other_lon, other_id in _longitude_range(longitudes, lat, lon, radius_km):
+            other_lat, other_name = window_points[other_id]
+            distance = haversine_distance(lat, lon, other_lat, other_lon)
+            if distance <= radius_km and similar_names(name, other_name, similarity):
+                duplicates.union(point_id, other_id)
+
+        window.append((point_id, lat, lon))
+        insort(longitudes, (lon, point_id))
+        window_points[point_id] = (lat, name)
+
+    return duplicates.groups()
+
+
+def fill_description(point, description):
+    """
+    Keep a description of a merged duplicate if the point has none
+    """
+    if description and not point.description:
+        point.description = description
+        point.save()
+
+
+@transaction.atomic
+def merge_points(keeper, duplicates):
+    """
+    Move messages (hot and archived) of duplicates to the kept point and
+    delete the duplicates. Returns the number of hot messages moved
+    """
+    moved = 0
+
+    for duplicate in duplicates:
+        messages = list(duplicate.messages.all())
+        for message in messages:
+            message.point = keeper
+            message.save(update_fields=["point"])
+
+        # Message counts follow the messages, see signals.py
+        if messages and duplicate.latitude is not None:
+            heatmap.add(
+                duplicate.latitude, duplicate.longitude, messages=-len(messages)
+            )
+        moved += len(messages)
+
+        archive.move_archives(duplicate, keeper)
+        fill_description(keeper, duplicate.description)
+        duplicate.delete()
+
+    if moved and keeper.latitude is not None:
+        heatmap.add(keeper.latitude, keeper.longitude, messages=moved)
+        tiles.invalidate_point(keeper.latitude, keeper.longitude, messages_only=True)
+
+    return moved
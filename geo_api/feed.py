@@ -0,0 +1,284 @@
+"""
+Ranked feed of messages around a position.
+
+A message scores
+
+    DISTANCE_WEIGHT * 0.5 ** (distance_km / DISTANCE_HALF_LIFE_KM)
+    + AGE_WEIGHT * 0.5 ** (age_hours / AGE_HALF_LIFE_HOURS)
+
+(GEO_API["FEED_..."] settings), and the feed lists messages by descending
+score, then descending id. Ages are measured from the time of the first
+page, carried in the cursor, so that scores don't shift between pages.
+
+The messages in the radius are never all loaded or ranked: points are
+read outward from the center (LatitudeWalk), the messages of each chunk of
+points in the radius are streamed newest first per point from the
+(point, created_at) index, and a bounded heap keeps the best page. Since
+both terms only decrease, the heap's worst score bounds what is left: the
+rest of a point is skipped from its first message below it, older messages
+of later chunks are cut off in SQL by created_at, and the walk stops once
+no unread point can reach it. Archived messages are not part of the feed.
+"""
+
+import base64
+import binascii
+import datetime
+import json
+import math
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .conf import get_setting
+from .models import PointMessage
+from .search import LatitudeWalk, Nearest, bbox_queryset
+from .utils import haversine_distance, radius_bbox
+
+# Slack of created_at bounds computed from float scores: the scores
+# themselves are compared in Python
+_BOUND_MARGIN = datetime.timedelta(seconds=1)
+
+
+def decay(value, half_life):
+    return 0.5 ** (value / half_life)
+
+
+def half_lives(fraction):
+    """
+    Number of half-lives after which decay() drops to the fraction (0, 1]
+    """
+    return -math.log2(fraction)
+
+
+class Cursor:
+    """
+    Position after the last message of a page: the reference time of the
+    feed and the (score, id) of the message
+    """
+
+    def __init__(self, now, score=math.inf, message_id=0):
+        self.now = now
+        self.score = score
+        self.message_id = message_id
+
+    def encode(self):
+        data = json.dumps([self.now.isoformat(), self.score, self.message_id])
+        return base64.urlsafe_b64encode(data.encode()).decode()
+
+    @classmethod
+    def decode(cls, value):
+        """
+        Parse a cursor returned by the feed, or None if it is invalid
+        """
+        try:
+            now, score, message_id = json.loads(base64.urlsafe_b64decode(value))
+            now = parse_datetime(now)
+            score, message_id = float(score), int(message_id)
+        except (binascii.Error, ValueError, TypeError):
+            return None
+
+        if now is None or not math.isfinite(score):
+            return None
+        return cls(now, score, message_id)
+
+    def admits(self, score, message_id):
+        """
+        Whether a message comes after the cursor
+        """
+        return (score, message_id) < (self.score, self.message_id)
+
+
+class Ranking:
+    """
+    Scores of messages for one feed page
+    """
+
+    def __init__(self, center_lat, center_lon, now):
+        self.center_lat = center_lat
+        self.center_lon = center_lon
+        self.now = now
+        self.distance_weight = get_setting("FEED_DISTANCE_WEIGHT")
+        self.distance_half_life = get_setting("FEED_DISTANCE_HALF_LIFE_KM")
+        self.age_weight = get_setting("FEED_AGE_WEIGHT")
+        self.age_half_life = datetime.timedelta(
+            hours=get_setting("FEED_AGE_HALF_LIFE_HOURS")
+        )
+
+    def distance_score(self, distance_km):
+        return self.distance_weight * decay(distance_km, self.distance_half_life)
+
+    def score(self, distance_score, created_at):
+        age = max(self.now - created_at, datetime.timedelta(0))
+        return distance_score + self.age_weight * decay(age, self.age_half_life)
+
+    def best_score(self, distance_km):
+        """
+        Score of a message posted right now at the distance
+        """
+        return self.distance_score(distance_km) + self.age_weight
+
+    def created_after(self, distance_score, score):
+        """
+        Messages created before this time score below `score` at the
+        distance (None - no such bound)
+        """
+        fraction = (score - distance_score) / self.age_weight if self.age_weight else 0
+        if fraction <= 0:
+            return None
+        fraction = min(fraction, 1)
+        return self.now - self.age_half_life * half_lives(fraction) - _BOUND_MARGIN
+
+    def created_before(self, distance_score, score):
+        """
+        Messages created after this time score above `score` at the
+        distance (None - no such bound)
+        """
+        fraction = (score - distance_score) / self.age_weight if self.age_weight else 1
+        if fraction >= 1:
+            return None
+        fraction = max(fraction, math.ulp(0))
+        return self.now - self.age_half_life * half_lives(fraction) + _BOUND_MARGIN
+
+
+class Feed:
+    """
+    One page of the feed: the `size` best messages after the cursor
+    """
+
+    def __init__(self, center_lat, center_lon, radius_km, size, cursor, stats):
+        self.center_lat = center_lat
+        self.center_lon = center_lon
+        self.radius_km = radius_km
+        self.size = size
+        self.cursor = cursor
+        self.ranking = Ranking(center_lat, center_lon, cursor.now)
+        self.stats = stats
+        # One more message than the page tells whether another page exists
+        self.best = Nearest(size + 1)
+
+    def threshold(self):
+        """
+        Worst score kept once the heap is full: lower scores can't get in
+        """
+        return -self.best.bound()
+
+    def page(self):
+        """
+        Return (messages with their score and distance, next cursor or None)
+        """
+        walk = LatitudeWalk(
+            bbox_queryset(
+                *radius_bbox(self.center_lat, self.center_lon, self.radius_km)
+            ).only("id", "latitude", "longitude"),
+            self.center_lat,
+            self.size + 1,
+        )
+
+        for points in walk:
+            self.read_points(points)
+
+            min_distance = walk.min_distance_km()
+            if min_distance > self.radius_km:
+                break
+            if self.ranking.best_score(min_distance) < self.threshold():
+                break
+
+        ranked = self.best.items()
+        messages = PointMessage.objects.select_related("point", "user").in_bulk(
+            [message_id for _, message_id, _ in ranked]
+        )
+        page = [
+            (messages[message_id], score, distance)
+            for score, message_id, distance in ranked[: self.size]
+            if message_id in messages
+        ]
+
+        next_cursor = None
+        if len(ranked) > self.size and page:
+            message, score, _ = page[-1]
+            next_cursor = Cursor(self.cursor.now, score, message.id)
+
+        return page, next_cursor
+
+    def read_points(self, points):
+        """
+        Offer the messages of a chunk of points in the radius to the heap
+        """
+        distances = {}
+        for point in points:
+            self.stats.distance_evaluations += 1
+            distance = haversine_distance(
+                self.center_lat, self.center_lon, point.latitude, point.longitude
+            )
+            if distance <= self.radius_km:
+                if self.ranking.best_score(distance) >= self.threshold():
+                    distances[point.id] = distance
+
+        if not distances:
+            return
+
+        # Newest first per point, within the time range that can still
+        # get past the cursor and into the heap at some of these points
+        distance_scores = {
+            point_id: self.ranking.distance_score(distance)
+            for point_id, distance in distances.items()
+        }
+        messages = PointMessage.objects.filter(
+            point_id__in=list(distances), created_at__lte=self.cursor.now
+        )
+        after = self.ranking.created_after(
+            max(distance_scores.values()), self.threshold()
+        )
+        if after is not None:
+            messages = messages.filter(created_at__gte=after)
+        before = self.ranking.created_before(
+            min(distance_scores.values()), self.cursor.score
+        )
+        if before is not None:
+            messages = messages.filter(created_at__lte=before)
+
+        rows = (
+            messages.order_by("point_id", "-created_at", "-id")
+            .values_list("id", "point_id", "created_at")
+            .iterator(chunk_size=get_setting("SEARCH_CHUNK_SIZE"))
+        )
+        self.offer(rows, distances, distance_scores)
+
+    def offer(self, rows, distances, distance_scores):
+        """
+        Offer rows ordered newest first per point; a point is skipped from
+        its first message scoring below the heap's worst one, or once it
+        has filled a page
+        """
+        current, taken, done = None, 0, False
+
+        for message_id, point_id, created_at in rows:
+            self.stats.candidates += 1
+            if point_id != current:
+                current, taken, done = point_id, 0, False
+            if done:
+                continue
+
+            score = self.ranking.score(distance_scores[point_id], created_at)
+            if score < self.threshold():
+                done = True
+                continue
+            if not self.cursor.admits(score, message_id):
+                continue
+
+            self.stats.matches += 1
+            # Nearest keeps the lowest (distance, key): negate to keep the
+            # highest (score, id)
+            self.best.push(
+                -score, -message_id, (score, message_id, distances[point_id])
+            )
+            taken += 1
+            done = taken > self.size
+
+
+def first_page_time():
+    """
+    Reference time of a new feed, in whole seconds so that identical
+    requests within a second share one search
+    """
+    return timezone.now().replace(microsecond=0)
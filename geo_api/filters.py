@@ -0,0 +1,182 @@
+"""
+Attribute filters of the radius searches: author (`created_by`), creation
+time range (`created_after` / `created_before`) and point name prefix
+(`name`, matched against the normalized `name_key`).
+
+Every filter column has a composite index with the spatial key: (column,
+latitude, longitude) on points and message locations, (user, point) on
+messages. A search starts from whichever side is expected to be smaller
+(see SearchFilters.plan()):
+
+- SPACE_FIRST: the usual outward latitude walk over the search bbox, with
+  the filters checked on the rows read;
+- FILTER_FIRST: the filtered rows inside the bbox are read through the
+  filter's composite index, and distances are computed only for them.
+"""
+
+import datetime
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .conf import get_setting
+from .utils import normalize_name
+
+FILTER_FIRST = "filter-first"
+SPACE_FIRST = "space-first"
+
+# Greater than any character: name_key prefixes are matched as ranges
+_MAX_CHARACTER = "\U0010ffff"
+
+
+def parse_time(value):
+    """
+    Parse an ISO 8601 datetime or date (midnight), or return None
+    """
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            moment = day and datetime.datetime.combine(day, datetime.time())
+    except ValueError:
+        return None
+
+    if moment is not None and timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class SearchFilters:
+    """
+    Optional filters of a radius search, parsed from query parameters
+    """
+
+    def __init__(
+        self, created_by=None, created_after=None, created_before=None, name=""
+    ):
+        self.created_by = created_by
+        self.created_after = created_after
+        self.created_before = created_before
+        self.name = name
+
+    @classmethod
+    def parse(cls, params, user):
+        """
+        Return (filters, error message). `created_by=me` is the current user
+        """
+        created_by = params.get("created_by")
+        if created_by == "me":
+            created_by = user.id
+        elif created_by is not None:
+            try:
+                created_by = int(created_by)
+            except ValueError:
+                return None, "Created by must be a user id or 'me'"
+
+        times = {}
+        for name, label in (
+            ("created_after", "Created after"),
+            ("created_before", "Created before"),
+        ):
+            value = params.get(name)
+            times[name] = value and parse_time(value)
+            if value and times[name] is None:
+                return None, f"{label} must be an ISO 8601 date or datetime"
+
+        name = normalize_name(params.get("name", ""))
+        return cls(created_by, name=name, **times), None
+
+    def __bool__(self):
+        return any(self.key())
+
+    def key(self):
+        """
+        Normalized values, for coalescing identical searches
+        """
+        return (self.created_by, self.created_after, self.created_before, self.name)
+
+    def as_dict(self):
+        values = {
+            "created_by": self.created_by,
+            "created_after": self.created_after,
+            "created_before": self.created_before,
+            "name": self.name,
+        }
+        return {name: value for name, value in values.items() if value}
+
+    def time_q(self, field):
+        q = Q()
+        if self.created_after:
+            q &= Q(**{f"{field}__gte": self.created_after})
+        if self.created_before:
+            q &= Q(**{f"{field}__lt": self.created_before})
+        return q
+
+    def name_q(self, field):
+        if not self.name:
+            return Q()
+        return Q(
+            **{
+                f"{field}__gte": self.name,
+                f"{field}__lt": self.name + _MAX_CHARACTER,
+            }
+        )
+
+    def point_q(self):
+        """
+        Points created by the author, in the time range, named with the prefix
+        """
+        q = self.time_q("created_at") & self.name_q("name_key")
+        if self.created_by is not None:
+            q &= Q(created_by_id=self.created_by)
+        return q
+
+    def point_name_q(self):
+        """
+        Points of messages named with the prefix
+        """
+        return self.name_q("name_key")
+
+    def message_q(self):
+        """
+        Messages posted by the author in the time range
+        """
+        q = self.time_q("created_at")
+        if self.created_by is not None:
+            q &= Q(user_id=self.created_by)
+        return q
+
+    def location_q(self):
+        """
+        Message locations of the author in the time range, at points named
+        with the prefix
+        """
+        return self.message_q() & self.name_q("point_name_key")
+
+    def admits_message(self, message):
+        """
+        Python check of message_q(), for messages not in the table
+        """
+        return (
+            (self.created_by is None or message.user_id == self.created_by)
+            and (not self.created_after or message.created_at >= self.created_after)
+            and (not self.created_before or message.created_at < self.created_before)
+        )
+
+    def plan(self, filtered, bbox_points, max_results):
+        """
+        Pick the side to start from. Filter-first reads every filtered row
+        in the bbox, space-first reads about max_results * spatial /
+        filtered rows before it has found enough matches near the center:
+        start from the filter if filtered ** 2 <= max_results * spatial.
+        Both counts are read from indexes and stop at
+        GEO_API["SEARCH_PLAN_MAX_COUNT"] rows
+        """
+        limit = get_setting("SEARCH_PLAN_MAX_COUNT")
+        spatial = bbox_points.order_by()[:limit].count()
+        matching = filtered.order_by()[:limit].count()
+
+        if matching * matching <= max_results * spatial:
+            return FILTER_FIRST
+        return SPACE_FIRST
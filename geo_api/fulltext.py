@@ -0,0 +1,179 @@
+"""
+Keyword search over PointMessage.text with SQLite FTS5.
+
+Messages are indexed in an external-content FTS5 table kept in sync by
+triggers on geo_api_pointmessage (migration 0006), so every insert, update
+and delete - including bulk ones - updates the index. Migrations that
+rebuild the geo_api_pointmessage table drop its triggers and must run
+install() again.
+
+A radius search with keywords intersects two sets: messages matching the
+keywords and messages of points inside the radius bbox. plan() compares
+cheap estimates of both (document frequency of the rarest keyword from the
+fts5vocab table, number of points in the bbox from the lat/lon index) and
+the search starts from the smaller one.
+
+Other databases fall back to case-insensitive substring filters.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import PointMessage
+
+FTS_TABLE = "geo_api_pointmessage_fts"
+VOCAB_TABLE = "geo_api_pointmessage_fts_vocab"
+
+TEXT_FIRST = "text"
+SPATIAL_FIRST = "spatial"
+
+INSTALL_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        text, content='geo_api_pointmessage', content_rowid='id'
+    )
+    """,
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {VOCAB_TABLE}
+    USING fts5vocab({FTS_TABLE}, 'row')
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert
+    AFTER INSERT ON geo_api_pointmessage BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete
+    AFTER DELETE ON geo_api_pointmessage BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update
+    AFTER UPDATE OF text ON geo_api_pointmessage BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+UNINSTALL_SQL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_delete",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_update",
+    f"DROP TABLE IF EXISTS {VOCAB_TABLE}",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def install(schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in INSTALL_SQL:
+            schema_editor.execute(sql)
+
+
+def uninstall(schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in UNINSTALL_SQL:
+            schema_editor.execute(sql)
+
+
+def available():
+    return connection.vendor == "sqlite"
+
+
+def keywords(query):
+    """
+    Lowercase words of a user query; punctuation and FTS syntax are ignored
+    """
+    return re.findall(r"\w+", query.lower())
+
+
+def contains_keywords(text, words):
+    """
+    Whether a text not in the index (e.g. archived) contains all the words
+    """
+    return set(words) <= set(keywords(text))
+
+
+def match_expression(words):
+    # Quoted terms are matched literally and combined with AND
+    return " ".join(f'"{word}"' for word in words)
+
+
+def estimate_matches(words):
+    """
+    Upper bound of messages containing all the words: document frequency
+    of the rarest one
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT term, doc FROM {VOCAB_TABLE} WHERE term IN (%s)"
+            % ", ".join(["%s"] * len(words)),
+            words,
+        )
+        frequencies = dict(cursor.fetchall())
+
+    # Words the tokenizer normalizes differently are not found in the
+    # vocabulary; the estimate is only used to pick the cheaper plan
+    return min(frequencies.get(word, 0) for word in words)
+
+
+def plan(words, bbox_points):
+    """
+    Pick the set to start from: TEXT_FIRST or SPATIAL_FIRST
+    """
+    if not available():
+        return TEXT_FIRST
+
+    if estimate_matches(words) < bbox_points.count():
+        return TEXT_FIRST
+    return SPATIAL_FIRST
+
+
+def filter_text_first(messages, words):
+    """
+    Restrict a queryset of messages (or message locations) to those
+    matching the words, looked up in the FTS index first and joined to the
+    rest by primary key
+    """
+    if not available():
+        return messages.filter(*(Q(text__icontains=word) for word in words))
+
+    return messages.filter(
+        pk__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+            [match_expression(words)],
+        )
+    )
+
+
+def matching_ids(words, ids):
+    """
+    Ids among the given (spatial) candidates matching the words, checked
+    by rowid lookups in the FTS index
+    """
+    if not ids:
+        return set()
+
+    if not available():
+        return set(
+            filter_text_first(
+                PointMessage.objects.filter(id__in=ids), words
+            ).values_list("id", flat=True)
+        )
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            "AND rowid IN (SELECT value FROM json_each(%s))",
+            [match_expression(words), "[%s]" % ",".join(map(str, ids))],
+        )
+        return {row[0] for row in cursor.fetchall()}
@@ -0,0 +1,143 @@
+"""
+Reverse geofencing: find the fences containing a point.
+
+Fences are indexed in a hierarchical grid. Cells of level L are
+GEO_API["GEOFENCE_CELL_DEGREES"] * 2**L degrees wide, and every fence is
+stored in the cells of the finest level at which its bounding box covers
+at most GEO_API["GEOFENCE_MAX_CELLS"] cells. So small fences get small
+cells and a country-sized fence still takes a handful of rows.
+
+A point lies in exactly one cell per level, so the candidate fences are
+read with a single indexed query over GEO_API["GEOFENCE_LEVELS"] cells and
+only those candidates get the exact circle / polygon test.
+"""
+
+import math
+import operator
+from functools import reduce
+
+from django.db.models import Q
+
+from . import polygons
+from .conf import get_setting
+from .models import GeofenceCell, GeofenceMatch
+from .utils import haversine_distance, radius_bbox
+
+
+class Circle:
+    def __init__(self, lon, lat, radius_km):
+        self.lon = lon
+        self.lat = lat
+        self.radius_km = radius_km
+
+    @property
+    def bboxes(self):
+        return [radius_bbox(self.lat, self.lon, self.radius_km)]
+
+    def contains(self, lon, lat):
+        return haversine_distance(self.lat, self.lon, lat, lon) <= self.radius_km
+
+
+def prepare(fence):
+    """
+    Circle or cached PreparedGeometry of a fence
+    """
+    geometry = fence.geometry
+    if geometry["type"] == "Point":
+        lon, lat = geometry["coordinates"]
+        return Circle(lon, lat, fence.radius_km)
+
+    key = polygons.geometry_key(geometry)
+    prepared = polygons.get_cached(key)
+    if prepared is None:
+        prepared = polygons.PreparedGeometry(geometry)
+        polygons.cache_prepared(key, prepared)
+
+    return prepared
+
+
+def _cell_size(level):
+    return get_setting("GEOFENCE_CELL_DEGREES") * 2**level
+
+
+def _cell(level, lat, lon):
+    size = _cell_size(level)
+    return math.floor((lon + 180) / size), math.floor((lat + 90) / size)
+
+
+def _bbox_cells(level, west, south, east, north):
+    x_min, y_min = _cell(level, south, west)
+    x_max, y_max = _cell(level, north, east)
+
+    if west <= east:
+        columns = range(x_min, x_max + 1)
+    else:
+        # Crossing the antimeridian: from west to 180 and from -180 to east
+        columns = [*range(x_min, _cell(level, 0, 180)[0] + 1), *range(0, x_max + 1)]
+
+    return {(x, y) for x in columns for y in range(y_min, y_max + 1)}
+
+
+def fence_cells(prepared):
+    """
+    (level, cell_x, cell_y) of the index cells of a prepared fence
+    """
+    levels = get_setting("GEOFENCE_LEVELS")
+
+    for level in range(levels):
+        cells = set()
+        for bbox in prepared.bboxes:
+            cells |= _bbox_cells(level, *bbox)
+        if len(cells) <= get_setting("GEOFENCE_MAX_CELLS") or level == levels - 1:
+            return [(level, cell_x, cell_y) for cell_x, cell_y in sorted(cells)]
+
+
+def index_fence(fence):
+    """
+    Replace the index cells of a created or changed fence
+    """
+    GeofenceCell.objects.filter(fence=fence).delete()
+    GeofenceCell.objects.bulk_create(
+        GeofenceCell(fence=fence, level=level, cell_x=cell_x, cell_y=cell_y)
+        for level, cell_x, cell_y in fence_cells(prepare(fence))
+    )
+
+
+def matching_fences(lat, lon):
+    """
+    Fences containing the position, ordered by id
+    """
+    cells = reduce(
+        operator.or_,
+        (
+            Q(level=level, cell_x=cell_x, cell_y=cell_y)
+            for level in range(get_setting("GEOFENCE_LEVELS"))
+            for cell_x, cell_y in [_cell(level, lat, lon)]
+        ),
+    )
+    candidates = {
+        cell.fence.id: cell.fence
+        for cell in GeofenceCell.objects.filter(cells).select_related("fence")
+    }
+
+    return [
+        fence
+        for fence_id, fence in sorted(candidates.items())
+        if prepare(fence).contains(lon, lat)
+    ]
+
+
+def record_matches(point):
+    """
+    Store and return the fences containing a newly created point
+    """
+    if point.latitude is None or point.longitude is None:
+        return []
+
+    fences = matching_fences(point.latitude, point.longitude)
+    GeofenceMatch.objects.bulk_create(
+        [GeofenceMatch(fence=fence, point=point) for fence in fences],
+        ignore_conflicts=True,
+    )
+
+    return fences
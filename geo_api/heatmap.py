@@ -0,0 +1,122 @@
+"""
+Pre-aggregated density heatmap of points and messages.
+
+For every resolution from 0 to HEATMAP_MAX_RESOLUTION the map is split
+into a Web Mercator grid of 2 ** resolution cells per axis (the tile grid
+of the same zoom). HeatmapBin rows hold the number of points and messages
+in every non-empty cell.
+
+Bins are updated incrementally on point / message writes (see signals.py)
+with a single upsert per write, covering all resolutions, and can be
+rebuilt from scratch with `manage.py rebuild_heatmap`.
+"""
+
+from django.db import connection, transaction
+from django.db.models import Count, Q
+
+from .conf import get_setting
+from .models import GeoPoint, HeatmapBin
+from .utils import mercator_bbox_cells, mercator_cell, mercator_lat_lon
+
+
+def position_bins(lat, lon):
+    """
+    Return (resolution, cell_x, cell_y) of the position for every resolution
+    """
+    return [
+        (resolution, *mercator_cell(lat, lon, 2**resolution))
+        for resolution in range(get_setting("HEATMAP_MAX_RESOLUTION") + 1)
+    ]
+
+
+def add(lat, lon, points=0, messages=0):
+    """
+    Add counts (negative to subtract) to the bins of a position
+    """
+    bins = position_bins(lat, lon)
+    table = HeatmapBin._meta.db_table
+
+    # INSERT ... ON CONFLICT DO UPDATE increments existing bins and creates
+    # missing ones in one statement, without read-modify-write races
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (resolution, cell_x, cell_y, points, messages) "
+            f"VALUES {', '.join(['(%s, %s, %s, %s, %s)'] * len(bins))} "
+            "ON CONFLICT (resolution, cell_x, cell_y) DO UPDATE SET "
+            f"points = {table}.points + excluded.points, "
+            f"messages = {table}.messages + excluded.messages",
+            [value for cell in bins for value in (*cell, points, messages)],
+        )
+
+    if points < 0 or messages < 0:
+        cells = Q()
+        for resolution, cell_x, cell_y in bins:
+            cells |= Q(resolution=resolution, cell_x=cell_x, cell_y=cell_y)
+        HeatmapBin.objects.filter(cells, points__lte=0, messages__lte=0).delete()
+
+
+@transaction.atomic
+def rebuild():
+    """
+    Recompute all bins from the GeoPoint and PointMessage tables.
+    Returns the number of bins created
+    """
+    bins = {}
+
+    points = (
+        GeoPoint.objects.filter(latitude__isnull=False, longitude__isnull=False)
+        .annotate(message_count=Count("messages"))
+        .order_by("id")
+        .values_list("latitude", "longitude", "message_count")
+    )
+    for lat, lon, message_count in points.iterator(chunk_size=2000):
+        for cell in position_bins(lat, lon):
+            heatmap_bin = bins.get(cell)
+            if heatmap_bin is None:
+                heatmap_bin = bins[cell] = HeatmapBin(
+                    resolution=cell[0], cell_x=cell[1], cell_y=cell[2]
+                )
+
+            heatmap_bin.points += 1
+            heatmap_bin.messages += message_count
+
+    HeatmapBin.objects.all().delete()
+    HeatmapBin.objects.bulk_create(bins.values(), batch_size=1000)
+
+    return len(bins)
+
+
+def viewport_cells(resolution, west, south, east, north):
+    """
+    Bins covered by the bbox, see mercator_bbox_cells
+    """
+    return mercator_bbox_cells(2**resolution, west, south, east, north)
+
+
+def bins_queryset(resolution, x_ranges, y_range, with_messages=False):
+    """
+    Non-empty bins of the resolution inside the cell ranges
+    """
+    x_query = Q()
+    for x_from, x_to in x_ranges:
+        x_query |= Q(cell_x__gte=x_from, cell_x__lte=x_to)
+
+    non_empty = Q(points__gt=0)
+    if with_messages:
+        non_empty |= Q(messages__gt=0)
+
+    return HeatmapBin.objects.filter(
+        x_query,
+        non_empty,
+        resolution=resolution,
+        cell_y__gte=y_range[0],
+        cell_y__lte=y_range[1],
+    )
+
+
+def bin_center(resolution, cell_x, cell_y):
+    """
+    (lat, lon) of the center of a bin
+    """
+    cells = 2**resolution
+    return mercator_lat_lon((cell_x + 0.5) / cells, (cell_y + 0.5) / cells)
@@ -0,0 +1,277 @@
+"""
+Write-behind ingestion of point messages.
+
+With GEO_API["MESSAGE_INGEST"] = "queue", POST /api/points/messages/
+validates the message, appends it to a durable local queue and answers
+202 with a provisional id, without writing to the main database. The
+queue is a separate SQLite file (GEO_API["MESSAGE_QUEUE_PATH"]), so
+enqueueing never waits for the single writer of the main database.
+
+`manage.py run_message_queue` drains the queue: every batch of up to
+GEO_API["MESSAGE_QUEUE_BATCH_SIZE"] messages is inserted with one
+bulk_create in one transaction, which also applies what per-message
+signals would (change feed sequence, message locations, heatmap, tiles,
+search versions). The worker has no live subscribers to push to: SSE
+streams poll the change feed for queued messages instead (see live.py).
+The id of the last drained queue row is
+stored in the same transaction (WriteCounter "message-queue"), so a batch
+interrupted between the commit and its removal from the queue is not
+inserted twice.
+
+Searches call ensure_fresh() first: if the oldest queued message is older
+than GEO_API["MESSAGE_QUEUE_MAX_STALENESS"] seconds (the worker is behind
+or not running) the request drains batches itself until it is not, so
+messages are visible at most that long after they were accepted. One
+request per process drains at a time, the others wait for it. Draining in
+a request stops after GEO_API["MESSAGE_QUEUE_DRAIN_SECONDS"]: a backlog too
+large for that is left to the worker and is visible later.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from . import heatmap, locations, tiles, versions
+from .conf import get_setting
+from .models import GeoPoint, PointMessage, WriteCounter
+
+SYNC = "sync"
+QUEUE = "queue"
+MODES = (SYNC, QUEUE)
+
+# WriteCounter key holding the id of the last drained queue row
+DRAINED_KEY = "message-queue"
+
+
+def enabled():
+    return get_setting("MESSAGE_INGEST") == QUEUE
+
+
+def queue_path():
+    return get_setting("MESSAGE_QUEUE_PATH") or os.path.join(
+        settings.BASE_DIR, "message_queue.sqlite3"
+    )
+
+
+def drained_id():
+    return (
+        WriteCounter.objects.filter(key=DRAINED_KEY)
+        .values_list("version", flat=True)
+        .first()
+        or 0
+    )
+
+
+class MessageQueue:
+    """
+    Queued messages in a SQLite file, one connection per thread
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=FULL")
+            self._create(db)
+            self._local.db = db
+        return db
+
+    def close(self):
+        db = getattr(self._local, "db", None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+    def _create(self, db):
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            exists = db.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'messages'"
+            ).fetchone()
+            if not exists:
+                db.execute(
+                    "CREATE TABLE messages ("
+                    "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                    "point_id INTEGER NOT NULL, user_id INTEGER NOT NULL, "
+                    "text TEXT NOT NULL, enqueued_at REAL NOT NULL)"
+                )
+                # Continue after the last drained id: a recreated queue file
+                # must not reuse ids already marked as drained
+                db.execute(
+                    "INSERT INTO sqlite_sequence (name, seq) VALUES ('messages', ?)",
+                    [drained_id()],
+                )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def enqueue(self, point_id, user_id, text):
+        """
+        Durably append a message, return its queue (provisional) id
+        """
+        cursor = self.connection().execute(
+            "INSERT INTO messages (point_id, user_id, text, enqueued_at) "
+            "VALUES (?, ?, ?, ?)",
+            [point_id, user_id, text, time.time()],
+        )
+        return cursor.lastrowid
+
+    def pending(self, after_id, limit):
+        """
+        Up to limit queued messages with ids above after_id, oldest first:
+        (id, point_id, user_id, text)
+        """
+        cursor = self.connection().execute(
+            "SELECT id, point_id, user_id, text FROM messages "
+            "WHERE id > ? ORDER BY id LIMIT ?",
+            [after_id, limit],
+        )
+        return cursor.fetchall()
+
+    def remove_through(self, last_id):
+        self.connection().execute("DELETE FROM messages WHERE id <= ?", [last_id])
+
+    def oldest_enqueued_at(self):
+        cursor = self.connection().execute(
+            "SELECT enqueued_at FROM messages ORDER BY id LIMIT 1"
+        )
+        row = cursor.fetchone()
+        return row and row[0]
+
+    def __len__(self):
+        return self.connection().execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_queue():
+    """
+    The queue at the configured path
+    """
+    path = queue_path()
+    with _queues_lock:
+        if path not in _queues:
+            _queues[path] = MessageQueue(path)
+        return _queues[path]
+
+
+def enqueue(point, user, text):
+    return get_queue().enqueue(point.id, user.id, text)
+
+
+def drain_batch(batch_size=None):
+    """
+    Insert the next batch of queued messages. Returns the number of queue
+    rows consumed (messages of deleted points or users are dropped)
+    """
+    queue = get_queue()
+    batch_size = batch_size or get_setting("MESSAGE_QUEUE_BATCH_SIZE")
+
+    with transaction.atomic():
+        # Writing the mark first locks it: concurrent drains wait here and
+        # then skip the rows this one inserts
+        last_drained = WriteCounter.add(DRAINED_KEY, 0)
+        rows = queue.pending(last_drained, batch_size)
+        if not rows:
+            queue.remove_through(last_drained)
+            return 0
+
+        points = GeoPoint.objects.in_bulk({row[1] for row in rows})
+        users = User.objects.in_bulk({row[2] for row in rows})
+        messages = [
+            PointMessage(point=points[point_id], user=users[user_id], text=text)
+            for _, point_id, user_id, text in rows
+            if point_id in points and user_id in users
+        ]
+
+        if messages:
+            last_seq = WriteCounter.next_change_seq(len(messages))
+            first_seq = last_seq - len(messages) + 1
+            for seq, message in enumerate(messages, start=first_seq):
+                message.change_seq = seq
+
+            PointMessage.objects.bulk_create(messages)
+            apply_signals(messages)
+
+        WriteCounter.objects.filter(key=DRAINED_KEY).update(version=rows[-1][0])
+
+    queue.remove_through(rows[-1][0])
+    return len(rows)
+
+
+def apply_signals(messages):
+    """
+    Effects of post_save signals skipped by bulk_create, once per point
+    """
+    locations.save_locations([locations.location_of(m) for m in messages])
+
+    per_point = Counter(message.point_id for message in messages)
+    points = {message.point_id: message.point for message in messages}
+    for point_id, count in per_point.items():
+        point = points[point_id]
+        if point.latitude is None or point.longitude is None:
+            continue
+        heatmap.add(point.latitude, point.longitude, messages=count)
+        tiles.invalidate_point(point.latitude, point.longitude, messages_only=True)
+        versions.bump(versions.MESSAGES, point.latitude, point.longitude)
+
+
+def drain(batch_size=None):
+    """
+    Drain the whole queue. Returns the number of queue rows consumed
+    """
+    total = 0
+    while consumed := drain_batch(batch_size):
+        total += consumed
+    return total
+
+
+_fresh_lock = threading.Lock()
+
+
+def is_stale():
+    """
+    Whether the oldest queued message is older than the staleness bound
+    """
+    oldest = get_queue().oldest_enqueued_at()
+    if oldest is None:
+        return False
+    return time.time() - oldest >= get_setting("MESSAGE_QUEUE_MAX_STALENESS")
+
+
+def ensure_fresh():
+    """
+    Drain batches until the oldest queued message is within the staleness
+    bound, for at most MESSAGE_QUEUE_DRAIN_SECONDS. Returns whether the
+    queue was stale: messages inserted meanwhile are not on the replicas yet
+    """
+    if not enabled() or not is_stale():
+        return False
+
+    deadline = time.monotonic() + get_setting("MESSAGE_QUEUE_DRAIN_SECONDS")
+
+    # Concurrent searches wait for the one draining, instead of queueing up
+    # on the database write lock with batches of their own
+    if not _fresh_lock.acquire(timeout=get_setting("MESSAGE_QUEUE_DRAIN_SECONDS")):
+        return True
+    try:
+        while time.monotonic() < deadline and is_stale():
+            if not drain_batch():
+                break
+    finally:
+        _fresh_lock.release()
+    return True
@@ -0,0 +1,321 @@
+"""
+In-process broker pushing new messages to live (SSE) subscribers.
+
+A subscriber watches a circle (center + radius). Subscriptions are indexed
+by the coarse grid cells (GEO_API["LIVE_CELL_DEGREES"]) their circle
+overlaps, so publishing a message only checks the subscribers registered in
+the cell of its point instead of every open connection. Circles covering
+more than GEO_API["LIVE_MAX_CELLS"] cells are kept in a short list checked
+for every message.
+
+Messages are published from the request thread after the transaction
+commits (see signals.py) and handed to the event loop of every matching
+connection. The broker lives in the memory of one process: run the API
+under a single ASGI process (see core/asgi.py) so that messages created
+through any request reach all subscribers.
+
+Queued messages (GEO_API["MESSAGE_INGEST"] = "queue") are inserted by the
+run_message_queue worker, whose broker has no subscribers. Streams then
+poll the change feed every GEO_API["LIVE_POLL_SECONDS"] instead, and
+ignore the broker.
+"""
+
+import asyncio
+import json
+import math
+import threading
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+
+from . import changes, singleflight
+from .conf import get_setting
+from .utils import haversine_distance, radius_bbox
+
+
+def _cell_size():
+    return get_setting("LIVE_CELL_DEGREES")
+
+
+def _cell(lat, lon):
+    size = _cell_size()
+    return math.floor(lat / size), math.floor(lon / size)
+
+
+def circle_cells(lat, lon, radius_km):
+    """
+    Grid cells overlapped by the bounding box of a circle
+    """
+    size = _cell_size()
+    west, south, east, north = radius_bbox(lat, lon, radius_km)
+    rows = range(math.floor(south / size), math.floor(north / size) + 1)
+
+    column_ranges = [(west, east)] if west <= east else [(west, 180), (-180, east)]
+    columns = [
+        column
+        for low, high in column_ranges
+        for column in range(math.floor(low / size), math.floor(high / size) + 1)
+    ]
+
+    return [(row, column) for row in rows for column in columns]
+
+
+def message_event(message, point_lat, point_lon):
+    """
+    Subscriber-independent part of a message event
+    """
+    return {
+        "id": message.id,
+        "change_seq": message.change_seq,
+        "text": message.text,
+        "created_at": message.created_at,
+        "point": {
+            "id": message.point.id,
+            "name": message.point.name,
+            "coordinates": {"type": "Point", "coordinates": [point_lon, point_lat]},
+        },
+        "user": {"id": message.user.id, "username": message.user.username},
+        "_position": (point_lat, point_lon),
+    }
+
+
+def format_event(event, distance_km):
+    """
+    Server-Sent Events frame of a message for one subscriber
+    """
+    data = {key: value for key, value in event.items() if key != "_position"}
+    data["distance_km"] = round(distance_km, 2)
+    payload = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)
+    return f"id: {event['change_seq']}\nevent: message\ndata: {payload}\n\n"
+
+
+class Subscription:
+    """
+    A live connection watching a circle, fed through an asyncio queue
+    """
+
+    def __init__(self, lat, lon, radius_km, loop=None, polling=False):
+        self.lat = lat
+        self.lon = lon
+        self.radius_km = radius_km
+        self.loop = loop or asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=get_setting("LIVE_QUEUE_SIZE"))
+        self.cells = []
+        self.overflowed = False
+        # Polling connections are subscribed only to be counted
+        self.polling = polling
+
+    def distance_to(self, lat, lon):
+        return haversine_distance(self.lat, self.lon, lat, lon)
+
+    def push(self, change_seq, frame):
+        """
+        Called in the subscriber's event loop. A subscriber too slow to keep
+        up is disconnected and resumes with Last-Event-ID
+        """
+        if self.overflowed or self.polling:
+            return
+        try:
+            self.queue.put_nowait((change_seq, frame))
+        except asyncio.QueueFull:
+            self.overflowed = True
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class Broker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cells = {}
+        self._wide = set()
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def subscribe(self, subscription):
+        cells = circle_cells(subscription.lat, subscription.lon, subscription.radius_km)
+
+        with self._lock:
+            if len(cells) > get_setting("LIVE_MAX_CELLS"):
+                self._wide.add(subscription)
+            else:
+                subscription.cells = cells
+                for cell in cells:
+                    self._cells.setdefault(cell, set()).add(subscription)
+            self._count += 1
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription in self._wide:
+                self._wide.discard(subscription)
+            elif subscription.cells:
+                for cell in subscription.cells:
+                    subscribers = self._cells.get(cell)
+                    if subscribers is None or subscription not in subscribers:
+                        continue
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._cells[cell]
+            else:
+                return
+            subscription.cells = []
+            self._count -= 1
+
+    def matching(self, lat, lon):
+        """
+        Return (subscription, distance_km) of subscribers whose circle
+        contains the position
+        """
+        with self._lock:
+            candidates = [*self._cells.get(_cell(lat, lon), ()), *self._wide]
+
+        matches = []
+        for subscription in candidates:
+            distance = subscription.distance_to(lat, lon)
+            if distance <= subscription.radius_km:
+                matches.append((subscription, distance))
+        return matches
+
+    def publish(self, event):
+        """
+        Deliver an event built by message_event() to matching subscribers.
+        Returns the number of subscribers reached
+        """
+        matches = self.matching(*event["_position"])
+
+        for subscription, distance in matches:
+            frame = format_event(event, distance)
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.push, event["change_seq"], frame
+                )
+            except RuntimeError:
+                # The connection's event loop is closed
+                self.unsubscribe(subscription)
+
+        return len(matches)
+
+
+broker = Broker()
+
+
+def replay(since, lat, lon, radius_km):
+    """
+    Frames of messages in the circle saved after the change feed cursor
+    `since`, for clients reconnecting with Last-Event-ID. Returns
+    (frames, change_seq of the last message read)
+    """
+    messages = changes.changed_messages(since, radius_bbox(lat, lon, radius_km))
+    frames = []
+
+    for message in messages.select_related("point")[: get_setting("LIVE_REPLAY_LIMIT")]:
+        since = message.change_seq
+        point = message.point
+        distance = haversine_distance(lat, lon, point.latitude, point.longitude)
+        if distance <= radius_km:
+            event = message_event(message, point.latitude, point.longitude)
+            frames.append((message.change_seq, format_event(event, distance)))
+
+    return frames, since
+
+
+async def shared_replay(key, since, lat, lon, radius_km):
+    """
+    replay() shared by connections of one area reading from the same
+    cursor, e.g. clients reconnecting together after a restart
+    """
+    result, _ = await singleflight.searches.ado(
+        (key, since, lat, lon, radius_km),
+        lambda: sync_to_async(replay)(since, lat, lon, radius_km),
+    )
+    return result
+
+
+async def poll(lat, lon, radius_km, last_seq):
+    """
+    Frames of messages read from the change feed after last_seq every
+    LIVE_POLL_SECONDS, with heartbeats
+    """
+    interval = get_setting("LIVE_POLL_SECONDS")
+    heartbeat = get_setting("LIVE_HEARTBEAT_SECONDS")
+    idle = 0
+    while True:
+        await asyncio.sleep(interval)
+        frames, last_seq = await shared_replay(
+            "live-poll", last_seq, lat, lon, radius_km
+        )
+        for _, frame in frames:
+            yield frame
+
+        idle = 0 if frames else idle + interval
+        if idle >= heartbeat:
+            idle = 0
+            yield ": ping\n\n"
+
+
+async def listen(subscription, last_seq):
+    """
+    Frames pushed by the broker after last_seq, with heartbeats, until the
+    subscriber falls behind
+    """
+    heartbeat = get_setting("LIVE_HEARTBEAT_SECONDS")
+    while True:
+        try:
+            item = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+        except asyncio.TimeoutError:
+            yield ": ping\n\n"
+            continue
+
+        if item is None:
+            break
+        change_seq, frame = item
+        if change_seq > last_seq:
+            yield frame
+
+
+async def stream(lat, lon, radius_km, last_event_id=None, polling=False):
+    """
+    Server-Sent Events of new messages in a circle, until the client
+    disconnects or falls behind. Polling streams read new messages from the
+    change feed instead of the broker
+    """
+    subscription = Subscription(lat, lon, radius_km, polling=polling)
+    broker.subscribe(subscription)
+
+    try:
+        # New polling streams start at the messages saved after connecting
+        last_seq = 0
+        if polling and last_event_id is None:
+            last_seq = await sync_to_async(changes.current_seq)()
+
+        yield f"retry: {get_setting('LIVE_RETRY_MS')}\n\n"
+
+        # Replay after subscribing, so that nothing is lost in between,
+        # and skip live events already replayed
+        if last_event_id is not None:
+            frames, last_seq = await shared_replay(
+                "live-replay", last_event_id, lat, lon, radius_km
+            )
+            for _, frame in frames:
+                yield frame
+
+        if polling:
+            frames = poll(lat, lon, radius_km, last_seq)
+        else:
+            frames = listen(subscription, last_seq)
+        async for frame in frames:
+            yield frame
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def publish_message(message):
+    """
+    Push a newly created message to subscribers around its point
+    """
+    point = message.point
+    if point.latitude is None or point.longitude is None or not len(broker):
+        return 0
+
+    return broker.publish(message_event(message, point.latitude, point.longitude))
@@ -0,0 +1,141 @@
+"""
+Denormalized message locations: the read model of message search.
+
+Every PointMessage has a MessageLocation row with a copy of its text and
+creation time, the position and (normalized) name of its point and the
+author's username. Message search reads this table alone, in one indexed
+range scan over (latitude, longitude), instead of joining messages to
+points and users and parsing point GeoJSON.
+
+Rows are written on message saves and updated when a point is saved
+(moved or renamed) or a user is renamed (see signals.py). Deleted messages,
+points and users cascade. `manage.py check_message_locations` compares the
+table with the source tables and can repair it.
+"""
+
+from django.db import transaction
+
+from .models import MessageLocation, PointMessage
+
+# Columns copied from the message, its point and its user
+SYNCED_FIELDS = (
+    "point",
+    "user",
+    "text",
+    "created_at",
+    "latitude",
+    "longitude",
+    "point_name",
+    "point_name_key",
+    "username",
+)
+
+
+def location_of(message):
+    """
+    Unsaved MessageLocation with the current data of the message
+    """
+    point = message.point
+    return MessageLocation(
+        message_id=message.id,
+        point_id=point.id,
+        user_id=message.user.id,
+        text=message.text,
+        created_at=message.created_at,
+        latitude=point.latitude,
+        longitude=point.longitude,
+        point_name=point.name,
+        point_name_key=point.name_key,
+        username=message.user.username,
+    )
+
+
+def save_locations(locations, batch_size=None):
+    """
+    Insert or update location rows, one upsert statement per batch
+    """
+    MessageLocation.objects.bulk_create(
+        locations,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=["message"],
+        update_fields=SYNCED_FIELDS,
+    )
+
+
+def sync_message(message):
+    save_locations([location_of(message)])
+
+
+def sync_point(point):
+    """
+    Copy the position and name of a point to the rows of its messages
+    """
+    return MessageLocation.objects.filter(point_id=point.id).update(
+        latitude=point.latitude,
+        longitude=point.longitude,
+        point_name=point.name,
+        point_name_key=point.name_key,
+    )
+
+
+def sync_user(user):
+    return MessageLocation.objects.filter(user_id=user.id).update(
+        username=user.username
+    )
+
+
+def delete_messages(message_ids):
+    """
+    Delete the rows of messages removed without delete signals
+    """
+    MessageLocation.objects.filter(message_id__in=message_ids).delete()
+
+
+def _row(location):
+    return tuple(
+        getattr(location, f"{field}_id" if field in ("point", "user") else field)
+        for field in SYNCED_FIELDS
+    )
+
+
+def check(repair=False, chunk_size=2000):
+    """
+    Compare the table with the messages, points and users it is derived
+    from. Returns {"missing": n, "stale": n, "orphaned": n}; with repair,
+    missing and stale rows are rewritten and orphaned ones deleted
+    """
+    counts = {"missing": 0, "stale": 0, "orphaned": 0}
+    messages = PointMessage.objects.select_related("point", "user").order_by("id")
+
+    last_id = 0
+    while True:
+        chunk = list(messages.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            break
+        last_id = chunk[-1].id
+
+        stored = MessageLocation.objects.in_bulk([message.id for message in chunk])
+        outdated = []
+        for message in chunk:
+            location = location_of(message)
+            if message.id not in stored:
+                counts["missing"] += 1
+            elif _row(stored[message.id]) != _row(location):
+                counts["stale"] += 1
+            else:
+                continue
+            outdated.append(location)
+
+        if repair and outdated:
+            save_locations(outdated)
+
+    orphaned = MessageLocation.objects.exclude(
+        message_id__in=PointMessage.objects.values("id")
+    )
+    counts["orphaned"] = orphaned.count()
+    if repair and counts["orphaned"]:
+        with transaction.atomic():
+            orphaned.delete()
+
+    return counts
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from geo_api import archive
+from geo_api.conf import get_setting
+from geo_api.models import PointMessage
+
+
+class Command(BaseCommand):
+    help = "Move messages older than the retention period to the compressed archive"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            help="Retention period (GEO_API MESSAGE_RETENTION_DAYS)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Messages moved per transaction (GEO_API ARCHIVE_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the messages to archive",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = archive.retention_cutoff(options["older_than_days"])
+        if cutoff is None:
+            raise CommandError("Retention is disabled (MESSAGE_RETENTION_DAYS=None)")
+
+        if options["dry_run"]:
+            count = PointMessage.objects.filter(created_at__lt=cutoff).count()
+            self.stdout.write(f"{count} messages created before {cutoff:%Y-%m-%d}")
+            return
+
+        batch_size = options["batch_size"] or get_setting("ARCHIVE_BATCH_SIZE")
+        total = 0
+        while True:
+            moved = archive.archive_batch(cutoff, batch_size)
+            total += moved
+            if moved < batch_size:
+                break
+            self.stdout.write(f"Archived {total} messages...")
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {total} messages"))
@@ -0,0 +1,216 @@
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from geo_api.models import GeoPoint
+
+CENTER_LAT, CENTER_LON = 55.75, 37.62
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure mixed search / create throughput with many threads for each "
+        "SQLite profile (SQLITE_PROFILES in core/settings.py). Every profile "
+        "runs on its own temporary copy of the database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=32)
+        parser.add_argument(
+            "--requests", type=int, default=100, help="Requests per thread"
+        )
+        parser.add_argument(
+            "--write-ratio",
+            type=float,
+            default=0.2,
+            help="Share of requests creating messages, the rest search points",
+        )
+        parser.add_argument("--points", type=int, default=2000)
+        parser.add_argument(
+            "--profiles",
+            nargs="+",
+            default=list(settings.SQLITE_PROFILES),
+            choices=list(settings.SQLITE_PROFILES),
+        )
+
+    def handle(self, *args, **options):
+        if connections[DEFAULT_DB_ALIAS].vendor != "sqlite":
+            raise CommandError("The default database is not SQLite")
+
+        with tempfile.TemporaryDirectory() as directory:
+            for profile in options["profiles"]:
+                path = os.path.join(directory, f"{profile}.sqlite3")
+                self.copy_database(path)
+                with self.use_database(path, settings.SQLITE_PROFILES[profile]):
+                    self.run(profile, options)
+
+    def copy_database(self, path):
+        """
+        Copy the migrated database, in the rollback journal mode of a new
+        file: profiles switch to WAL themselves
+        """
+        source = sqlite3.connect(connections[DEFAULT_DB_ALIAS].settings_dict["NAME"])
+        target = sqlite3.connect(path)
+        try:
+            source.backup(target)
+            target.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            source.close()
+            target.close()
+
+    @contextmanager
+    def use_database(self, path, profile):
+        """
+        Point the default alias of every thread at the copy, with the
+        connection settings and pragmas of the profile
+        """
+        original = connections.settings[DEFAULT_DB_ALIAS]
+        config = {**settings.GEO_API, "SQLITE_PRAGMAS": profile["PRAGMAS"]}
+
+        reset_default_connection(
+            {
+                **original,
+                "NAME": path,
+                "CONN_MAX_AGE": profile["CONN_MAX_AGE"],
+                "CONN_HEALTH_CHECKS": profile["CONN_HEALTH_CHECKS"],
+            }
+        )
+        try:
+            with override_settings(GEO_API=config, ALLOWED_HOSTS=["*"]):
+                yield
+        finally:
+            reset_default_connection(original)
+
+    def run(self, profile, options):
+        user = User.objects.create_user(username="benchmark-database")
+        point_ids = self.create_points(user, options["points"])
+        connections.close_all()
+
+        latencies = {"search": [], "create": []}
+        errors = {"search": 0, "create": 0}
+        lock = threading.Lock()
+
+        threads = [
+            threading.Thread(
+                target=self.send_requests,
+                args=(user, point_ids, number, options, latencies, errors, lock),
+            )
+            for number in range(options["threads"])
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        total = sum(len(values) for values in latencies.values())
+        self.stdout.write(
+            f"{profile}: threads={options['threads']} requests={total} "
+            f"throughput {total / elapsed:.0f} req/s"
+        )
+        for kind, values in latencies.items():
+            if len(values) < 2:
+                continue
+            p99 = statistics.quantiles(values, n=100)[98]
+            self.stdout.write(
+                f"  {kind}: {len(values)} requests, {errors[kind]} errors, "
+                f"p50 {statistics.median(values) * 1000:.2f} ms, "
+                f"p99 {p99 * 1000:.2f} ms"
+            )
+
+    def create_points(self, user, count):
+        """
+        Random points around the center, the same for every profile
+        """
+        random.seed(0)
+        points = GeoPoint.objects.bulk_create(
+            GeoPoint(
+                name=f"Point {i}",
+                coordinates={"type": "Point", "coordinates": [lon, lat]},
+                latitude=lat,
+                longitude=lon,
+                created_by=user,
+            )
+            for i, (lon, lat) in enumerate(
+                (
+                    CENTER_LON + random.uniform(-0.5, 0.5),
+                    CENTER_LAT + random.uniform(-0.3, 0.3),
+                )
+                for _ in range(count)
+            )
+        )
+        return [point.id for point in points]
+
+    def send_requests(self, user, point_ids, number, options, latencies, errors, lock):
+        """
+        Client thread: a random mix of message creations and point searches
+        """
+        rng = random.Random(number)
+        client = APIClient()
+        client.force_authenticate(user=user)
+        try:
+            for i in range(options["requests"]):
+                if rng.random() < options["write_ratio"]:
+                    kind = "create"
+                    request = partial(
+                        client.post,
+                        reverse("message-create"),
+                        {"point": rng.choice(point_ids), "text": f"Load {i}"},
+                        format="json",
+                    )
+                else:
+                    kind = "search"
+                    request = partial(
+                        client.get,
+                        reverse("point-search"),
+                        {
+                            "latitude": CENTER_LAT + rng.uniform(-0.2, 0.2),
+                            "longitude": CENTER_LON + rng.uniform(-0.4, 0.4),
+                            "radius": 5,
+                            "max_results": 50,
+                        },
+                    )
+
+                started = time.perf_counter()
+                try:
+                    failed = request().status_code >= 400
+                except Exception:
+                    failed = True
+                elapsed = time.perf_counter() - started
+                # End of request, as a WSGI server would signal it:
+                # closes connections unless they are persistent
+                close_old_connections()
+
+                with lock:
+                    latencies[kind].append(elapsed)
+                    errors[kind] += failed
+        finally:
+            connections.close_all()
+
+
+def reset_default_connection(database):
+    """
+    Close the default connection and create new ones from `database`
+    """
+    connections.close_all()
+    connections.settings[DEFAULT_DB_ALIAS] = database
+    try:
+        del connections[DEFAULT_DB_ALIAS]
+    except AttributeError:
+        # Not opened in this thread
+        pass
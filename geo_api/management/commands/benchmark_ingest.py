@@ -0,0 +1,134 @@
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from geo_api import ingest
+from geo_api.models import GeoPoint, PointMessage
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure message creation throughput and latency under concurrent "
+        "clients, inserted in the request and through the write-behind "
+        "queue. Needs a file database; benchmark data is deleted"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument(
+            "--requests", type=int, default=100, help="Requests per thread"
+        )
+        parser.add_argument("--batch-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(username="benchmark-ingest")
+        point = GeoPoint.objects.create(
+            name="Benchmark point",
+            coordinates={"type": "Point", "coordinates": [37.6173, 55.7558]},
+            created_by=user,
+        )
+
+        try:
+            for mode in ingest.MODES:
+                with tempfile.TemporaryDirectory() as directory:
+                    config = {
+                        **settings.GEO_API,
+                        "MESSAGE_INGEST": mode,
+                        "MESSAGE_QUEUE_PATH": os.path.join(directory, "queue.sqlite3"),
+                    }
+                    with override_settings(GEO_API=config, ALLOWED_HOSTS=["*"]):
+                        self.run(mode, user, point, options)
+        finally:
+            user.delete()
+
+    def run(self, mode, user, point, options):
+        latencies = []
+        errors = []
+        stop = threading.Event()
+
+        before = PointMessage.objects.filter(point=point).count()
+        worker = None
+        if mode == ingest.QUEUE:
+            worker = threading.Thread(
+                target=self.drain_queue, args=(stop, options["batch_size"])
+            )
+            worker.start()
+
+        started = time.perf_counter()
+        clients = [
+            threading.Thread(
+                target=self.post_messages,
+                args=(user, point, number, options["requests"], latencies, errors),
+            )
+            for number in range(options["threads"])
+        ]
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        accepted_seconds = time.perf_counter() - started
+
+        if worker:
+            stop.set()
+            worker.join()
+        stored_seconds = time.perf_counter() - started
+        stored = PointMessage.objects.filter(point=point).count() - before
+
+        p99 = statistics.quantiles(latencies, n=100)[98]
+        self.stdout.write(
+            f"{mode}: threads={options['threads']} requests={len(latencies)} "
+            f"errors={len(errors)}\n"
+            f"  accepted: {len(latencies) / accepted_seconds:.0f} req/s, "
+            f"p50 {statistics.median(latencies) * 1000:.2f} ms, "
+            f"p99 {p99 * 1000:.2f} ms\n"
+            f"  stored:   {stored / stored_seconds:.0f} messages/s "
+            f"({stored} messages in {stored_seconds:.2f} s)"
+        )
+
+    def post_messages(self, user, point, number, requests, latencies, errors):
+        """
+        Client thread: post messages one after another, appending request
+        latencies (list.append is atomic)
+        """
+        client = APIClient()
+        client.force_authenticate(user=user)
+        url = reverse("message-create")
+        try:
+            for i in range(requests):
+                started = time.perf_counter()
+                try:
+                    response = client.post(
+                        url, {"point": point.id, "text": f"Message {number}-{i}"}
+                    )
+                    failed = response.status_code >= 400
+                except Exception:
+                    failed = True
+                elapsed = time.perf_counter() - started
+
+                latencies.append(elapsed)
+                if failed:
+                    errors.append(elapsed)
+        finally:
+            connections.close_all()
+
+    def drain_queue(self, stop, batch_size):
+        """
+        Queue worker thread, like run_message_queue, until stop is set
+        """
+        try:
+            while not stop.is_set():
+                if not ingest.drain_batch(batch_size):
+                    time.sleep(0.01)
+            ingest.drain(batch_size)
+        finally:
+            connections.close_all()
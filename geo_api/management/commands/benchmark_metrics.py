@@ -0,0 +1,95 @@
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from geo_api.models import GeoPoint
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure overhead of search metrics: run the same searches with "
+        "metrics enabled and disabled. Benchmark data is rolled back"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--points", type=int, default=5000)
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument(
+            "--max-overhead",
+            type=float,
+            default=None,
+            help="Fail if metrics slow searches down by more than this percent",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                overhead = self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+        if options["max_overhead"] is not None and overhead > options["max_overhead"]:
+            raise CommandError(
+                f"Metrics overhead {overhead:.2f}% exceeds {options['max_overhead']}%"
+            )
+
+    def run(self, options):
+        user = User.objects.create_user(username="benchmark-metrics")
+        random.seed(0)
+        GeoPoint.objects.bulk_create(
+            GeoPoint(
+                name=f"Point {i}",
+                coordinates={"type": "Point", "coordinates": [lon, lat]},
+                latitude=lat,
+                longitude=lon,
+                created_by=user,
+            )
+            for i, (lon, lat) in enumerate(
+                (random.uniform(37, 38), random.uniform(55, 56))
+                for _ in range(options["points"])
+            )
+        )
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+        url = reverse("point-search")
+        params = {"latitude": 55.5, "longitude": 37.5, "radius": 10}
+
+        timings = {True: [], False: []}
+        for _ in range(options["requests"]):
+            # Alternate modes so that drift affects both equally
+            for enabled in (True, False):
+                config = {**settings.GEO_API, "METRICS_ENABLED": enabled}
+                with override_settings(GEO_API=config, ALLOWED_HOSTS=["*"]):
+                    started = time.perf_counter()
+                    response = client.get(url, params)
+                    timings[enabled].append(time.perf_counter() - started)
+
+                if response.status_code != 200:
+                    raise CommandError(f"Search failed: {response.status_code}")
+
+        enabled = statistics.median(timings[True])
+        disabled = statistics.median(timings[False])
+        overhead = (enabled - disabled) / disabled * 100
+
+        self.stdout.write(
+            f"points={options['points']} requests={options['requests']}\n"
+            f"median latency, metrics off: {disabled * 1000:.3f} ms\n"
+            f"median latency, metrics on:  {enabled * 1000:.3f} ms\n"
+            f"overhead: {overhead:+.2f}%"
+        )
+
+        return overhead
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from geo_api import locations
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the message locations read by message search with messages, "
+        "points and users, and optionally repair them"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repair",
+            action="store_true",
+            help="Rewrite missing and stale rows and delete orphaned ones",
+        )
+
+    def handle(self, *args, **options):
+        counts = locations.check(repair=options["repair"])
+        summary = ", ".join(f"{count} {kind}" for kind, count in counts.items())
+
+        if not any(counts.values()):
+            message = self.style.SUCCESS("Message locations are consistent")
+        elif options["repair"]:
+            message = self.style.SUCCESS(f"Repaired message locations: {summary}")
+        else:
+            message = self.style.WARNING(f"Inconsistent message locations: {summary}")
+        self.stdout.write(message)
@@ -0,0 +1,39 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from geo_api.conf import get_setting
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the SQLite database to the files of the read replicas "
+        "(GEO_API READ_REPLICAS), standing in for replication locally"
+    )
+
+    def handle(self, *args, **options):
+        replicas = get_setting("READ_REPLICAS")
+        if not replicas:
+            raise CommandError("No read replicas configured (GEO_API_REPLICAS)")
+
+        for alias in [DEFAULT_DB_ALIAS, *replicas]:
+            if connections[alias].vendor != "sqlite":
+                raise CommandError(f"Database {alias!r} is not SQLite")
+
+        source = sqlite3.connect(connections[DEFAULT_DB_ALIAS].settings_dict["NAME"])
+        try:
+            for alias in replicas:
+                connections[alias].close()
+                target = sqlite3.connect(connections[alias].settings_dict["NAME"])
+                try:
+                    # Online backup: a consistent snapshot while the primary
+                    # keeps serving writes
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f"Copied to {alias}")
+        finally:
+            source.close()
+
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {len(replicas)} replicas"))
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+
+from geo_api import dedupe
+from geo_api.models import GeoPoint
+
+
+class Command(BaseCommand):
+    help = (
+        "Merge near-duplicate points (similar names within the snap distance) "
+        "into the oldest point of each group"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--snap-meters",
+            type=float,
+            help="Maximum distance between duplicates (GEO_API DEDUPE_SNAP_METERS)",
+        )
+        parser.add_argument(
+            "--similarity",
+            type=float,
+            help="Minimum name similarity, 0-1 (GEO_API DEDUPE_NAME_SIMILARITY)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the groups of duplicates",
+        )
+
+    def handle(self, *args, **options):
+        radius_km = options["snap_meters"] and options["snap_meters"] / 1000
+        groups = dedupe.duplicate_groups(radius_km, options["similarity"])
+        duplicates = sum(len(group) - 1 for group in groups)
+
+        if options["dry_run"]:
+            for group in groups:
+                self.stdout.write(f"{group[0]}: duplicates {group[1:]}")
+            self.stdout.write(
+                f"Found {duplicates} duplicate points in {len(groups)} groups"
+            )
+            return
+
+        moved = 0
+        for group in groups:
+            points = GeoPoint.objects.in_bulk(group)
+            keeper = points[group[0]]
+            moved += dedupe.merge_points(keeper, [points[id] for id in group[1:]])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Merged {duplicates} duplicate points into {len(groups)} points, "
+                f"moved {moved} messages"
+            )
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from geo_api import clustering
+
+
+class Command(BaseCommand):
+    help = "Recompute precomputed point clusters for all zoom levels"
+
+    def handle(self, *args, **options):
+        created = clustering.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {created} clusters"))
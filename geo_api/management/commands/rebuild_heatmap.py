@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from geo_api import heatmap
+
+
+class Command(BaseCommand):
+    help = "Recompute pre-aggregated heatmap bins for all resolutions"
+
+    def handle(self, *args, **options):
+        created = heatmap.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {created} heatmap bins"))
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from geo_api import ingest
+from geo_api.conf import get_setting
+
+
+class Command(BaseCommand):
+    help = "Insert queued messages (MESSAGE_INGEST=queue) in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Messages inserted per transaction (GEO_API MESSAGE_QUEUE_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the queue and exit instead of polling it",
+        )
+
+    def handle(self, *args, **options):
+        if not ingest.enabled() and not options["once"]:
+            raise CommandError("Message queue is disabled (MESSAGE_INGEST='sync')")
+
+        if options["once"]:
+            total = ingest.drain(options["batch_size"])
+            self.stdout.write(self.style.SUCCESS(f"Drained {total} queued messages"))
+            return
+
+        self.stdout.write(f"Draining {ingest.queue_path()}")
+        try:
+            while True:
+                if not ingest.drain_batch(options["batch_size"]):
+                    time.sleep(get_setting("MESSAGE_QUEUE_POLL_INTERVAL"))
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,115 @@
+"""
+Distance matrices between sets of points or positions.
+
+Every location is converted once to a unit vector on the sphere. The
+great-circle distance of two locations is then 2R * asin(chord / 2), where
+the chord is the straight-line distance of their vectors: a row of the
+matrix is one math.dist() and one math.asin() call per column, both in C,
+instead of the trigonometry of haversine_distance() for every pair. The
+chord is computed from coordinate differences, so short distances keep
+their precision.
+
+Matrices are produced row by row, so a response can be streamed without
+holding the whole matrix: either as JSON or as raw little-endian float32
+kilometers, row-major.
+"""
+
+import array
+import math
+import sys
+from itertools import repeat
+
+from .models import GeoPoint
+from .utils import EARTH_RADIUS_KM
+
+JSON = "json"
+BINARY = "binary"
+FORMATS = (JSON, BINARY)
+
+
+# Vectors are shortened by a few ulps so that rounding never makes
+# chord / 2 exceed 1 (the domain of asin) for antipodal locations
+_SHRINK = 1 - 2**-50
+
+
+def unit_vector(lat, lon):
+    lat, lon = math.radians(lat), math.radians(lon)
+    cos_lat = math.cos(lat) * _SHRINK
+    return (
+        cos_lat * math.cos(lon),
+        cos_lat * math.sin(lon),
+        math.sin(lat) * _SHRINK,
+    )
+
+
+def load_positions(*location_lists):
+    """
+    Resolve lists of point ids and [longitude, latitude] positions to
+    (lat, lon) lists, reading all the points in one query.
+    Returns (position lists, sorted ids of missing points)
+    """
+    ids = {
+        location
+        for locations in location_lists
+        for location in locations
+        if isinstance(location, int)
+    }
+    points = {
+        point_id: (lat, lon)
+        for point_id, lat, lon in GeoPoint.objects.filter(
+            pk__in=ids, latitude__isnull=False, longitude__isnull=False
+        ).values_list("id", "latitude", "longitude")
+    }
+
+    missing = sorted(ids - points.keys())
+    position_lists = [
+        [
+            points.get(location) if isinstance(location, int) else location[::-1]
+            for location in locations
+        ]
+        for locations in location_lists
+    ]
+
+    return position_lists, missing
+
+
+def rows(sources, destinations):
+    """
+    Rows of distances in km from every source to every destination,
+    both lists of (lat, lon)
+    """
+    targets = [unit_vector(lat, lon) for lat, lon in destinations]
+    half, diameter = (0.5).__mul__, (2 * EARTH_RADIUS_KM).__mul__
+
+    for lat, lon in sources:
+        chords = map(math.dist, repeat(unit_vector(lat, lon)), targets)
+        # Chained map() keeps the per-cell loop in C
+        yield list(map(diameter, map(math.asin, map(half, chords))))
+
+
+def binary_chunks(sources, destinations):
+    """
+    The matrix as little-endian float32, one chunk per row
+    """
+    for row in rows(sources, destinations):
+        values = array.array("f", row)
+        if sys.byteorder != "little":
+            values.byteswap()
+        yield values.tobytes()
+
+
+def json_chunks(sources, destinations, precision=3):
+    """
+    The matrix as a JSON document, one chunk per row
+    """
+    yield (
+        f'{{"unit": "km", "sources": {len(sources)}, '
+        f'"destinations": {len(destinations)}, "rows": ['
+    )
+
+    spec = f".{precision}f"
+    for index, row in enumerate(rows(sources, destinations)):
+        separator = "," if index else ""
+        yield separator + "[" + ",".join([format(value, spec) for value in row]) + "]"
+
+    yield "]}"
@@ -0,0 +1,415 @@
+"""
+Lightweight in-process metrics with Prometheus text exposition.
+
+Values are aggregated in the memory of every process. With several worker
+processes (e.g. gunicorn) set GEO_API["METRICS_DIR"] to a directory shared
+by the workers: every process then dumps its values to
+<METRICS_DIR>/metrics-<pid>.json at most every METRICS_FLUSH_INTERVAL
+seconds, and /metrics sums the dumps of all processes. Dumps of exited
+processes are folded into <METRICS_DIR>/metrics-exited.json, so counters
+keep their totals while restarted workers do not pile up files.
+"""
+
+import bisect
+import fcntl
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from .conf import get_setting
+
+REGISTRY = []
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def snapshot(self):
+        with self._lock:
+            values = [[list(labels), value] for labels, value in self._values.items()]
+
+        return {
+            "type": self.type,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "values": values,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # [per-bucket counts (last one is +Inf), sum, count]
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def snapshot(self):
+        with self._lock:
+            values = [
+                [list(labels), [list(counts), total, count]]
+                for labels, (counts, total, count) in self._values.items()
+            ]
+
+        return {
+            "type": self.type,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "buckets": list(self.buckets),
+            "values": values,
+        }
+
+
+REQUESTS = Counter("geo_api_requests_total", "Handled requests", ["endpoint", "status"])
+REQUEST_DURATION = Histogram(
+    "geo_api_request_duration_seconds", "Request latency", ["endpoint"]
+)
+SEARCHES = Counter("geo_api_searches_total", "Executed searches", ["endpoint"])
+SEARCHES_COALESCED = Counter(
+    "geo_api_searches_coalesced_total",
+    "Requests served by the result of an identical concurrent search",
+    ["endpoint"],
+)
+SEARCH_CANDIDATES = Counter(
+    "geo_api_search_candidates_total", "Candidate rows read", ["endpoint"]
+)
+SEARCH_DISTANCE_EVALUATIONS = Counter(
+    "geo_api_search_distance_evaluations_total",
+    "Distance evaluations",
+    ["endpoint"],
+)
+SEARCH_MATCHES = Counter(
+    "geo_api_search_matches_total", "Rows matching the search", ["endpoint"]
+)
+SEARCH_DB_SECONDS = Histogram(
+    "geo_api_search_db_seconds", "Database time per search", ["endpoint"]
+)
+SEARCH_PYTHON_SECONDS = Histogram(
+    "geo_api_search_python_seconds", "Python time per search", ["endpoint"]
+)
+SEARCH_SERIALIZATION_SECONDS = Histogram(
+    "geo_api_search_serialization_seconds",
+    "Response rendering time per search",
+    ["endpoint"],
+)
+
+
+def enabled():
+    return get_setting("METRICS_ENABLED")
+
+
+class SearchStats:
+    """
+    Cost of a single search, recorded into the metrics above
+    """
+
+    __slots__ = (
+        "endpoint",
+        "candidates",
+        "distance_evaluations",
+        "matches",
+        "db_seconds",
+        "python_seconds",
+        "serialization_seconds",
+    )
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.candidates = 0
+        self.distance_evaluations = 0
+        self.matches = 0
+        self.db_seconds = 0.0
+        self.python_seconds = 0.0
+        self.serialization_seconds = 0.0
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        """
+        connection.execute_wrapper() hook adding query time to db_seconds
+        """
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+
+    @contextmanager
+    def time_db(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.db_seconds += time.perf_counter() - started
+
+    @contextmanager
+    def time_python(self):
+        """
+        Time a block, excluding queries recorded by db_wrapper inside it
+        """
+        started, db_before = time.perf_counter(), self.db_seconds
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.python_seconds += elapsed - (self.db_seconds - db_before)
+
+    def record(self):
+        if not enabled():
+            return
+
+        SEARCHES.inc(self.endpoint)
+        SEARCH_CANDIDATES.inc(self.endpoint, amount=self.candidates)
+        SEARCH_DISTANCE_EVALUATIONS.inc(self.endpoint, amount=self.distance_evaluations)
+        SEARCH_MATCHES.inc(self.endpoint, amount=self.matches)
+        SEARCH_DB_SECONDS.observe(self.db_seconds, self.endpoint)
+        SEARCH_PYTHON_SECONDS.observe(self.python_seconds, self.endpoint)
+        SEARCH_SERIALIZATION_SECONDS.observe(self.serialization_seconds, self.endpoint)
+        maybe_flush()
+
+
+def observe_request(endpoint, status_code, seconds):
+    if not enabled():
+        return
+
+    REQUESTS.inc(endpoint, str(status_code))
+    REQUEST_DURATION.observe(seconds, endpoint)
+    maybe_flush()
+
+
+# ---------------- Multi-process support ----------------
+
+_next_flush = 0.0
+
+
+def _snapshot():
+    return {metric.name: metric.snapshot() for metric in REGISTRY}
+
+
+PROCESS_FILE_RE = re.compile(r"metrics-(\d+)\.json")
+
+# Sum of the dumps of exited processes
+EXITED_FILE = "metrics-exited.json"
+
+
+def _process_file(directory):
+    return os.path.join(directory, f"metrics-{os.getpid()}.json")
+
+
+def flush():
+    """
+    Dump values of this process to METRICS_DIR (if configured)
+    """
+    directory = get_setting("METRICS_DIR")
+    if not directory:
+        return
+
+    path = _process_file(directory)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(_snapshot(), file)
+    os.replace(tmp_path, path)
+
+
+def maybe_flush():
+    global _next_flush
+
+    if not get_setting("METRICS_DIR"):
+        return
+
+    now = time.monotonic()
+    if now >= _next_flush:
+        _next_flush = now + get_setting("METRICS_FLUSH_INTERVAL")
+        flush()
+
+
+def _merge(target, snapshot):
+    for name, metric in snapshot.items():
+        merged = target.setdefault(name, {**metric, "values": {}})
+        for labels, value in metric["values"]:
+            key = tuple(labels)
+            if metric["type"] == "histogram":
+                counts, total, count = merged["values"].get(
+                    key, [[0] * len(value[0]), 0, 0]
+                )
+                value = [
+                    [a + b for a, b in zip(counts, value[0])],
+                    total + value[1],
+                    count + value[2],
+                ]
+            else:
+                value = merged["values"].get(key, 0) + value
+            merged["values"][key] = value
+
+
+def _as_snapshot(merged):
+    """
+    Inverse of _merge: snapshot format of merged values
+    """
+    return {
+        name: {
+            **metric,
+            "values": [
+                [list(labels), value] for labels, value in metric["values"].items()
+            ],
+        }
+        for name, metric in merged.items()
+    }
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, owned by another user
+        return True
+    return True
+
+
+def _fold_exited(directory):
+    """
+    Merge dumps of processes that no longer exist into EXITED_FILE
+    """
+    exited_path = os.path.join(directory, EXITED_FILE)
+
+    for filename in os.listdir(directory):
+        match = PROCESS_FILE_RE.fullmatch(filename)
+        if not match or _process_alive(int(match[1])):
+            continue
+
+        # Renaming claims the dump, so that concurrent scrapes fold it once
+        path = os.path.join(directory, filename)
+        claimed = f"{path}.{os.getpid()}.folding"
+        try:
+            os.rename(path, claimed)
+        except OSError:
+            continue
+
+        with open(f"{exited_path}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            merged = {}
+            for dump in (exited_path, claimed):
+                try:
+                    with open(dump) as file:
+                        _merge(merged, json.load(file))
+                except (OSError, ValueError):
+                    # No exited processes yet, or a dump cut short by a kill
+                    continue
+
+            tmp_path = f"{exited_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as file:
+                json.dump(_as_snapshot(merged), file)
+            os.replace(tmp_path, exited_path)
+
+        os.remove(claimed)
+
+
+def collect():
+    """
+    Return metric values of this process, or of all processes
+    sharing METRICS_DIR
+    """
+    merged = {}
+    directory = get_setting("METRICS_DIR")
+
+    if not directory:
+        _merge(merged, _snapshot())
+        return merged
+
+    flush()
+    _fold_exited(directory)
+    for filename in sorted(os.listdir(directory)):
+        if not (filename.startswith("metrics-") and filename.endswith(".json")):
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as file:
+                _merge(merged, json.load(file))
+        except (OSError, ValueError):
+            # File of a process being written or removed
+            continue
+
+    return merged
+
+
+# ---------------- Prometheus text format ----------------
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{%s}" % ",".join(pairs) if pairs else ""
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(collected=None):
+    """
+    Render metrics in the Prometheus text exposition format (version 0.0.4)
+    """
+    collected = collect() if collected is None else collected
+    lines = []
+
+    for name, metric in collected.items():
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        names = metric["labelnames"]
+
+        for labels, value in sorted(metric["values"].items()):
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_labels(names, labels)} {_number(value)}")
+                continue
+
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket in zip([*metric["buckets"], "+Inf"], counts):
+                cumulative += bucket
+                le = f'le="{bound}"'
+                lines.append(f"{name}_bucket{_labels(names, labels, le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, labels)} {_number(total)}")
+            lines.append(f"{name}_count{_labels(names, labels)} {count}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,181 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.db import connections
+
+from . import metrics, routers
+from .conf import get_setting
+
+logger = logging.getLogger("geo_api.profiling")
+
+
+class MetricsMiddleware:
+    """
+    Record per-endpoint request latency (see geo_api/metrics.py)
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not metrics.enabled():
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        response = self.get_response(request)
+
+        match = request.resolver_match
+        endpoint = match.url_name if match and match.url_name else "unmatched"
+        metrics.observe_request(
+            endpoint, response.status_code, time.perf_counter() - started
+        )
+
+        return response
+
+
+class RequestProfile:
+    """
+    SQL queries and timings of a single request
+    """
+
+    def __init__(self, collect_sql=False):
+        self.collect_sql = collect_sql
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements = Counter()
+        self.render_started = None
+        self.render_seconds = 0.0
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_seconds += time.perf_counter() - started
+            if self.collect_sql:
+                # Group statements differing only by literal values
+                self.statements[re.sub(r"\b\d+\b", "?", sql)] += 1
+
+    def sql_summary(self):
+        duplicates = sum(count - 1 for count in self.statements.values())
+        return f"queries={self.queries}; duplicates={duplicates}"
+
+
+class ProfilingMiddleware:
+    """
+    Per-request profiling of geo_api views:
+
+    - with GEO_API["PROFILING"] adds a Server-Timing header
+      with db, compute and render durations
+    - with GEO_API["PROFILING_SQL"] adds an X-SQL-Summary header
+      and logs repeated SQL statements (N+1 queries)
+    - with GEO_API["QUERY_BUDGET_LOG"] logs requests issuing more queries
+      than the `query_budget` declared by their view
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profiling = get_setting("PROFILING")
+        collect_sql = get_setting("PROFILING_SQL")
+        budget_log = get_setting("QUERY_BUDGET_LOG")
+
+        if not (profiling or collect_sql or budget_log):
+            return self.get_response(request)
+
+        profile = request.geo_profile = RequestProfile(collect_sql)
+        started = time.perf_counter()
+
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(profile.db_wrapper)
+                )
+            response = self.get_response(request)
+
+        total = time.perf_counter() - started
+        compute = max(total - profile.db_seconds - profile.render_seconds, 0)
+
+        if profiling:
+            response["Server-Timing"] = ", ".join(
+                f"{name};dur={seconds * 1000:.2f}"
+                for name, seconds in (
+                    ("db", profile.db_seconds),
+                    ("compute", compute),
+                    ("render", profile.render_seconds),
+                    ("total", total),
+                )
+            )
+
+        if collect_sql:
+            response["X-SQL-Summary"] = profile.sql_summary()
+            for statement, count in profile.statements.most_common():
+                if count > 1:
+                    logger.debug("%s: %d x %s", request.path, count, statement)
+
+        if budget_log:
+            self.check_query_budget(request, profile)
+
+        return response
+
+    def process_template_response(self, request, response):
+        """
+        Time rendering of DRF responses, which happens after the view returns
+        """
+        profile = getattr(request, "geo_profile", None)
+        if profile is None:
+            return response
+
+        profile.render_started = time.perf_counter()
+
+        def record_render(rendered_response):
+            profile.render_seconds = time.perf_counter() - profile.render_started
+
+        response.add_post_render_callback(record_render)
+
+        return response
+
+    def check_query_budget(self, request, profile):
+        match = request.resolver_match
+        view_class = getattr(match.func, "view_class", None) if match else None
+        budget = getattr(view_class, "query_budget", None)
+
+        if budget is not None and profile.queries > budget:
+            logger.warning(
+                "%s %s issued %d SQL queries, budget of %s is %d",
+                request.method,
+                request.path,
+                profile.queries,
+                view_class.__name__,
+                budget,
+            )
+
+
+class WriteStickinessMiddleware:
+    """
+    Record successful unsafe requests of authenticated users, so their next
+    reads within REPLICA_STICKY_SECONDS come from the primary
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        user = getattr(request, "user", None)
+        if (
+            request.method not in ("GET", "HEAD", "OPTIONS")
+            and response.status_code < 400
+            and user is not None
+            and user.is_authenticated
+            and get_setting("READ_REPLICAS")
+        ):
+            routers.mark_write(user.id)
+
+        return response
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:16
+
+from django.db import migrations, models
+
+from geo_api.utils import point_lon_lat
+
+
+def fill_lat_lon(apps, schema_editor):
+    GeoPoint = apps.get_model("geo_api", "GeoPoint")
+
+    for point in GeoPoint.objects.all().iterator():
+        try:
+            point.longitude, point.latitude = point_lon_lat(point.coordinates)
+        except (KeyError, TypeError, ValueError):
+            continue
+        point.save(update_fields=["latitude", "longitude"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("geo_api", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="geopoint",
+            name="latitude",
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="geopoint",
+            name="longitude",
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="geopoint",
+            index=models.Index(
+                fields=["latitude", "longitude"], name="geopoint_lat_lon_idx"
+            ),
+        ),
+        migrations.RunPython(fill_lat_lon, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("geo_api", "0002_geopoint_lat_lon"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PointCluster",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("zoom", models.PositiveSmallIntegerField()),
+                ("cell_x", models.IntegerField()),
+                ("cell_y", models.IntegerField()),
+                ("count", models.PositiveIntegerField(default=0)),
+                ("latitude_sum", models.FloatField(default=0)),
+                ("longitude_sum", models.FloatField(default=0)),
+                ("sample_ids", models.JSONField(default=list)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("zoom", "cell_x", "cell_y"),
+                        name="pointcluster_cell_unique",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_change_seq(apps, schema_editor):
+    """
+    Number existing rows in write order and continue the sequence after them
+    """
+    GeoPoint = apps.get_model("geo_api", "GeoPoint")
+    PointMessage = apps.get_model("geo_api", "PointMessage")
+    WriteCounter = apps.get_model("geo_api", "WriteCounter")
+
+    rows = [
+        (point.updated_at, 0, point.pk, point)
+        for point in GeoPoint.objects.only("pk", "updated_at")
+    ] + [
+        (message.created_at, 1, message.pk, message)
+        for message in PointMessage.objects.only("pk", "created_at")
+    ]
+    rows.sort(key=lambda row: row[:3])
+
+    for seq, (*_, instance) in enumerate(rows, start=1):
+        type(instance).objects.filter(pk=instance.pk).update(change_seq=seq)
+
+    WriteCounter.objects.update_or_create(
+        key="changes", defaults={"version": len(rows)}
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("geo_api", "0004_writecounter"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="geopoint",
+            name="change_seq",
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="pointmessage",
+            name="change_seq",
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="geopoint",
+            index=models.Index(fields=["change_seq"], name="geopoint_change_seq_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="pointmessage",
+            index=models.Index(fields=["change_seq"], name="message_change_seq_idx"),
+        ),
+        migrations.RunPython(fill_change_seq, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:58
+
+from django.db import migrations
+
+from geo_api import fulltext
+
+
+def install(apps, schema_editor):
+    fulltext.install(schema_editor)
+
+
+def uninstall(apps, schema_editor):
+    fulltext.uninstall(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("geo_api", "0005_change_seq"),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
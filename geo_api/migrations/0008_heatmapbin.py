@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("geo_api", "0007_geofence"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HeatmapBin",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("resolution", models.PositiveSmallIntegerField()),
+                ("cell_x", models.IntegerField()),
+                ("cell_y", models.IntegerField()),
+                ("points", models.IntegerField(default=0)),
+                ("messages", models.IntegerField(default=0)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("resolution", "cell_x", "cell_y"),
+                        name="heatmapbin_cell_unique",
+                    )
+                ],
+            },
+        ),
+    ]
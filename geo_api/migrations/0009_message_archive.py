@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("geo_api", "0008_heatmapbin"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MessageArchive",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("month", models.DateField()),
+                ("count", models.PositiveIntegerField(default=0)),
+                ("data", models.BinaryField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="pointmessage",
+            index=models.Index(fields=["created_at"], name="message_created_at_idx"),
+        ),
+        migrations.AddField(
+            model_name="messagearchive",
+            name="point",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="message_archives",
+                to="geo_api.geopoint",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="messagearchive",
+            constraint=models.UniqueConstraint(
+                fields=("point", "month"), name="messagearchive_point_month_unique"
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("geo_api", "0009_message_archive"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="pointmessage",
+            index=models.Index(
+                fields=["point", "-created_at", "-id"], name="message_point_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+from geo_api.utils import normalize_name
+
+
+def fill_name_key(apps, schema_editor):
+    GeoPoint = apps.get_model("geo_api", "GeoPoint")
+
+    for point in GeoPoint.objects.only("id", "name").iterator():
+        point.name_key = normalize_name(point.name)[:255]
+        point.save(update_fields=["name_key"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("geo_api", "0010_message_point_created"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="geopoint",
+            name="name_key",
+            field=models.CharField(default="", editable=False, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name="geopoint",
+            index=models.Index(
+                fields=["created_by", "latitude", "longitude"],
+                name="geopoint_owner_lat_lon_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="geopoint",
+            index=models.Index(
+                fields=["created_at", "latitude", "longitude"],
+                name="geopoint_created_lat_lon_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="geopoint",
+            index=models.Index(
+                fields=["name_key", "latitude", "longitude"],
+                name="geopoint_name_lat_lon_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="pointmessage",
+            index=models.Index(fields=["user", "point"], name="message_user_point_idx"),
+        ),
+        migrations.RunPython(fill_name_key, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_message_locations(apps, schema_editor):
+    PointMessage = apps.get_model("geo_api", "PointMessage")
+    MessageLocation = apps.get_model("geo_api", "MessageLocation")
+
+    messages = PointMessage.objects.select_related("point", "user").order_by("id")
+    batch = []
+    for message in messages.iterator(chunk_size=2000):
+        batch.append(
+            MessageLocation(
+                message_id=message.id,
+                point_id=message.point_id,
+                user_id=message.user_id,
+                text=message.text,
+                created_at=message.created_at,
+                latitude=message.point.latitude,
+                longitude=message.point.longitude,
+                point_name=message.point.name,
+                point_name_key=message.point.name_key,
+                username=message.user.username,
+            )
+        )
+        if len(batch) >= 2000:
+            MessageLocation.objects.bulk_create(batch)
+            batch = []
+
+    MessageLocation.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("geo_api", "0011_search_filters"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MessageLocation",
+            fields=[
+                (
+                    "message",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="location",
+                        serialize=False,
+                        to="geo_api.pointmessage",
+                    ),
+                ),
+                ("text", models.TextField()),
+                ("created_at", models.DateTimeField()),
+                ("latitude", models.FloatField(null=True)),
+                ("longitude", models.FloatField(null=True)),
+                ("point_name", models.CharField(max_length=255)),
+                ("point_name_key", models.CharField(default="", max_length=255)),
+                ("username", models.CharField(max_length=150)),
+                (
+                    "point",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="message_locations",
+                        to="geo_api.geopoint",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="message_locations",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["latitude", "longitude"],
+                        name="msglocation_lat_lon_idx",
+                    ),
+                    models.Index(
+                        fields=["user", "latitude", "longitude"],
+                        name="msglocation_user_lat_lon_idx",
+                    ),
+                    models.Index(
+                        fields=["created_at", "latitude", "longitude"],
+                        name="msglocation_created_lat_idx",
+                    ),
+                    models.Index(
+                        fields=["point_name_key", "latitude", "longitude"],
+                        name="msglocation_name_lat_lon_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(fill_message_locations, migrations.RunPython.noop),
+    ]
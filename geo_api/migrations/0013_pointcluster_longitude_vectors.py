@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:05
+
+import math
+
+from django.db import migrations, models
+
+from geo_api.conf import get_setting
+from geo_api.utils import mercator_cell
+
+
+def fill_longitude_vectors(apps, schema_editor):
+    GeoPoint = apps.get_model("geo_api", "GeoPoint")
+    PointCluster = apps.get_model("geo_api", "PointCluster")
+
+    sums = {}
+    points = GeoPoint.objects.filter(
+        latitude__isnull=False, longitude__isnull=False
+    ).values_list("latitude", "longitude")
+    for lat, lon in points.iterator(chunk_size=2000):
+        vector = (math.cos(math.radians(lon)), math.sin(math.radians(lon)))
+        for zoom in range(get_setting("CLUSTER_MAX_ZOOM") + 1):
+            cells = 2**zoom * get_setting("CLUSTER_GRID_SIZE")
+            cell = (zoom, *mercator_cell(lat, lon, cells))
+            cos_sum, sin_sum = sums.get(cell, (0.0, 0.0))
+            sums[cell] = (cos_sum + vector[0], sin_sum + vector[1])
+
+    clusters = []
+    for cluster in PointCluster.objects.iterator(chunk_size=2000):
+        cell = (cluster.zoom, cluster.cell_x, cluster.cell_y)
+        cluster.longitude_cos_sum, cluster.longitude_sin_sum = sums.get(
+            cell, (0.0, 0.0)
+        )
+        clusters.append(cluster)
+    PointCluster.objects.bulk_update(
+        clusters, ["longitude_cos_sum", "longitude_sin_sum"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("geo_api", "0012_messagelocation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pointcluster",
+            name="longitude_cos_sum",
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name="pointcluster",
+            name="longitude_sin_sum",
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(fill_longitude_vectors, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="pointcluster",
+            name="longitude_sum",
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("geo_api", "0013_pointcluster_longitude_vectors"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="messagearchive",
+            name="messagearchive_point_month_unique",
+        ),
+        migrations.AddIndex(
+            model_name="messagearchive",
+            index=models.Index(
+                fields=["point", "month"], name="messagearchive_point_month"
+            ),
+        ),
+    ]
@@ -1,7 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from djgeojson.fields import PointField
 
+from .utils import normalize_name, point_lon_lat
+
 
 # Create your models here.
 class GeoPoint(models.Model):
@@ -16,9 +18,68 @@ class GeoPoint(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Denormalized copy of `coordinates` for indexed range queries
+    latitude = models.FloatField(null=True, editable=False)
+    longitude = models.FloatField(null=True, editable=False)
+    # Normalized name for indexed name prefix filters
+    name_key = models.CharField(max_length=255, default="", editable=False)
+    # Position in the change feed, reassigned on every save
+    change_seq = models.PositiveBigIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["latitude", "longitude"], name="geopoint_lat_lon_idx"),
+            models.Index(fields=["change_seq"], name="geopoint_change_seq_idx"),
+            # Filter column + spatial key for filtered radius searches
+            models.Index(
+                fields=["created_by", "latitude", "longitude"],
+                name="geopoint_owner_lat_lon_idx",
+            ),
+            models.Index(
+                fields=["created_at", "latitude", "longitude"],
+                name="geopoint_created_lat_lon_idx",
+            ),
+            models.Index(
+                fields=["name_key", "latitude", "longitude"],
+                name="geopoint_name_lat_lon_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+
+        # Remember the stored position to detect moves in post_save handlers
+        loaded = dict(zip(field_names, values))
+        position = (loaded.get("latitude"), loaded.get("longitude"))
+        if models.DEFERRED not in position:
+            instance._loaded_lat_lon = position
+
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Keep latitude/longitude columns in sync with GeoJSON coordinates
+        and name_key with the name
+        """
+        self.name_key = normalize_name(self.name)[:255]
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "name" in update_fields:
+            kwargs = {**kwargs, "update_fields": {*update_fields, "name_key"}}
+        try:
+            self.longitude, self.latitude = point_lon_lat(self.coordinates)
+        except (KeyError, TypeError, ValueError):
+            # Points with invalid coordinates are never found by searches
+            self.longitude = self.latitude = None
+
+        with transaction.atomic():
+            self.change_seq = WriteCounter.next_change_seq()
+            super().save(*args, **with_change_seq(kwargs))
+        self._loaded_lat_lon = (self.latitude, self.longitude)
+
 
 class PointMessage(models.Model):
     """Model for messages attached to geographic points"""
@@ -31,6 +92,269 @@ class PointMessage(models.Model):
     )
     text = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # Position in the change feed, reassigned on every save
+    change_seq = models.PositiveBigIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["change_seq"], name="message_change_seq_idx"),
+            models.Index(fields=["created_at"], name="message_created_at_idx"),
+            # Messages of an author, joined to points in the searched area
+            models.Index(fields=["user", "point"], name="message_user_point_idx"),
+            # Newest messages of a point first (messages feed)
+            models.Index(
+                fields=["point", "-created_at", "-id"],
+                name="message_point_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"Message by {self.user.username} for {self.point.name}"
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            self.change_seq = WriteCounter.next_change_seq()
+            super().save(*args, **with_change_seq(kwargs))
+
+
+class MessageLocation(models.Model):
+    """
+    Read model of message search: a message with the position and name of
+    its point and its author's username, kept in sync by signals (see
+    geo_api/locations.py), so searches read one table without joins
+    """
+
+    message = models.OneToOneField(
+        PointMessage,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="location",
+    )
+    point = models.ForeignKey(
+        GeoPoint, on_delete=models.CASCADE, related_name="message_locations"
+    )
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="message_locations"
+    )
+    text = models.TextField()
+    created_at = models.DateTimeField()
+    latitude = models.FloatField(null=True)
+    longitude = models.FloatField(null=True)
+    point_name = models.CharField(max_length=255)
+    point_name_key = models.CharField(max_length=255, default="")
+    username = models.CharField(max_length=150)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["latitude", "longitude"], name="msglocation_lat_lon_idx"
+            ),
+            # Filter column + spatial key for filtered message searches
+            models.Index(
+                fields=["user", "latitude", "longitude"],
+                name="msglocation_user_lat_lon_idx",
+            ),
+            models.Index(
+                fields=["created_at", "latitude", "longitude"],
+                name="msglocation_created_lat_idx",
+            ),
+            models.Index(
+                fields=["point_name_key", "latitude", "longitude"],
+                name="msglocation_name_lat_lon_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Location of message {self.message_id}"
+
+
+class PointCluster(models.Model):
+    """
+    Precomputed aggregate of points in one Web Mercator grid cell
+    at a given zoom level (see geo_api/clustering.py)
+    """
+
+    zoom = models.PositiveSmallIntegerField()
+    cell_x = models.IntegerField()
+    cell_y = models.IntegerField()
+    count = models.PositiveIntegerField(default=0)
+    latitude_sum = models.FloatField(default=0)
+    # Sums of the longitudes as unit vectors, see clustering.longitude_vector
+    longitude_cos_sum = models.FloatField(default=0)
+    longitude_sin_sum = models.FloatField(default=0)
+    sample_ids = models.JSONField(default=list)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["zoom", "cell_x", "cell_y"], name="pointcluster_cell_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Cluster z{self.zoom}/{self.cell_x}/{self.cell_y} ({self.count})"
+
+
+class WriteCounter(models.Model):
+    """
+    Monotonic write counter of a data kind in a grid cell or globally,
+    used to version search results (see geo_api/versions.py)
+    """
+
+    key = models.CharField(max_length=64, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key}: {self.version}"
+
+    @classmethod
+    def next_change_seq(cls, count=1):
+        """
+        Allocate the next `count` values of the change feed sequence and
+        return the last one.
+        Must be called inside the transaction saving the changed rows: the
+        counter row stays locked until commit, so changes become visible
+        in sequence order and feed cursors never skip a row
+        """
+        return cls.add(CHANGE_SEQ_KEY, count)
+
+    @classmethod
+    def add(cls, key, amount):
+        """
+        Add to a counter, creating it if needed, and return the new value
+        """
+        counters = cls.objects.filter(key=key)
+        if not counters.update(version=models.F("version") + amount):
+            cls.objects.bulk_create([cls(key=key, version=0)], ignore_conflicts=True)
+            counters.update(version=models.F("version") + amount)
+        return counters.values_list("version", flat=True).get()
+
+
+# WriteCounter key of the change feed sequence (see geo_api/changes.py)
+CHANGE_SEQ_KEY = "changes"
+
+
+def with_change_seq(save_kwargs):
+    """
+    Add change_seq to `update_fields` of a partial save
+    """
+    update_fields = save_kwargs.get("update_fields")
+    if update_fields is not None:
+        save_kwargs = {**save_kwargs, "update_fields": {*update_fields, "change_seq"}}
+    return save_kwargs
+
+
+class Geofence(models.Model):
+    """
+    Area watched for new points: a GeoJSON Polygon / MultiPolygon,
+    or a circle given as a GeoJSON Point with radius_km
+    """
+
+    name = models.CharField(max_length=255)
+    geometry = models.JSONField()
+    radius_km = models.FloatField(null=True, blank=True)
+    created_by = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="geofences"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+
+class GeofenceCell(models.Model):
+    """
+    Grid cell covered by a geofence, the spatial index used to find
+    fences containing a point (see geo_api/geofences.py)
+    """
+
+    fence = models.ForeignKey(Geofence, on_delete=models.CASCADE, related_name="cells")
+    level = models.PositiveSmallIntegerField()
+    cell_x = models.IntegerField()
+    cell_y = models.IntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["level", "cell_x", "cell_y"], name="geofencecell_cell_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.fence} L{self.level}/{self.cell_x}/{self.cell_y}"
+
+
+class GeofenceMatch(models.Model):
+    """A point created inside a geofence"""
+
+    fence = models.ForeignKey(
+        Geofence, on_delete=models.CASCADE, related_name="matches"
+    )
+    point = models.ForeignKey(
+        GeoPoint, on_delete=models.CASCADE, related_name="geofence_matches"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["fence", "point"], name="geofencematch_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.point} in {self.fence}"
+
+
+class HeatmapBin(models.Model):
+    """
+    Number of points and messages in one Web Mercator grid cell at a given
+    resolution (see geo_api/heatmap.py)
+    """
+
+    resolution = models.PositiveSmallIntegerField()
+    cell_x = models.IntegerField()
+    cell_y = models.IntegerField()
+    points = models.IntegerField(default=0)
+    messages = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["resolution", "cell_x", "cell_y"],
+                name="heatmapbin_cell_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"Bin r{self.resolution}/{self.cell_x}/{self.cell_y} "
+            f"({self.points} points, {self.messages} messages)"
+        )
+
+
+class MessageArchive(models.Model):
+    """
+    Messages of one point created in one month, moved out of PointMessage
+    by one batch of `manage.py archive_messages` (see geo_api/archive.py)
+    """
+
+    point = models.ForeignKey(
+        GeoPoint, on_delete=models.CASCADE, related_name="message_archives"
+    )
+    # First day of the month the messages were created in
+    month = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+    # zlib-compressed JSON list of messages
+    data = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["point", "month"], name="messagearchive_point_month"),
+        ]
+
+    def __str__(self):
+        return f"{self.count} messages of {self.point} from {self.month:%Y-%m}"
@@ -0,0 +1,114 @@
+"""
+Minimal Mapbox Vector Tile (v2.1) encoder for point layers.
+
+Only what we need is implemented: layers of POINT features with
+string/number properties, written as raw protobuf, so no external
+tile server or protobuf dependency is required.
+See https://github.com/mapbox/vector-tile-spec/tree/master/2.1
+"""
+
+import struct
+
+# Protobuf wire types
+VARINT = 0
+FIXED64 = 1
+LENGTH_DELIMITED = 2
+
+# Geometry commands and types from the spec
+MOVE_TO = 1
+POINT = 1
+
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+
+def _key(field, wire_type):
+    return _varint((field << 3) | wire_type)
+
+
+def _uint_field(field, value):
+    return _key(field, VARINT) + _varint(value)
+
+
+def _bytes_field(field, value):
+    return _key(field, LENGTH_DELIMITED) + _varint(len(value)) + value
+
+
+def _packed_field(field, values):
+    return _bytes_field(field, b"".join(_varint(value) for value in values))
+
+
+def _encode_value(value):
+    """
+    Encode a property value as a vector_tile.Tile.Value message
+    """
+    if isinstance(value, bool):
+        return _uint_field(7, int(value))
+    if isinstance(value, int) and value >= 0:
+        return _uint_field(5, value)
+    if isinstance(value, int):
+        return _key(6, VARINT) + _varint(_zigzag(value))
+    if isinstance(value, float):
+        return _key(3, FIXED64) + struct.pack("<d", value)
+    return _bytes_field(1, str(value).encode("utf-8"))
+
+
+def encode_layer(name, features, extent=4096):
+    """
+    Encode a layer of point features.
+    `features` is an iterable of (id, x, y, properties) where x/y are
+    integer tile coordinates in [0, extent) and properties is a dict
+    """
+    keys, values = {}, {}
+    encoded_features = []
+
+    for feature_id, x, y, properties in features:
+        tags = []
+        for key, value in properties.items():
+            if value is None:
+                continue
+            tags.append(keys.setdefault(key, len(keys)))
+            tags.append(values.setdefault((type(value), value), len(values)))
+
+        geometry = [(MOVE_TO & 0x7) | (1 << 3), _zigzag(x), _zigzag(y)]
+
+        encoded_features.append(
+            _bytes_field(
+                2,
+                _uint_field(1, feature_id)
+                + _packed_field(2, tags)
+                + _uint_field(3, POINT)
+                + _packed_field(4, geometry),
+            )
+        )
+
+    layer = (
+        _uint_field(15, 2)
+        + _bytes_field(1, name.encode("utf-8"))
+        + b"".join(encoded_features)
+        + b"".join(_bytes_field(3, key.encode("utf-8")) for key in keys)
+        + b"".join(_bytes_field(4, _encode_value(value)) for _, value in values)
+        + _uint_field(5, extent)
+    )
+
+    return layer
+
+
+def encode_tile(layers):
+    """
+    Encode a tile from already encoded layers (see encode_layer)
+    """
+    return b"".join(_bytes_field(3, layer) for layer in layers)
@@ -0,0 +1,123 @@
+"""
+Point-in-polygon search for GeoJSON Polygon / MultiPolygon geometries.
+
+Polygons are prepared once: edges are split into latitude bands, so a
+point is tested (even-odd ray casting) only against the few edges of its
+band instead of every edge. Prepared geometries are cached by a hash of
+their GeoJSON, so repeated queries with the same district polygon skip
+validation and edge preprocessing.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from .conf import get_setting
+
+# Target number of edges per latitude band
+EDGES_PER_BAND = 4
+MAX_BANDS = 1024
+
+
+class PreparedPolygon:
+    """
+    Polygon with holes, prepared for fast point-in-polygon tests
+    """
+
+    def __init__(self, rings):
+        outer = rings[0]
+        self.west = min(lon for lon, lat in outer)
+        self.east = max(lon for lon, lat in outer)
+        self.south = min(lat for lon, lat in outer)
+        self.north = max(lat for lon, lat in outer)
+
+        # Edges as (lat_from, lat_to, lon at lat_from, d_lon / d_lat).
+        # Horizontal edges never cross a horizontal ray and are skipped
+        edges = []
+        for ring in rings:
+            for (lon1, lat1), (lon2, lat2) in zip(ring, ring[1:]):
+                if lat1 == lat2:
+                    continue
+                if lat1 > lat2:
+                    lon1, lat1, lon2, lat2 = lon2, lat2, lon1, lat1
+                edges.append((lat1, lat2, lon1, (lon2 - lon1) / (lat2 - lat1)))
+
+        self.band_count = max(1, min(len(edges) // EDGES_PER_BAND, MAX_BANDS))
+        self.band_height = (self.north - self.south) / self.band_count or 1.0
+        self.bands = [[] for _ in range(self.band_count)]
+
+        for edge in edges:
+            for band in range(self._band(edge[0]), self._band(edge[1]) + 1):
+                self.bands[band].append(edge)
+
+    def _band(self, lat):
+        band = int((lat - self.south) / self.band_height)
+        return min(max(band, 0), self.band_count - 1)
+
+    def contains(self, lon, lat):
+        if not (self.west <= lon <= self.east and self.south <= lat <= self.north):
+            return False
+
+        # Even-odd rule: count edges crossed by a ray going east from the point
+        inside = False
+        for lat_from, lat_to, lon_from, slope in self.bands[self._band(lat)]:
+            if lat_from <= lat < lat_to and lon < lon_from + (lat - lat_from) * slope:
+                inside = not inside
+
+        return inside
+
+
+class PreparedGeometry:
+    """
+    Polygon or MultiPolygon, as a list of prepared polygons
+    """
+
+    def __init__(self, geometry):
+        if geometry["type"] == "Polygon":
+            polygons = [geometry["coordinates"]]
+        else:
+            polygons = geometry["coordinates"]
+
+        self.polygons = [PreparedPolygon(rings) for rings in polygons]
+
+    @property
+    def bboxes(self):
+        """
+        (west, south, east, north) of every polygon, for index prefiltering
+        """
+        return [
+            (polygon.west, polygon.south, polygon.east, polygon.north)
+            for polygon in self.polygons
+        ]
+
+    def contains(self, lon, lat):
+        return any(polygon.contains(lon, lat) for polygon in self.polygons)
+
+
+def geometry_key(geometry):
+    """
+    Stable hash of a GeoJSON geometry, used as the cache key
+    """
+    canonical = json.dumps(geometry, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_cached(key):
+    with _cache_lock:
+        prepared = _cache.get(key)
+        if prepared is not None:
+            _cache.move_to_end(key)
+        return prepared
+
+
+def cache_prepared(key, prepared):
+    with _cache_lock:
+        _cache[key] = prepared
+        _cache.move_to_end(key)
+        while len(_cache) > get_setting("POLYGON_CACHE_SIZE"):
+            _cache.popitem(last=False)
@@ -0,0 +1,137 @@
+"""
+Read-replica routing of search traffic.
+
+Searches are read-only, so inside `replica_reads()` (entered by
+ReplicaReadsMixin after the request is authenticated) ORM reads go to one
+of GEO_API["READ_REPLICAS"]; everything else, and all writes, use the
+default database.
+
+Replicas lag behind the primary, so a user who wrote something keeps
+reading from the primary for GEO_API["REPLICA_STICKY_SECONDS"] afterwards
+(read-your-writes): WriteStickinessMiddleware (see middleware.py) records
+the time of every successful unsafe request in the cache.
+
+Locally, replicas can be SQLite copies of the database: list their files
+in GEO_API_REPLICAS and refresh them with `manage.py copy_replicas`.
+"""
+
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .conf import get_setting
+
+_replica = ContextVar("geo_api_replica", default=None)
+
+STICKY_CACHE_KEY = "geo_api:last-write:{}"
+
+
+def mark_write(user_id):
+    """
+    Remember that the user has just written, see is_sticky()
+    """
+    seconds = get_setting("REPLICA_STICKY_SECONDS")
+    if seconds:
+        cache.set(STICKY_CACHE_KEY.format(user_id), time.time(), seconds)
+
+
+def is_sticky(user_id):
+    """
+    Whether the user wrote within the stickiness window
+    """
+    if user_id is None:
+        return False
+    written_at = cache.get(STICKY_CACHE_KEY.format(user_id))
+    if written_at is None:
+        return False
+    return time.time() - written_at < get_setting("REPLICA_STICKY_SECONDS")
+
+
+def choose_replica(user_id=None):
+    """
+    Replica alias for the reads of a request, or None for the primary
+    """
+    replicas = get_setting("READ_REPLICAS")
+    if not replicas or is_sticky(user_id):
+        return None
+    return random.choice(replicas)
+
+
+@contextmanager
+def replica_reads(user_id=None):
+    """
+    Route the ORM reads of the block to a replica, unless the user is sticky
+    """
+    token = _replica.set(choose_replica(user_id))
+    try:
+        yield _replica.get()
+    finally:
+        _replica.reset(token)
+
+
+def current_alias():
+    """
+    Replica alias the reads of the current block go to, None for the primary
+    """
+    return _replica.get()
+
+
+def read_primary():
+    """
+    Send the remaining reads of the current replica_reads() block to the
+    primary, e.g. after the request has written itself
+    """
+    _replica.set(None)
+
+
+class ReplicaRouter:
+    """
+    Send reads inside replica_reads() to the chosen replica
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = _replica.get()
+        if alias is None:
+            return None
+
+        # Reads inside a transaction on the primary (e.g. draining the
+        # message queue during a search) must see its writes
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are copies of the migrated primary
+        return db not in get_setting("READ_REPLICAS")
+
+
+class ReplicaReadsMixin:
+    """
+    APIView mixin running the handler of an authenticated request inside
+    replica_reads()
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        user_id = request.user.id if request.user.is_authenticated else None
+        self._replica_reads = replica_reads(user_id)
+        self._replica_reads.__enter__()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        replica_context = getattr(self, "_replica_reads", None)
+        if replica_context is not None:
+            self._replica_reads = None
+            replica_context.__exit__(None, None, None)
+        return super().finalize_response(request, response, *args, **kwargs)
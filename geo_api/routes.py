@@ -0,0 +1,102 @@
+"""
+Corridor search: points within a buffer distance of a route polyline.
+
+Route segments are grouped into chunks; the bbox of every chunk,
+extended by the buffer, prefilters candidates through the lat/lon index.
+Each candidate is then measured only against the segments whose extended
+bbox contains it, and ordered by its position along the route.
+"""
+
+import math
+import operator
+from functools import reduce
+
+from .search import bbox_queryset
+from .utils import EARTH_RADIUS_KM, haversine_distance, point_segment_distance
+
+# Number of consecutive segments sharing one prefilter bbox
+SEGMENTS_PER_CHUNK = 32
+
+
+class Segment:
+    __slots__ = ("start", "end", "offset_km", "west", "south", "east", "north")
+
+    def __init__(self, start, end, offset_km, buffer_km):
+        (lon1, lat1), (lon2, lat2) = start, end
+        self.start, self.end, self.offset_km = (lat1, lon1), (lat2, lon2), offset_km
+
+        dlat = math.degrees(buffer_km / EARTH_RADIUS_KM)
+        self.south = max(min(lat1, lat2) - dlat, -90.0)
+        self.north = min(max(lat1, lat2) + dlat, 90.0)
+
+        # Longitude degrees get shorter towards the poles
+        max_abs_lat = max(abs(self.south), abs(self.north))
+        if max_abs_lat >= 89.9:
+            self.west, self.east = -180.0, 180.0
+        else:
+            dlon = dlat / math.cos(math.radians(max_abs_lat))
+            self.west = max(min(lon1, lon2) - dlon, -180.0)
+            self.east = min(max(lon1, lon2) + dlon, 180.0)
+
+    def covers(self, lat, lon):
+        return self.south <= lat <= self.north and self.west <= lon <= self.east
+
+
+class Route:
+    """
+    LineString prepared for corridor search
+    """
+
+    def __init__(self, positions, buffer_km):
+        self.buffer_km = buffer_km
+        self.segments = []
+        self.length_km = 0.0
+
+        for start, end in zip(positions, positions[1:]):
+            segment = Segment(start, end, self.length_km, buffer_km)
+            self.segments.append(segment)
+            self.length_km += haversine_distance(*segment.start, *segment.end)
+
+        # (bbox, segments) of every chunk of consecutive segments
+        self.chunks = []
+        for i in range(0, len(self.segments), SEGMENTS_PER_CHUNK):
+            chunk = self.segments[i : i + SEGMENTS_PER_CHUNK]
+            bbox = (
+                min(segment.west for segment in chunk),
+                min(segment.south for segment in chunk),
+                max(segment.east for segment in chunk),
+                max(segment.north for segment in chunk),
+            )
+            self.chunks.append((bbox, chunk))
+
+    def candidates_queryset(self):
+        """
+        Points inside the extended bboxes of route chunks
+        """
+        return reduce(operator.or_, (bbox_queryset(*bbox) for bbox, _ in self.chunks))
+
+    def locate(self, lat, lon, stats=None):
+        """
+        Return (distance_km, along_route_km) of the closest route position,
+        or None if the point is farther than the buffer
+        """
+        best = None
+
+        for (west, south, east, north), chunk in self.chunks:
+            if not (south <= lat <= north and west <= lon <= east):
+                continue
+
+            for segment in chunk:
+                if not segment.covers(lat, lon):
+                    continue
+
+                if stats is not None:
+                    stats.distance_evaluations += 1
+
+                distance, along = point_segment_distance(
+                    lat, lon, *segment.start, *segment.end
+                )
+                if distance <= self.buffer_km and (best is None or distance < best[0]):
+                    best = (distance, segment.offset_km + along)
+
+        return best
@@ -0,0 +1,177 @@
+import heapq
+import math
+
+from django.db.models import Q
+
+from .conf import get_setting
+from .models import GeoPoint
+from .utils import EARTH_RADIUS_KM
+
+
+def validate_bbox(west, south, east, north):
+    """
+    Return an error message for an invalid bbox, or None if it is valid
+    """
+    if not all(-90 <= lat <= 90 for lat in (south, north)):
+        return "Latitude must be between -90 and 90 degrees"
+
+    if not all(-180 <= lon <= 180 for lon in (west, east)):
+        return "Longitude must be between -180 and 180 degrees"
+
+    if south > north:
+        return "South must not be greater than north"
+
+    return None
+
+
+def parse_bbox(value):
+    """
+    Parse a "west,south,east,north" query parameter.
+    Returns (bbox, error message)
+    """
+    try:
+        bbox = tuple(float(number) for number in value.split(","))
+    except ValueError:
+        bbox = ()
+
+    if len(bbox) != 4:
+        return None, "Bbox must be four numbers: west,south,east,north"
+
+    return bbox, validate_bbox(*bbox)
+
+
+def parse_max_results(value):
+    """
+    Parse the optional max_results query parameter, capped by
+    GEO_API["SEARCH_MAX_RESULTS"]. Returns (max_results, error message)
+    """
+    ceiling = get_setting("SEARCH_MAX_RESULTS")
+    if value is None:
+        return ceiling, None
+
+    try:
+        max_results = int(value)
+    except ValueError:
+        max_results = 0
+
+    if max_results <= 0:
+        return None, "Max results must be a positive integer"
+
+    return min(max_results, ceiling), None
+
+
+def bbox_queryset(west, south, east, north, queryset=None):
+    """
+    Points (or rows of another queryset with latitude / longitude columns)
+    inside the bbox, using the (latitude, longitude) index.
+    If west > east the bbox crosses the antimeridian and is split in two
+    """
+    if queryset is None:
+        queryset = GeoPoint.objects.all()
+    queryset = queryset.filter(latitude__gte=south, latitude__lte=north)
+
+    if west <= east:
+        return queryset.filter(longitude__gte=west, longitude__lte=east)
+
+    return queryset.filter(Q(longitude__gte=west) | Q(longitude__lte=east))
+
+
+class Nearest:
+    """
+    The `size` nearest items offered so far, kept in a bounded max-heap:
+    memory stays O(size) however many items match
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.offered = 0
+        self._heap = []
+
+    def push(self, distance, key, item):
+        """
+        Offer an item; `key` (unique, e.g. the id) breaks distance ties
+        """
+        self.offered += 1
+        entry = (-distance, -key, item)
+
+        if len(self._heap) < self.size:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def bound(self):
+        """
+        Distance of the farthest kept item once the heap is full: farther
+        items can't get in
+        """
+        if len(self._heap) < self.size:
+            return math.inf
+        return -self._heap[0][0]
+
+    def items(self):
+        """
+        Kept items ordered by distance
+        """
+        return [item for _, _, item in sorted(self._heap, reverse=True)]
+
+
+class LatitudeWalk:
+    """
+    Read points outward from the center latitude in chunks, using the
+    (latitude, longitude) index: the northern and southern sides are read
+    with keyset pagination, always continuing the side closer to the
+    center. Chunks double up to GEO_API["SEARCH_CHUNK_SIZE"].
+
+    A point can't be closer to the center than its latitude difference, so
+    after every chunk `min_distance_km()` bounds the distance of all points
+    not read yet, and the caller can stop once it exceeds what it needs
+    """
+
+    NORTH = "north"
+    SOUTH = "south"
+
+    def __init__(self, points, center_lat, chunk_size):
+        self.points = points
+        self.center_lat = center_lat
+        self.max_chunk_size = max(chunk_size, get_setting("SEARCH_CHUNK_SIZE"))
+        self.chunk_sizes = {self.NORTH: chunk_size, self.SOUTH: chunk_size}
+        self.gaps = {self.NORTH: 0.0, self.SOUTH: 0.0}
+        self.last = {self.NORTH: None, self.SOUTH: None}
+
+    def min_distance_km(self):
+        return math.radians(min(self.gaps.values())) * EARTH_RADIUS_KM
+
+    def __iter__(self):
+        while True:
+            side = min(self.gaps, key=self.gaps.get)
+            if self.gaps[side] == math.inf:
+                return
+            yield self._read(side)
+
+    def _read(self, side):
+        last = self.last[side]
+        size = self.chunk_sizes[side]
+
+        if side == self.NORTH:
+            if last is None:
+                after = Q(latitude__gte=self.center_lat)
+            else:
+                after = Q(latitude__gt=last[0]) | Q(latitude=last[0], pk__gt=last[1])
+            order = ("latitude", "pk")
+        else:
+            if last is None:
+                after = Q(latitude__lt=self.center_lat)
+            else:
+                after = Q(latitude__lt=last[0]) | Q(latitude=last[0], pk__lt=last[1])
+            order = ("-latitude", "-pk")
+
+        chunk = list(self.points.filter(after).order_by(*order)[:size])
+        self.chunk_sizes[side] = min(size * 2, self.max_chunk_size)
+
+        if len(chunk) < size:
+            self.gaps[side] = math.inf
+        else:
+            self.last[side] = (chunk[-1].latitude, chunk[-1].pk)
+            self.gaps[side] = abs(chunk[-1].latitude - self.center_lat)
+
+        return chunk
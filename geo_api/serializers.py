@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import GeoPoint, PointMessage
+from .conf import get_setting
+from .models import Geofence, GeoPoint, PointMessage
 
 
 class GeoPointSerializer(serializers.ModelSerializer):
@@ -84,3 +85,266 @@ class PointMessageSerializer(serializers.ModelSerializer):
         model = PointMessage
         fields = ["id", "point", "user", "text", "created_at"]
         read_only_fields = ["id", "user", "created_at"]
+
+
+class PolygonSearchSerializer(serializers.Serializer):
+    """
+    Validate a GeoJSON Polygon or MultiPolygon (RFC 7946) used as search area
+    Expected: {"type": "Polygon", "coordinates": [[[lon, lat], ...], ...]}
+    """
+
+    type = serializers.ChoiceField(
+        choices=["Polygon", "MultiPolygon"],
+        error_messages={
+            "invalid_choice": "GeoJSON type must be 'Polygon' or 'MultiPolygon'"
+        },
+    )
+    coordinates = serializers.JSONField()
+
+    def validate(self, data):
+        # 1. Polygon is a list of rings, MultiPolygon is a list of polygons
+        polygons = data["coordinates"]
+        if data["type"] == "Polygon":
+            polygons = [polygons]
+
+        if not isinstance(polygons, list) or not polygons:
+            raise serializers.ValidationError(
+                {"coordinates": "Coordinates must be a non-empty array"}
+            )
+
+        vertices = 0
+        for rings in polygons:
+            if not isinstance(rings, list) or not rings:
+                raise serializers.ValidationError(
+                    {"coordinates": "Polygon must be a non-empty array of rings"}
+                )
+
+            for ring in rings:
+                self.validate_ring(ring)
+                vertices += len(ring)
+
+        # 2. Limit the size of the polygon
+        max_vertices = get_setting("POLYGON_MAX_VERTICES")
+        if vertices > max_vertices:
+            raise serializers.ValidationError(
+                {"coordinates": f"Polygon must have at most {max_vertices} vertices"}
+            )
+
+        return data
+
+    def validate_ring(self, ring):
+        """
+        Check a linear ring: closed, at least 4 valid [lon, lat] positions
+        """
+        if not isinstance(ring, list) or len(ring) < 4:
+            raise serializers.ValidationError(
+                {"coordinates": "Ring must be an array of at least 4 positions"}
+            )
+
+        for position in ring:
+            if (
+                not isinstance(position, list)
+                or len(position) != 2
+                or not all(
+                    isinstance(value, (int, float)) and not isinstance(value, bool)
+                    for value in position
+                )
+            ):
+                raise serializers.ValidationError(
+                    {"coordinates": "Position must be [longitude, latitude] numbers"}
+                )
+
+            lon, lat = position
+            if not (-180 <= lon <= 180) or not (-90 <= lat <= 90):
+                raise serializers.ValidationError(
+                    {"coordinates": "Position is out of longitude/latitude range"}
+                )
+
+        if ring[0] != ring[-1]:
+            raise serializers.ValidationError(
+                {"coordinates": "Ring must be closed (first and last positions equal)"}
+            )
+
+
+class RouteSearchSerializer(serializers.Serializer):
+    """
+    Validate a corridor search: GeoJSON LineString route and buffer in km
+    Expected: {"route": {"type": "LineString", "coordinates": [[lon, lat], ...]},
+               "buffer_km": 0.5}
+    """
+
+    route = serializers.JSONField()
+    buffer_km = serializers.FloatField()
+
+    def validate_route(self, value):
+        # 1. Check it's a GeoJSON LineString
+        if not isinstance(value, dict) or value.get("type") != "LineString":
+            raise serializers.ValidationError("Route must be a GeoJSON LineString")
+
+        # 2. Check it has 2..ROUTE_MAX_VERTICES positions
+        positions = value.get("coordinates")
+        max_vertices = get_setting("ROUTE_MAX_VERTICES")
+        if not isinstance(positions, list) or not (2 <= len(positions) <= max_vertices):
+            raise serializers.ValidationError(
+                f"Route must have between 2 and {max_vertices} positions"
+            )
+
+        # 3. Check positions are valid [longitude, latitude]
+        for position in positions:
+            if (
+                not isinstance(position, list)
+                or len(position) != 2
+                or not all(
+                    isinstance(number, (int, float)) and not isinstance(number, bool)
+                    for number in position
+                )
+            ):
+                raise serializers.ValidationError(
+                    "Position must be [longitude, latitude] numbers"
+                )
+
+            lon, lat = position
+            if not (-180 <= lon <= 180) or not (-90 <= lat <= 90):
+                raise serializers.ValidationError(
+                    "Position is out of longitude/latitude range"
+                )
+
+        return value
+
+    def validate_buffer_km(self, value):
+        max_buffer = get_setting("ROUTE_MAX_BUFFER_KM")
+        if not (0 < value <= max_buffer):
+            raise serializers.ValidationError(
+                f"Buffer must be a positive number up to {max_buffer} km"
+            )
+
+        return value
+
+
+class DistanceMatrixSerializer(serializers.Serializer):
+    """
+    Validate a distance matrix request: sources and optional destinations
+    (the sources by default), each a list of point ids or [lon, lat]
+    Expected: {"sources": [1, 2, [37.6173, 55.7558]], "destinations": [3],
+               "format": "json"}
+    """
+
+    sources = serializers.JSONField()
+    destinations = serializers.JSONField(required=False)
+    format = serializers.ChoiceField(
+        choices=["json", "binary"],
+        default="json",
+        error_messages={"invalid_choice": "Format must be 'json' or 'binary'"},
+    )
+
+    def validate_locations(self, value):
+        # 1. Check it's a non-empty list
+        if not isinstance(value, list) or not value:
+            raise serializers.ValidationError(
+                "Locations must be a non-empty array of point ids or positions"
+            )
+
+        # 2. Check every item is a point id or a [longitude, latitude]
+        for location in value:
+            if isinstance(location, int) and not isinstance(location, bool):
+                continue
+
+            if (
+                not isinstance(location, list)
+                or len(location) != 2
+                or not all(
+                    isinstance(number, (int, float)) and not isinstance(number, bool)
+                    for number in location
+                )
+            ):
+                raise serializers.ValidationError(
+                    "Location must be a point id or [longitude, latitude] numbers"
+                )
+
+            lon, lat = location
+            if not (-180 <= lon <= 180) or not (-90 <= lat <= 90):
+                raise serializers.ValidationError(
+                    "Position is out of longitude/latitude range"
+                )
+
+        return value
+
+    def validate_sources(self, value):
+        return self.validate_locations(value)
+
+    def validate_destinations(self, value):
+        return self.validate_locations(value)
+
+    def validate(self, data):
+        # 3. Limit the size of the matrix
+        data.setdefault("destinations", data["sources"])
+        max_cells = get_setting("DISTANCE_MATRIX_MAX_CELLS")
+        if len(data["sources"]) * len(data["destinations"]) > max_cells:
+            raise serializers.ValidationError(
+                {"sources": f"Matrix must have at most {max_cells} cells"}
+            )
+
+        return data
+
+
+class GeofenceSerializer(serializers.ModelSerializer):
+    """
+    Geofence: GeoJSON Polygon / MultiPolygon, or a circle given as
+    a GeoJSON Point with radius_km
+    Expected: {"name": "Office", "geometry": {"type": "Point",
+               "coordinates": [lon, lat]}, "radius_km": 0.5}
+    """
+
+    geometry = serializers.JSONField()
+
+    def validate(self, data):
+        geometry = data.get("geometry", getattr(self.instance, "geometry", None))
+        radius_km = data.get("radius_km", getattr(self.instance, "radius_km", None))
+
+        if not isinstance(geometry, dict):
+            raise serializers.ValidationError(
+                {"geometry": "Geometry must be a GeoJSON object"}
+            )
+
+        # 1. Circle: a valid Point and a radius
+        if geometry.get("type") == "Point":
+            try:
+                GeoPointSerializer().validate_coordinates(geometry)
+            except serializers.ValidationError as error:
+                raise serializers.ValidationError({"geometry": error.detail})
+
+            max_radius = get_setting("GEOFENCE_MAX_RADIUS_KM")
+            if radius_km is None or not (0 < radius_km <= max_radius):
+                raise serializers.ValidationError(
+                    {
+                        "radius_km": "Circle geofence needs a positive radius "
+                        f"up to {max_radius} km"
+                    }
+                )
+
+            return data
+
+        # 2. Polygon or MultiPolygon, without a radius
+        polygon = PolygonSearchSerializer(data=geometry)
+        if not polygon.is_valid():
+            raise serializers.ValidationError({"geometry": polygon.errors})
+
+        if radius_km is not None:
+            raise serializers.ValidationError(
+                {"radius_km": "Radius is only allowed for circle (Point) geofences"}
+            )
+
+        return data
+
+    class Meta:
+        model = Geofence
+        fields = [
+            "id",
+            "name",
+            "geometry",
+            "radius_km",
+            "created_by",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = ["id", "created_by", "created_at", "updated_at"]
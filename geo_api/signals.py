@@ -0,0 +1,232 @@
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import (
+    clustering,
+    geofences,
+    heatmap,
+    live,
+    locations,
+    sqlite,
+    tiles,
+    versions,
+)
+from .models import Geofence, GeoPoint, PointMessage
+
+
+@receiver(post_save, sender=GeoPoint)
+def update_clusters_on_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Keep precomputed clusters in sync when a point is created or moved
+    """
+    if raw:
+        return
+
+    old_position = None if created else getattr(instance, "_loaded_lat_lon", None)
+    new_position = (instance.latitude, instance.longitude)
+
+    if old_position == new_position:
+        return
+
+    if old_position and None not in old_position:
+        clustering.remove_point(instance.pk, *old_position)
+
+    if None not in new_position:
+        clustering.add_point(instance.pk, *new_position)
+
+
+@receiver(post_delete, sender=GeoPoint)
+def update_clusters_on_delete(sender, instance, **kwargs):
+    """
+    Remove a deleted point from precomputed clusters
+    """
+    if instance.latitude is not None and instance.longitude is not None:
+        clustering.remove_point(instance.pk, instance.latitude, instance.longitude)
+
+
+@receiver(post_save, sender=GeoPoint)
+def invalidate_tiles_on_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Drop cached tiles showing the point, at its old and new position
+    """
+    if raw:
+        return
+
+    old_position = None if created else getattr(instance, "_loaded_lat_lon", None)
+
+    for position in (old_position, (instance.latitude, instance.longitude)):
+        if position and None not in position:
+            tiles.invalidate_point(*position)
+
+
+@receiver(post_delete, sender=GeoPoint)
+def invalidate_tiles_on_delete(sender, instance, **kwargs):
+    if instance.latitude is not None and instance.longitude is not None:
+        tiles.invalidate_point(instance.latitude, instance.longitude)
+
+
+@receiver(post_save, sender=PointMessage)
+@receiver(post_delete, sender=PointMessage)
+def invalidate_message_count_tiles(sender, instance, raw=False, **kwargs):
+    """
+    Drop cached tiles with message counts of the message's point
+    """
+    if raw or kwargs.get("created") is False:
+        return
+
+    point = instance.point
+    if point.latitude is not None and point.longitude is not None:
+        tiles.invalidate_point(point.latitude, point.longitude, messages_only=True)
+
+
+@receiver(post_save, sender=GeoPoint)
+def bump_point_versions_on_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Change search ETags of the areas around the old and new point position
+    """
+    if raw:
+        return
+
+    old_position = None if created else getattr(instance, "_loaded_lat_lon", None)
+    new_position = (instance.latitude, instance.longitude)
+
+    for position in {old_position, new_position}:
+        if position and None not in position:
+            versions.bump(versions.POINTS, *position)
+
+
+@receiver(post_delete, sender=GeoPoint)
+def bump_point_versions_on_delete(sender, instance, **kwargs):
+    if instance.latitude is not None and instance.longitude is not None:
+        versions.bump(versions.POINTS, instance.latitude, instance.longitude)
+
+
+@receiver(post_save, sender=PointMessage)
+@receiver(post_delete, sender=PointMessage)
+def bump_message_versions(sender, instance, raw=False, **kwargs):
+    """
+    Change message search ETags of the area around the message's point
+    """
+    if raw:
+        return
+
+    point = instance.point
+    if point.latitude is not None and point.longitude is not None:
+        versions.bump(versions.MESSAGES, point.latitude, point.longitude)
+
+
+@receiver(post_save, sender=PointMessage)
+def publish_new_message(sender, instance, created, raw=False, **kwargs):
+    """
+    Push a new message to live subscribers once it is committed
+    """
+    if raw or not created:
+        return
+
+    transaction.on_commit(partial(live.publish_message, instance))
+
+
+@receiver(post_save, sender=Geofence)
+def index_geofence(sender, instance, raw=False, **kwargs):
+    """
+    Rebuild the grid cells of a created or changed geofence
+    """
+    if raw:
+        return
+
+    geofences.index_fence(instance)
+
+
+@receiver(post_save, sender=GeoPoint)
+def update_heatmap_on_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Count a new point in the heatmap, or move a point and its messages
+    """
+    if raw:
+        return
+
+    old_position = None if created else getattr(instance, "_loaded_lat_lon", None)
+    new_position = (instance.latitude, instance.longitude)
+
+    if old_position == new_position:
+        return
+
+    messages = 0 if created else instance.messages.count()
+
+    if old_position and None not in old_position:
+        heatmap.add(*old_position, points=-1, messages=-messages)
+
+    if None not in new_position:
+        heatmap.add(*new_position, points=1, messages=messages)
+
+
+@receiver(post_delete, sender=GeoPoint)
+def update_heatmap_on_delete(sender, instance, **kwargs):
+    if instance.latitude is not None and instance.longitude is not None:
+        heatmap.add(instance.latitude, instance.longitude, points=-1)
+
+
+@receiver(post_save, sender=PointMessage)
+@receiver(post_delete, sender=PointMessage)
+def update_message_heatmap(sender, instance, raw=False, **kwargs):
+    """
+    Count created and deleted messages at the position of their point
+    """
+    if raw or kwargs.get("created") is False:
+        return
+
+    point = instance.point
+    if point.latitude is not None and point.longitude is not None:
+        amount = -1 if kwargs["signal"] is post_delete else 1
+        heatmap.add(point.latitude, point.longitude, messages=amount)
+
+
+@receiver(post_save, sender=PointMessage)
+def sync_message_location(sender, instance, raw=False, **kwargs):
+    """
+    Write the search row of a created or changed message
+    """
+    if raw:
+        return
+
+    locations.sync_message(instance)
+
+
+@receiver(post_save, sender=GeoPoint)
+def sync_point_message_locations(sender, instance, created, raw=False, **kwargs):
+    """
+    Copy a moved or renamed point to the search rows of its messages
+    """
+    if raw or created:
+        return
+
+    locations.sync_point(instance)
+
+
+@receiver(post_save, sender=User)
+def sync_user_message_locations(sender, instance, created, raw=False, **kwargs):
+    """
+    Copy a changed username to the search rows of the user's messages
+    """
+    if raw or created:
+        return
+
+    # Logins only save last_login
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and "username" not in update_fields:
+        return
+
+    locations.sync_user(instance)
+
+
+@receiver(connection_created)
+def tune_sqlite_connection(sender, connection, **kwargs):
+    """
+    Apply GEO_API["SQLITE_PRAGMAS"] to a new database connection
+    """
+    sqlite.apply_pragmas(connection)
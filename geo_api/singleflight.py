@@ -0,0 +1,82 @@
+"""
+Request coalescing ("single flight") for identical concurrent searches.
+
+When several requests ask for the same computation at the same time, the
+first one (the leader) runs it and the others wait for its result instead
+of repeating it. Nothing is cached: once the leader finishes, the next
+request computes again.
+
+SingleFlight.do() coalesces threads (WSGI / threaded workers), and
+SingleFlight.ado() coalesces coroutines of one event loop (ASGI).
+"""
+
+import asyncio
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._tasks = {}
+
+    def do(self, key, function):
+        """
+        Run function() once for concurrent calls with the same key.
+        Returns (result, shared): shared is True for calls that waited
+        for another thread's result
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = function()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result, False
+
+    async def ado(self, key, coroutine_function):
+        """
+        Await coroutine_function() once for concurrent coroutines of the
+        running event loop with the same key. Returns (result, shared)
+        """
+        key = (asyncio.get_running_loop(), key)
+        task = self._tasks.get(key)
+        shared = task is not None
+
+        if not shared:
+            task = self._tasks[key] = asyncio.ensure_future(coroutine_function())
+            task.add_done_callback(lambda done: self._tasks.pop(key, None))
+
+        # A cancelled waiter must not cancel the computation of the others
+        return await asyncio.shield(task), shared
+
+
+searches = SingleFlight()
@@ -0,0 +1,61 @@
+"""
+Tuning of SQLite connections.
+
+GEO_API["SQLITE_PRAGMAS"] (set by the database profile in
+core/settings.py) is applied to every new SQLite connection through the
+connection_created signal (see signals.py). With persistent connections
+(CONN_MAX_AGE) this runs once per connection, not once per request. The
+pragmas bypass Django's cursors, so they are not counted against the
+query budget of the request that happened to open the connection.
+"""
+
+import re
+
+from .conf import get_setting
+
+_PRAGMA_NAME = re.compile(r"^[a-z_]+$")
+
+
+def pragma_statements(pragmas):
+    """
+    PRAGMA statements for a {name: value} dict. Values are numbers or
+    keywords, which can't be passed as query parameters
+    """
+    statements = []
+    for name, value in pragmas.items():
+        if not _PRAGMA_NAME.match(name) or not re.match(r"^-?\w+$", str(value)):
+            raise ValueError(f"Invalid SQLite pragma: {name}={value!r}")
+        statements.append(f"PRAGMA {name} = {value}")
+    return statements
+
+
+def apply_pragmas(connection, pragmas=None):
+    """
+    Run the configured pragmas on a new connection
+    """
+    if connection.vendor != "sqlite":
+        return
+
+    if pragmas is None:
+        pragmas = get_setting("SQLITE_PRAGMAS")
+
+    # On the DB-API connection: connection setup is not a query of the
+    # request opening it (execute wrappers, query budgets)
+    connection.ensure_connection()
+    for statement in pragma_statements(pragmas):
+        connection.connection.execute(statement)
+
+
+def current_pragmas(connection, names):
+    """
+    {name: value} of pragmas as reported by the connection
+    """
+    values = {}
+    with connection.cursor() as cursor:
+        for name in names:
+            if not _PRAGMA_NAME.match(name):
+                raise ValueError(f"Invalid SQLite pragma: {name}")
+            cursor.execute(f"PRAGMA {name}")
+            row = cursor.fetchone()
+            values[name] = row and row[0]
+    return values
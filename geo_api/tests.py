@@ -1,11 +1,66 @@
-from django.test import TestCase
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.contrib import admin
 from django.contrib.auth.models import User
 from django.urls import reverse
+import array
+import asyncio
+import datetime
+import io
 import json
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
 from rest_framework import status
 from rest_framework.test import APIClient
-from .models import GeoPoint, PointMessage
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from django.utils import timezone
+from asgiref.sync import sync_to_async
+from .models import (
+    Geofence,
+    GeofenceCell,
+    GeoPoint,
+    HeatmapBin,
+    MessageArchive,
+    MessageLocation,
+    PointMessage,
+    PointCluster,
+    WriteCounter,
+)
 from .serializers import GeoPointSerializer, PointMessageSerializer
+from . import (
+    archive,
+    checks,
+    clustering,
+    dedupe,
+    filters,
+    fulltext,
+    geofences,
+    heatmap,
+    ingest,
+    live,
+    metrics,
+    mvt,
+    polygons,
+    routers,
+    singleflight,
+    sqlite,
+    tiles,
+)
+from .utils import haversine_distance
+from .views import GeoPointSearchView, PointMessageFeedView
 
 # ---------------- 🍰🍰🍰 POST /api/points/ 🍰🍰🍰 ------------------
 
@@ -63,6 +118,167 @@ class GeoPointCreateTests(TestCase):
         self.assertEqual(GeoPoint.objects.count(), 0)
 
 
+class GeoPointDedupeTests(TestCase):
+    """Tests for near-duplicate detection on create and dedupe_points"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.kremlin = GeoPoint.objects.create(
+            name="Moscow Kremlin",
+            description="",
+            coordinates={"type": "Point", "coordinates": [37.6173, 55.7558]},
+            created_by=self.user,
+        )
+
+    def create(self, name, lon, lat, dedupe="return", description=""):
+        return self.client.post(
+            f"{reverse('point-create')}?dedupe={dedupe}",
+            data=json.dumps(
+                {
+                    "name": name,
+                    "description": description,
+                    "coordinates": {"type": "Point", "coordinates": [lon, lat]},
+                }
+            ),
+            content_type="application/json",
+        )
+
+    def test_duplicate_returns_existing_point(self):
+        """Test that a similar name a few metres away returns the point"""
+        # ~10 m north of the Kremlin point
+        response = self.create("moscow kremlin!", 37.6173, 55.7559)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["id"], self.kremlin.id)
+        self.assertTrue(response.data["duplicate"])
+        self.assertEqual(GeoPoint.objects.count(), 1)
+
+    def test_different_or_distant_points_are_created(self):
+        """Test that other names and points beyond the snap distance are new"""
+        self.assertEqual(
+            self.create("Red Square", 37.6173, 55.7559).status_code,
+            status.HTTP_201_CREATED,
+        )
+        # ~110 m away
+        self.assertEqual(
+            self.create("Moscow Kremlin", 37.6173, 55.7568).status_code,
+            status.HTTP_201_CREATED,
+        )
+        self.assertEqual(
+            self.create("Moscow Kremlin", 37.6173, 55.7559, dedupe="off").status_code,
+            status.HTTP_201_CREATED,
+        )
+        self.assertEqual(GeoPoint.objects.count(), 4)
+
+    def test_merge_fills_missing_description(self):
+        """Test that merge keeps the submitted description"""
+        response = self.create(
+            "Moscow Kremlin", 37.6173, 55.7558, dedupe="merge", description="Fortress"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.kremlin.refresh_from_db()
+        self.assertEqual(self.kremlin.description, "Fortress")
+
+    def test_invalid_mode(self):
+        """Test that unknown dedupe modes are rejected"""
+        response = self.create("Moscow Kremlin", 37.6173, 55.7558, dedupe="maybe")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Dedupe", response.data["error"])
+
+    @override_settings(GEO_API={"DEDUPE_ON_CREATE": "return"})
+    def test_default_mode_setting(self):
+        """Test that the server can deduplicate by default"""
+        response = self.client.post(
+            reverse("point-create"),
+            data=json.dumps(
+                {
+                    "name": "Moscow Kremlin",
+                    "coordinates": {"type": "Point", "coordinates": [37.6173, 55.7558]},
+                }
+            ),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_dedupe_points_command(self):
+        """Test merging an existing table into the oldest points"""
+        copies = [
+            GeoPoint.objects.create(
+                name=name,
+                description=description,
+                coordinates={"type": "Point", "coordinates": [lon, lat]},
+                created_by=self.user,
+            )
+            for name, description, lon, lat in [
+                ("Moscow Kremlin.", "The fortress", 37.6174, 55.7558),
+                ("moscow  kremlin", "", 37.6173, 55.7557),
+                ("Red Square", "", 37.6173, 55.7558),
+                ("Moscow Kremlin", "", 37.6300, 55.7558),
+            ]
+        ]
+        PointMessage.objects.create(point=copies[0], user=self.user, text="Hi")
+        PointMessage.objects.create(point=copies[1], user=self.user, text="Hey")
+
+        self.assertEqual(
+            dedupe.duplicate_groups(), [[self.kremlin.id, copies[0].id, copies[1].id]]
+        )
+
+        out = io.StringIO()
+        call_command("dedupe_points", "--dry-run", stdout=out)
+        self.assertIn("Found 2 duplicate points in 1 groups", out.getvalue())
+        self.assertEqual(GeoPoint.objects.count(), 5)
+
+        out = io.StringIO()
+        call_command("dedupe_points", stdout=out)
+        self.assertIn("moved 2 messages", out.getvalue())
+
+        self.assertFalse(
+            GeoPoint.objects.filter(pk__in=[copies[0].pk, copies[1].pk]).exists()
+        )
+        self.assertEqual(self.kremlin.messages.count(), 2)
+        self.kremlin.refresh_from_db()
+        self.assertEqual(self.kremlin.description, "The fortress")
+
+        # Incrementally updated heatmap matches a rebuild
+        bins = set(
+            HeatmapBin.objects.values_list(
+                "resolution", "cell_x", "cell_y", "points", "messages"
+            )
+        )
+        heatmap.rebuild()
+        self.assertEqual(
+            bins,
+            set(
+                HeatmapBin.objects.values_list(
+                    "resolution", "cell_x", "cell_y", "points", "messages"
+                )
+            ),
+        )
+
+    def test_sweep_across_the_antimeridian(self):
+        """Test that duplicates on both sides of 180 degrees are grouped"""
+        east = GeoPoint.objects.create(
+            name="Date line",
+            coordinates={"type": "Point", "coordinates": [179.9999, 0]},
+            created_by=self.user,
+        )
+        west = GeoPoint.objects.create(
+            name="Date line",
+            coordinates={"type": "Point", "coordinates": [-179.9999, 0]},
+            created_by=self.user,
+        )
+
+        self.assertEqual(dedupe.duplicate_groups(), [[east.id, west.id]])
+
+
 # ---------------- 🍰🍰🍰 POST /api/points/messages/ 🍰🍰🍰 ------------------
 
 
@@ -291,6 +507,89 @@ class GeoPointSearchTests(TestCase):
         self.assertIn("error", response.data)
         self.assertIn("positive", response.data["error"].lower())
 
+    def test_search_orders_by_distance(self):
+        """Test that results are the nearest points first"""
+        response = self.client.get(
+            reverse("point-search"),
+            {"latitude": 55.7558, "longitude": 37.6173, "radius": 1000},
+        )
+
+        names = [point["name"] for point in response.data["points"]]
+        self.assertEqual(names, ["Moscow Kremlin", "Zelenograd", "St. Petersburg"])
+        self.assertEqual(response.data["max_results"], 1000)
+        self.assertFalse(response.data["truncated"])
+
+    def test_search_max_results(self):
+        """Test that max_results keeps only the nearest points"""
+        response = self.client.get(
+            reverse("point-search"),
+            {
+                "latitude": 55.7558,
+                "longitude": 37.6173,
+                "radius": 1000,
+                "max_results": 2,
+            },
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        names = [point["name"] for point in response.data["points"]]
+        self.assertEqual(names, ["Moscow Kremlin", "Zelenograd"])
+        self.assertEqual(response.data["points_found"], 2)
+        self.assertTrue(response.data["truncated"])
+
+    @override_settings(GEO_API={"SEARCH_MAX_RESULTS": 1})
+    def test_search_max_results_ceiling(self):
+        """Test that the server caps max_results"""
+        response = self.client.get(
+            reverse("point-search"),
+            {
+                "latitude": 55.7558,
+                "longitude": 37.6173,
+                "radius": 50,
+                "max_results": 10,
+            },
+        )
+
+        self.assertEqual(response.data["max_results"], 1)
+        self.assertEqual(response.data["points_found"], 1)
+        self.assertTrue(response.data["truncated"])
+
+    def test_search_invalid_max_results(self):
+        """Test that max_results must be a positive integer"""
+        for value in ["0", "-1", "ten", "1.5"]:
+            response = self.client.get(
+                reverse("point-search"),
+                {"latitude": 55, "longitude": 37, "radius": 5, "max_results": value},
+            )
+
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("Max results", response.data["error"])
+
+    @override_settings(GEO_API={"SEARCH_CHUNK_SIZE": 3})
+    def test_search_stops_early(self):
+        """Test that reading stops once no unread point can be nearer"""
+        GeoPoint.objects.bulk_create(
+            GeoPoint(
+                name=f"North {i}",
+                coordinates={"type": "Point", "coordinates": [10, 40 + i * 0.01]},
+                latitude=40 + i * 0.01,
+                longitude=10,
+                created_by=self.user,
+            )
+            for i in range(30)
+        )
+        metrics.SEARCH_CANDIDATES.clear()
+
+        response = self.client.get(
+            reverse("point-search"),
+            {"latitude": 40, "longitude": 10, "radius": 500, "max_results": 3},
+        )
+
+        names = [point["name"] for point in response.data["points"]]
+        self.assertEqual(names, ["North 0", "North 1", "North 2"])
+        self.assertTrue(response.data["truncated"])
+        self.assertLessEqual(metrics.SEARCH_CANDIDATES._values[("point-search",)], 6)
+
     def test_search_unauthenticated(self):
         """Test that search requires authentication"""
         client = APIClient()  # No authentication
@@ -384,6 +683,27 @@ class PointMessageSearchTests(TestCase):
         self.assertIn("Message in Zelenograd", message_texts)
         self.assertNotIn("Message in SPB", message_texts)  # Not within radius
 
+    def test_search_messages_max_results(self):
+        """Test that max_results keeps only the nearest messages"""
+        url = reverse("message-search")
+        params = {"latitude": 55.7558, "longitude": 37.6173, "radius": 1000}
+
+        response = self.client.get(url, params)
+        texts = [message["text"] for message in response.data["messages"]]
+        self.assertEqual(
+            texts, ["Message in Moscow", "Message in Zelenograd", "Message in SPB"]
+        )
+        self.assertFalse(response.data["truncated"])
+
+        response = self.client.get(url, {**params, "max_results": 1})
+        texts = [message["text"] for message in response.data["messages"]]
+        self.assertEqual(texts, ["Message in Moscow"])
+        self.assertEqual(response.data["max_results"], 1)
+        self.assertTrue(response.data["truncated"])
+
+        response = self.client.get(url, {**params, "max_results": "none"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_search_messages_non_numeric_parameters(self):
         """Test message search with non-numeric parameters"""
         url = reverse("message-search")
@@ -487,6 +807,2872 @@ class PointMessageSearchTests(TestCase):
             self.assertIn("username", message["user"])
 
 
+class PointMessageKeywordSearchTests(TestCase):
+    """Tests for ?q= keyword search in PointMessage radius search"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("message-search")
+        self.params = {"latitude": 55.7558, "longitude": 37.6173, "radius": 40}
+
+        self.point_moscow = GeoPoint.objects.create(
+            name="Moscow Point",
+            coordinates={"type": "Point", "coordinates": [37.6173, 55.7558]},
+            created_by=self.user,
+        )
+        self.point_spb = GeoPoint.objects.create(
+            name="SPB Point",
+            coordinates={"type": "Point", "coordinates": [30.3141, 59.9398]},
+            created_by=self.user,
+        )
+
+        self.coffee = PointMessage.objects.create(
+            point=self.point_moscow, user=self.user, text="Great coffee, nice view!"
+        )
+        self.museum = PointMessage.objects.create(
+            point=self.point_moscow, user=self.user, text="Музей закрыт на ремонт"
+        )
+        self.coffee_spb = PointMessage.objects.create(
+            point=self.point_spb, user=self.user, text="Coffee by the river"
+        )
+
+    def search(self, q):
+        response = self.client.get(self.url, {**self.params, "q": q})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(message["id"] for message in response.data["messages"])
+
+    def test_keywords_within_radius(self):
+        """Test that all keywords must match, case-insensitively, in radius"""
+        self.assertEqual(self.search("COFFEE"), [self.coffee.id])
+        self.assertEqual(self.search("coffee view"), [self.coffee.id])
+        self.assertEqual(self.search("coffee river"), [])
+        self.assertEqual(self.search("музей"), [self.museum.id])
+
+    def test_fts_syntax_is_not_interpreted(self):
+        """Test that FTS operators and quotes in q are plain words"""
+        self.assertEqual(self.search('coffee" OR "музей'), [])
+        self.assertEqual(self.search("coffee*"), [self.coffee.id])
+
+    def test_keywords_max_results(self):
+        """Test that keyword matches are limited to the nearest ones"""
+        response = self.client.get(
+            self.url, {**self.params, "radius": 1000, "q": "coffee", "max_results": 1}
+        )
+
+        self.assertEqual(
+            [message["id"] for message in response.data["messages"]], [self.coffee.id]
+        )
+        self.assertTrue(response.data["truncated"])
+
+    def test_both_plans_return_same_results(self):
+        """Test text-first and spatial-first intersections"""
+        bbox_points = GeoPoint.objects.all()
+        self.assertEqual(fulltext.plan(["ремонт"], bbox_points), fulltext.TEXT_FIRST)
+        self.assertEqual(
+            fulltext.plan(["coffee"], bbox_points.filter(pk=self.point_moscow.pk)),
+            fulltext.SPATIAL_FIRST,
+        )
+
+        messages = PointMessage.objects.filter(point=self.point_moscow)
+        self.assertEqual(
+            list(fulltext.filter_text_first(messages, ["coffee"])), [self.coffee]
+        )
+        self.assertEqual(
+            fulltext.matching_ids(["coffee"], [self.coffee.id, self.museum.id]),
+            {self.coffee.id},
+        )
+
+    def test_index_follows_updates_and_deletes(self):
+        """Test that the FTS index is kept in sync by triggers"""
+        self.coffee.text = "Tea only"
+        self.coffee.save()
+        self.assertEqual(self.search("coffee"), [])
+        self.assertEqual(self.search("tea"), [self.coffee.id])
+
+        self.coffee.delete()
+        self.assertEqual(self.search("tea"), [])
+
+
+class SearchFilterTests(TestCase):
+    """Tests for author, creation time and name filters of radius searches"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123"
+        )
+        self.other = User.objects.create_user(
+            username="otheruser", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.params = {"latitude": 55.7558, "longitude": 37.6173, "radius": 40}
+
+        self.cafe = GeoPoint.objects.create(
+            name="Café Pushkin",
+            coordinates={"type": "Point", "coordinates": [37.6044, 55.7637]},
+            created_by=self.user,
+        )
+        self.park = GeoPoint.objects.create(
+            name="Gorky Park",
+            coordinates={"type": "Point", "coordinates": [37.6017, 55.7298]},
+            created_by=self.other,
+        )
+        self.old_park = GeoPoint.objects.create(
+            name="Park Zaryadye",
+            coordinates={"type": "Point", "coordinates": [37.6286, 55.7512]},
+            created_by=self.user,
+        )
+        GeoPoint.objects.filter(pk=self.old_park.pk).update(
+            created_at=timezone.now() - datetime.timedelta(days=3)
+        )
+
+        self.mine = PointMessage.objects.create(
+            point=self.park, user=self.user, text="Nice park"
+        )
+        self.theirs = PointMessage.objects.create(
+            point=self.cafe, user=self.other, text="Good coffee"
+        )
+
+    def search_points(self, **params):
+        response = self.client.get(reverse("point-search"), {**self.params, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(point["id"] for point in response.data["points"])
+
+    def search_messages(self, **params):
+        response = self.client.get(reverse("message-search"), {**self.params, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(message["id"] for message in response.data["messages"])
+
+    def test_point_filters(self):
+        """Test owner, creation time and name prefix filters on points"""
+        yesterday = (timezone.now() - datetime.timedelta(days=1)).isoformat()
+
+        self.assertEqual(
+            self.search_points(created_by="me"), [self.cafe.id, self.old_park.id]
+        )
+        self.assertEqual(self.search_points(created_by=self.other.id), [self.park.id])
+        self.assertEqual(
+            self.search_points(created_after=yesterday), [self.cafe.id, self.park.id]
+        )
+        self.assertEqual(
+            self.search_points(created_by="me", created_after=yesterday),
+            [self.cafe.id],
+        )
+        self.assertEqual(
+            self.search_points(created_before=yesterday), [self.old_park.id]
+        )
+        self.assertEqual(self.search_points(name="CAFE"), [])
+        self.assertEqual(self.search_points(name="café"), [self.cafe.id])
+        self.assertEqual(self.search_points(name="park"), [self.old_park.id])
+
+    def test_message_filters(self):
+        """Test author, posting time and point name filters on messages"""
+        self.assertEqual(self.search_messages(created_by="me"), [self.mine.id])
+        self.assertEqual(self.search_messages(name="café"), [self.theirs.id])
+        self.assertEqual(self.search_messages(created_before="2000-01-01"), [])
+        self.assertEqual(
+            self.search_messages(created_by=self.other.id, q="coffee"),
+            [self.theirs.id],
+        )
+
+    def test_invalid_filters(self):
+        """Test that malformed filters are rejected"""
+        for params in ({"created_by": "someone"}, {"created_after": "yesterday"}):
+            response = self.client.get(
+                reverse("point-search"), {**self.params, **params}
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_both_plans_return_same_results(self):
+        """Test filter-first and space-first searches agree"""
+        points = GeoPoint.objects.all()
+        search_filters = filters.SearchFilters(created_by=self.user.id)
+        selective = points.filter(search_filters.point_q())
+        self.assertEqual(
+            search_filters.plan(selective, points, 1000), filters.FILTER_FIRST
+        )
+        self.assertEqual(search_filters.plan(points, selective, 1), filters.SPACE_FIRST)
+
+        # Empty counts always pick filter-first
+        with self.settings(GEO_API={"SEARCH_PLAN_MAX_COUNT": 0}):
+            self.assertEqual(
+                self.search_points(created_by="me"), [self.cafe.id, self.old_park.id]
+            )
+            self.assertEqual(self.search_messages(created_by="me"), [self.mine.id])
+
+    def test_name_key_follows_renames(self):
+        """Test that the normalized name is kept in sync with the name"""
+        self.park.name = "Sokolniki, park!"
+        self.park.save(update_fields=["name"])
+        self.park.refresh_from_db()
+        self.assertEqual(self.park.name_key, "sokolniki park")
+
+
+class MessageLocationTests(TestCase):
+    """Tests for the denormalized message locations read by message search"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.params = {"latitude": 55.7558, "longitude": 37.6173, "radius": 10}
+
+        self.point = GeoPoint.objects.create(
+            name="Red Square",
+            coordinates={"type": "Point", "coordinates": [37.6208, 55.7539]},
+            created_by=self.user,
+        )
+        self.message = PointMessage.objects.create(
+            point=self.point, user=self.user, text="Hello"
+        )
+
+    def search(self):
+        response = self.client.get(reverse("message-search"), self.params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["messages"]
+
+    def test_created_with_message(self):
+        """Test that a new message gets a location row"""
+        location = MessageLocation.objects.get(pk=self.message.pk)
+
+        self.assertEqual(location.point_id, self.point.id)
+        self.assertEqual(location.text, "Hello")
+        self.assertEqual(location.username, "testuser")
+        self.assertEqual((location.latitude, location.longitude), (55.7539, 37.6208))
+
+    def test_follows_point_moves_and_renames(self):
+        """Test that moved and renamed points update their messages' rows"""
+        self.point.name = "Far Away"
+        self.point.coordinates = {"type": "Point", "coordinates": [30.3141, 59.9398]}
+        self.point.save()
+
+        self.assertEqual(self.search(), [])
+        location = MessageLocation.objects.get(pk=self.message.pk)
+        self.assertEqual(location.point_name, "Far Away")
+        self.assertEqual(location.latitude, 59.9398)
+
+    def test_follows_username_and_text_changes(self):
+        """Test that renamed users and edited messages update the rows"""
+        self.user.username = "renamed"
+        self.user.save()
+        self.message.text = "Edited"
+        self.message.save()
+
+        [item] = self.search()
+        self.assertEqual(item["text"], "Edited")
+        self.assertEqual(item["user"], {"id": self.user.id, "username": "renamed"})
+        self.assertEqual(item["point"]["name"], "Red Square")
+
+    def test_deleted_with_message(self):
+        """Test that deleting a message or its point removes the row"""
+        self.message.delete()
+        self.assertFalse(MessageLocation.objects.exists())
+
+        PointMessage.objects.create(point=self.point, user=self.user, text="Again")
+        self.point.delete()
+        self.assertFalse(MessageLocation.objects.exists())
+
+    def test_search_reads_one_table(self):
+        """Test that message search does not join points or users"""
+        with CaptureQueriesContext(connection) as queries:
+            self.search()
+
+        search_queries = [
+            query["sql"]
+            for query in queries.captured_queries
+            if MessageLocation._meta.db_table in query["sql"]
+        ]
+        self.assertTrue(search_queries)
+        for sql in search_queries:
+            self.assertNotIn("JOIN", sql)
+
+    def test_check_command(self):
+        """Test that check_message_locations finds and repairs drift"""
+        other = PointMessage.objects.create(
+            point=self.point, user=self.user, text="Other"
+        )
+        MessageLocation.objects.filter(pk=self.message.pk).update(text="Stale")
+        MessageLocation.objects.filter(pk=other.pk).delete()
+
+        out = io.StringIO()
+        call_command("check_message_locations", stdout=out)
+        self.assertIn("1 missing, 1 stale, 0 orphaned", out.getvalue())
+        self.assertEqual(len(self.search()), 1)
+
+        call_command("check_message_locations", "--repair", stdout=out)
+        self.assertEqual(
+            sorted(item["text"] for item in self.search()), ["Hello", "Other"]
+        )
+
+        out = io.StringIO()
+        call_command("check_message_locations", stdout=out)
+        self.assertIn("consistent", out.getvalue())
+
+
+class MessageQueueTests(TestCase):
+    """Tests for write-behind message ingestion (MESSAGE_INGEST=queue)"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "queue.sqlite3")
+        self.override(MESSAGE_QUEUE_MAX_STALENESS=60)
+        self.addCleanup(lambda: ingest.get_queue().close())
+
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.point = GeoPoint.objects.create(
+            name="Moscow Point",
+            coordinates={"type": "Point", "coordinates": [37.6173, 55.7558]},
+            created_by=self.user,
+        )
+
+    def override(self, **config):
+        config = {"MESSAGE_INGEST": "queue", "MESSAGE_QUEUE_PATH": self.path, **config}
+        override = override_settings(GEO_API=config)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def post(self, text, point=None):
+        return self.client.post(
+            reverse("message-create"),
+            {"point": point or self.point.id, "text": text},
+            format="json",
+        )
+
+    def search(self):
+        response = self.client.get(
+            reverse("message-search"),
+            {"latitude": 55.7558, "longitude": 37.6173, "radius": 10},
+        )
+        return [message["text"] for message in response.data["messages"]]
+
+    def test_create_is_queued(self):
+        """Test that a message is accepted, then inserted by the worker"""
+        response = self.post("Queued")
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["status"], "queued")
+        self.assertEqual(response.data["provisional_id"], 1)
+        self.assertFalse(PointMessage.objects.exists())
+        self.assertEqual(len(ingest.get_queue()), 1)
+
+        self.assertEqual(ingest.drain(), 1)
+
+        message = PointMessage.objects.get()
+        self.assertEqual((message.text, message.user), ("Queued", self.user))
+        self.assertGreater(message.change_seq, self.point.change_seq)
+        self.assertTrue(MessageLocation.objects.filter(pk=message.pk).exists())
+        self.assertEqual(len(ingest.get_queue()), 0)
+        self.assertEqual(self.search(), ["Queued"])
+
+    def test_invalid_message_is_not_queued(self):
+        """Test that messages are validated before they are queued"""
+        response = self.post("Lost", point=999999)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(ingest.get_queue()), 0)
+
+    def test_search_drains_stale_queue(self):
+        """Test that searches see queued messages within the staleness bound"""
+        self.post("Fresh")
+        self.assertEqual(self.search(), [])
+
+        self.override(MESSAGE_QUEUE_MAX_STALENESS=0)
+        self.assertEqual(self.search(), ["Fresh"])
+
+    def test_search_drains_until_fresh(self):
+        """Test that a search drains batches until the queue is within bound"""
+        self.override(MESSAGE_QUEUE_MAX_STALENESS=0, MESSAGE_QUEUE_BATCH_SIZE=1)
+        self.post("First")
+        self.post("Second")
+
+        self.assertEqual(sorted(self.search()), ["First", "Second"])
+        self.assertEqual(len(ingest.get_queue()), 0)
+
+    def test_search_drain_time_is_capped(self):
+        """Test that a search leaves a backlog it cannot drain in time"""
+        self.override(MESSAGE_QUEUE_MAX_STALENESS=0, MESSAGE_QUEUE_DRAIN_SECONDS=0)
+        self.post("Late")
+
+        self.assertEqual(self.search(), [])
+        self.assertEqual(len(ingest.get_queue()), 1)
+
+    def test_batches_are_inserted_once(self):
+        """Test that a drained batch left in the queue is not inserted again"""
+        first = self.post("First").data["provisional_id"]
+        self.post("Second")
+        WriteCounter.objects.create(key=ingest.DRAINED_KEY, version=first)
+
+        self.assertEqual(ingest.drain(batch_size=1), 1)
+        self.assertEqual(
+            list(PointMessage.objects.values_list("text", flat=True)), ["Second"]
+        )
+        self.assertEqual(ingest.drain(), 0)
+
+    def test_messages_of_deleted_points_are_dropped(self):
+        """Test that queued messages of points deleted meanwhile are skipped"""
+        other = GeoPoint.objects.create(
+            name="Gone",
+            coordinates={"type": "Point", "coordinates": [30.3141, 59.9398]},
+            created_by=self.user,
+        )
+        self.post("Kept")
+        self.post("Dropped", point=other.id)
+        other.delete()
+
+        out = io.StringIO()
+        call_command("run_message_queue", "--once", stdout=out)
+
+        self.assertIn("Drained 2 queued messages", out.getvalue())
+        self.assertEqual(
+            list(PointMessage.objects.values_list("text", flat=True)), ["Kept"]
+        )
+
+
+@override_settings(GEO_API={"READ_REPLICAS": ["replica1"]})
+class ReplicaRouterTests(SimpleTestCase):
+    """Tests for routing search reads to read replicas"""
+
+    def setUp(self):
+        cache.clear()
+        self.router = routers.ReplicaRouter()
+
+    def test_reads_inside_searches_use_replica(self):
+        """Test that only reads inside replica_reads() go to the replica"""
+        self.assertIsNone(self.router.db_for_read(GeoPoint))
+
+        with routers.replica_reads() as alias:
+            self.assertEqual(alias, "replica1")
+            self.assertEqual(self.router.db_for_read(GeoPoint), "replica1")
+            self.assertEqual(self.router.db_for_write(GeoPoint), "default")
+
+        self.assertIsNone(self.router.db_for_read(GeoPoint))
+
+    def test_writers_stick_to_primary(self):
+        """Test read-your-writes stickiness after a write"""
+        routers.mark_write(1)
+
+        with routers.replica_reads(1) as alias:
+            self.assertIsNone(alias)
+            self.assertIsNone(self.router.db_for_read(GeoPoint))
+        with routers.replica_reads(2) as alias:
+            self.assertEqual(alias, "replica1")
+
+        config = {"READ_REPLICAS": ["replica1"], "REPLICA_STICKY_SECONDS": 0}
+        with self.settings(GEO_API=config):
+            self.assertFalse(routers.is_sticky(1))
+
+    def test_replicas_are_not_migrated(self):
+        """Test that migrations only run on the primary"""
+        self.assertTrue(self.router.allow_migrate("default", "geo_api"))
+        self.assertFalse(self.router.allow_migrate("replica1", "geo_api"))
+
+    def test_replicas_need_shared_cache(self):
+        """Test the system check for stickiness kept in a per-process cache"""
+        self.assertEqual(
+            [error.id for error in checks.check_replica_cache(None)],
+            ["geo_api.E001"],
+        )
+
+        shared = "django.core.cache.backends.filebased.FileBasedCache"
+        with tempfile.TemporaryDirectory() as directory:
+            caches = {"default": {"BACKEND": shared, "LOCATION": directory}}
+            with self.settings(CACHES=caches):
+                self.assertEqual(checks.check_replica_cache(None), [])
+
+    @override_settings(GEO_API={"READ_REPLICAS": []})
+    def test_no_replicas(self):
+        """Test that searches read from the primary without replicas"""
+        with routers.replica_reads() as alias:
+            self.assertIsNone(alias)
+
+
+@override_settings(GEO_API={"READ_REPLICAS": ["replica1"]})
+class ReplicaStickinessTests(TestCase):
+    """Tests for marking writers and search views with read replicas"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_writes_mark_user(self):
+        """Test that successful writes make the user sticky, reads do not"""
+        self.client.get(
+            reverse("point-search"),
+            {"latitude": 55.7558, "longitude": 37.6173, "radius": 10},
+        )
+        self.assertFalse(routers.is_sticky(self.user.id))
+
+        response = self.client.post(
+            reverse("point-create"),
+            {
+                "name": "Moscow Point",
+                "coordinates": {"type": "Point", "coordinates": [37.6173, 55.7558]},
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(routers.is_sticky(self.user.id))
+
+    def test_reads_in_transactions_use_primary(self):
+        """Test that reads inside a transaction on the primary stay there"""
+        with routers.replica_reads() as alias:
+            self.assertEqual(alias, "replica1")
+            self.assertEqual(routers.ReplicaRouter().db_for_read(GeoPoint), "default")
+
+
+class ReplicaSearchTests(TransactionTestCase):
+    """Tests for searches served by a real read replica"""
+
+    alias = "replica_test"
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "replica.sqlite3")
+
+        # Not in DATABASES: the test runner would create a test database
+        # for it or make it a mirror of the primary
+        replica = {"ENGINE": "django.db.backends.sqlite3", "NAME": self.path}
+        connections.settings[self.alias] = connections.configure_settings(
+            {"default": connections.settings["default"], self.alias: replica}
+        )[self.alias]
+        self.addCleanup(connections.settings.pop, self.alias)
+        self.addCleanup(connections.__delitem__, self.alias)
+        self.addCleanup(lambda: connections[self.alias].close())
+        self.override()
+
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.point = GeoPoint.objects.create(
+            name="Moscow Point",
+            coordinates={"type": "Point", "coordinates": [37.6173, 55.7558]},
+            created_by=self.user,
+        )
+
+    def override(self, **config):
+        config = {"READ_REPLICAS": [self.alias], **config}
+        override = override_settings(GEO_API=config)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def replicate(self):
+        """Copy the primary to the replica, like `manage.py copy_replicas`"""
+        connections[self.alias].close()
+        connections["default"].ensure_connection()
+        target = sqlite3.connect(self.path)
+        try:
+            connections["default"].connection.backup(target)
+        finally:
+            target.close()
+        # Connected here, as the test case only lets the aliases in its
+        # `databases` connect on demand
+        connections[self.alias].connect()
+
+    def search(self):
+        # The writes of the test made the user sticky to the primary
+        cache.delete(routers.STICKY_CACHE_KEY.format(self.user.id))
+        response = self.client.get(
+            reverse("message-search"),
+            {"latitude": 55.7558, "longitude": 37.6173, "radius": 10},
+        )
+        return [message["text"] for message in response.data["messages"]]
+
+    def test_search_reads_replica(self):
+        """Test that searches read the replica, not the primary"""
+        PointMessage.objects.create(point=self.point, user=self.user, text="Old")
+        self.replicate()
+        PointMessage.objects.create(point=self.point, user=self.user, text="New")
+
+        self.assertEqual(self.search(), ["Old"])
+
+    def test_search_reads_primary_after_drain(self):
+        """Test that a search reads the messages it drained from the primary"""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.override(
+            MESSAGE_INGEST="queue",
+            MESSAGE_QUEUE_PATH=os.path.join(directory.name, "queue.sqlite3"),
+            MESSAGE_QUEUE_MAX_STALENESS=0,
+        )
+        self.addCleanup(lambda: ingest.get_queue().close())
+        self.replicate()
+
+        self.client.post(
+            reverse("message-create"),
+            {"point": self.point.id, "text": "Queued"},
+            format="json",
+        )
+        self.assertEqual(self.search(), ["Queued"])
+
+
+# ------------- 🍰🍰🍰 GET /api/points/messages/feed/ 🍰🍰🍰 ---------------
+
+
+class PointMessageFeedTests(TestCase):
+    """Tests for the messages feed ranked by distance and age"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("message-feed")
+        self.params = {"latitude": 55.75, "longitude": 37.6, "radius": 50}
+
+    def create_message(self, point, hours_ago, text="Hi"):
+        message = PointMessage.objects.create(point=point, user=self.user, text=text)
+        created_at = timezone.now() - datetime.timedelta(hours=hours_ago)
+        PointMessage.objects.filter(pk=message.pk).update(created_at=created_at)
+        return message
+
+    def create_point(self, lat, lon):
+        return GeoPoint.objects.create(
+            name="Point",
+            coordinates={"type": "Point", "coordinates": [lon, lat]},
+            created_by=self.user,
+        )
+
+    def feed(self, **params):
+        response = self.client.get(self.url, {**self.params, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_ranks_by_distance_and_age(self):
+        """Test that a near new message beats a far or an old one"""
+        near = self.create_point(55.75, 37.6)
+        far = self.create_point(55.75, 37.7)  # ~6 km
+        new_near = self.create_message(near, 1)
+        old_near = self.create_message(near, 24 * 30)
+        new_far = self.create_message(far, 1)
+        self.create_message(self.create_point(59.94, 30.31), 0)  # Outside
+
+        data = self.feed()
+
+        ids = [message["id"] for message in data["messages"]]
+        self.assertEqual(ids, [new_near.id, new_far.id, old_near.id])
+        scores = [message["score"] for message in data["messages"]]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertEqual(data["messages"][0]["distance_km"], 0)
+        self.assertFalse(data["has_more"])
+        self.assertIsNone(data["next_cursor"])
+
+    @override_settings(GEO_API={"FEED_AGE_WEIGHT": 0})
+    def test_weights_are_configurable(self):
+        """Test that without the age part only distance counts"""
+        near = self.create_point(55.75, 37.6)
+        far = self.create_point(55.75, 37.7)
+        old_near = self.create_message(near, 24 * 365)
+        self.create_message(far, 0)
+
+        data = self.feed()
+
+        self.assertEqual(data["messages"][0]["id"], old_near.id)
+
+    @override_settings(GEO_API={"SEARCH_CHUNK_SIZE": 2})
+    def test_pages_match_full_ranking(self):
+        """Test that cursor pages list every message once, in score order"""
+        rng = random.Random(44)
+        for _ in range(25):
+            point = self.create_point(
+                55.75 + rng.uniform(-0.3, 0.3), 37.6 + rng.uniform(-0.5, 0.5)
+            )
+            for _ in range(rng.randint(0, 6)):
+                self.create_message(point, rng.uniform(0, 24 * 10))
+
+        self.create_message(self.create_point(57, 37.6), 0)  # Outside
+        in_radius = {
+            message.id
+            for message in PointMessage.objects.select_related("point")
+            if haversine_distance(
+                55.75, 37.6, message.point.latitude, message.point.longitude
+            )
+            <= 50
+        }
+
+        listed, cursor, pages = [], None, 0
+        while True:
+            data = self.feed(limit=7, **({"cursor": cursor} if cursor else {}))
+            listed += [
+                (message["score"], message["id"]) for message in data["messages"]
+            ]
+            pages += 1
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+
+        listed_ids = [message_id for _, message_id in listed]
+        self.assertEqual(len(listed_ids), len(set(listed_ids)))
+        self.assertEqual(set(listed_ids), in_radius)
+        scores = [score for score, _ in listed]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertEqual(pages, -(-len(in_radius) // 7))
+
+    def test_new_messages_do_not_shift_pages(self):
+        """Test that a message created after the first page isn't listed"""
+        point = self.create_point(55.75, 37.6)
+        for hours in range(3):
+            self.create_message(point, hours + 1)
+
+        first = self.feed(limit=2)
+        newest = self.create_message(point, 0)
+        second = self.feed(limit=2, cursor=first["next_cursor"])
+
+        self.assertEqual(len(second["messages"]), 1)
+        self.assertNotIn(newest.id, [m["id"] for m in second["messages"]])
+
+    def test_reads_a_bounded_number_of_messages(self):
+        """Test that old messages of near points are cut off by the heap"""
+        point = self.create_point(55.75, 37.6)
+        for hours in range(50):
+            self.create_message(point, 24 * 30 + hours)
+        for hours in range(5):
+            self.create_message(point, hours)
+
+        with CaptureQueriesContext(connection) as queries:
+            data = self.feed(limit=3)
+
+        self.assertEqual(len(data["messages"]), 3)
+        self.assertTrue(data["has_more"])
+        self.assertLessEqual(len(queries), PointMessageFeedView.query_budget)
+
+    def test_invalid_parameters(self):
+        """Test errors for missing or invalid parameters"""
+        cases = [
+            ({"latitude": None}, "Missing required parameters"),
+            ({"radius": "abc"}, "Parameters must be valid numbers"),
+            ({"latitude": 91}, "Latitude must be between -90 and 90 degrees"),
+            ({"radius": 0}, "Radius must be a positive number"),
+            ({"limit": 0}, "Limit must be between 1 and 1000"),
+            ({"cursor": "not-a-cursor"}, "Invalid cursor"),
+        ]
+        for params, error in cases:
+            params = {**self.params, **params}
+            params = {key: value for key, value in params.items() if value is not None}
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.data["error"], error)
+
+    def test_requires_authentication(self):
+        """Test that the feed requires authentication"""
+        response = APIClient().get(self.url, self.params)
+        self.assertIn(response.status_code, [401, 403])
+
+
+# ---------------- 🍰🍰🍰 MESSAGE ARCHIVE 🍰🍰🍰 ------------------
+
+
+class MessageArchiveTests(TestCase):
+    """Tests for archiving old messages and ?include_archived=1"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.params = {"latitude": 55.7558, "longitude": 37.6173, "radius": 10}
+
+        self.point = GeoPoint.objects.create(
+            name="Moscow Point",
+            coordinates={"type": "Point", "coordinates": [37.6173, 55.7558]},
+            created_by=self.user,
+        )
+        self.old = [
+            PointMessage.objects.create(point=self.point, user=self.user, text=text)
+            for text in ["Old coffee", "Old news", "Older coffee"]
+        ]
+        self.new = PointMessage.objects.create(
+            point=self.point, user=self.user, text="Fresh coffee"
+        )
+
+        now = timezone.now()
+        for message, days in zip(self.old, [400, 400, 450]):
+            PointMessage.objects.filter(pk=message.pk).update(
+                created_at=now - datetime.timedelta(days=days)
+            )
+
+    def archive(self, *args):
+        out = io.StringIO()
+        call_command("archive_messages", "--older-than-days", "365", *args, stdout=out)
+        return out.getvalue()
+
+    def search(self, **params):
+        response = self.client.get(reverse("message-search"), {**self.params, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_archive_moves_old_messages(self):
+        """Test that old messages leave the hot table in batches"""
+        self.assertIn("3 messages created before", self.archive("--dry-run"))
+        self.assertIn("Archived 3 messages", self.archive("--batch-size", "2"))
+
+        self.assertEqual(list(PointMessage.objects.all()), [self.new])
+
+        # One row per point, month and batch: the second batch appends a row
+        archives = MessageArchive.objects.order_by("month", "id")
+        self.assertEqual([row.count for row in archives], [1, 1, 1])
+        self.assertEqual(len({row.month for row in archives}), 2)
+        records = [record for row in archives for record in archive.decode(row.data)]
+        self.assertEqual(
+            sorted(record[0] for record in records),
+            [message.id for message in self.old],
+        )
+
+        # Nothing left to archive
+        self.assertIn("Archived 0 messages", self.archive())
+
+    def test_hot_aggregates_follow_archiving(self):
+        """Test FTS index and heatmap after archiving"""
+        self.archive()
+
+        self.assertEqual(
+            fulltext.matching_ids(["coffee"], [m.id for m in self.old] + [self.new.id]),
+            {self.new.id},
+        )
+
+        fields = ("resolution", "cell_x", "cell_y", "points", "messages")
+        bins = set(HeatmapBin.objects.values_list(*fields))
+        heatmap.rebuild()
+        self.assertEqual(bins, set(HeatmapBin.objects.values_list(*fields)))
+
+    def test_search_excludes_archived_by_default(self):
+        """Test that only hot messages are searched unless asked"""
+        self.archive()
+
+        data = self.search()
+        self.assertEqual([m["id"] for m in data["messages"]], [self.new.id])
+        self.assertFalse(data["include_archived"])
+
+        data = self.search(include_archived=1)
+        self.assertEqual(
+            sorted(m["id"] for m in data["messages"]),
+            sorted([self.new.id] + [m.id for m in self.old]),
+        )
+        archived = [m for m in data["messages"] if m.get("archived")]
+        self.assertEqual(len(archived), 3)
+        self.assertEqual(archived[0]["user"]["username"], "testuser")
+        self.assertEqual(archived[0]["point"]["id"], self.point.id)
+
+    def test_archived_messages_of_deleted_users(self):
+        """Test that archived messages outlive their author with a null user"""
+        author = User.objects.create_user(username="author", password="testpass123")
+        PointMessage.objects.filter(pk=self.old[0].pk).update(user=author)
+        self.archive()
+        author.delete()
+
+        data = self.search(include_archived=1)
+        users = {m["id"]: m["user"] for m in data["messages"]}
+        self.assertIsNone(users[self.old[0].id])
+        self.assertEqual(users[self.old[1].id]["username"], "testuser")
+
+    def test_keywords_in_archived_messages(self):
+        """Test that keywords filter archived messages too"""
+        self.archive()
+
+        data = self.search(include_archived=1, q="coffee")
+
+        self.assertEqual(
+            sorted(m["id"] for m in data["messages"]),
+            [self.old[0].id, self.old[2].id, self.new.id],
+        )
+
+    def test_merged_duplicates_keep_archives(self):
+        """Test that dedupe moves archived messages to the kept point"""
+        self.archive()
+        keeper = GeoPoint.objects.create(
+            name="Moscow Point",
+            coordinates={"type": "Point", "coordinates": [37.6173, 55.7558]},
+            created_by=self.user,
+        )
+
+        dedupe.merge_points(keeper, [self.point])
+
+        self.assertEqual(
+            sum(row.count for row in MessageArchive.objects.filter(point=keeper)), 3
+        )
+
+    @override_settings(GEO_API={"MESSAGE_RETENTION_DAYS": None})
+    def test_retention_disabled(self):
+        """Test that the command refuses to run without a retention period"""
+        with self.assertRaises(CommandError):
+            call_command("archive_messages", stdout=io.StringIO())
+
+
+# ---------------- 🍰🍰🍰 GET /api/points/bbox/ 🍰🍰🍰 ------------------
+
+
+class GeoPointBBoxTests(TestCase):
+    """Tests for GeoPoint viewport (bbox) search"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.point_moscow = GeoPoint.objects.create(
+            name="Moscow Kremlin",
+            description="Test",
+            coordinates='{"type": "Point", "coordinates": [37.6173, 55.7558]}',
+            created_by=self.user,
+        )
+
+        self.point_zelenograd = GeoPoint.objects.create(
+            name="Zelenograd",
+            description="Test",
+            coordinates={"type": "Point", "coordinates": [37.1818, 55.9825]},
+            created_by=self.user,
+        )
+
+        # Points on both sides of the antimeridian
+        self.point_fiji = GeoPoint.objects.create(
+            name="Fiji",
+            description="Test",
+            coordinates={"type": "Point", "coordinates": [178.4, -18.1]},
+            created_by=self.user,
+        )
+
+        self.point_samoa = GeoPoint.objects.create(
+            name="Samoa",
+            description="Test",
+            coordinates={"type": "Point", "coordinates": [-171.8, -13.8]},
+            created_by=self.user,
+        )
+
+    def test_lat_lon_columns_are_filled(self):
+        """Test that latitude/longitude columns mirror GeoJSON coordinates"""
+        self.point_moscow.refresh_from_db()
+
+        self.assertEqual(self.point_moscow.latitude, 55.7558)
+        self.assertEqual(self.point_moscow.longitude, 37.6173)
+
+    def test_bbox_finds_points_inside(self):
+        """Test that bbox search finds only points inside the rectangle"""
+        url = reverse("point-bbox")
+        response = self.client.get(
+            url, {"west": 37.5, "south": 55.5, "east": 37.9, "north": 56.0}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["points_found"], 1)
+        self.assertFalse(response.data["truncated"])
+        self.assertEqual(response.data["points"][0]["name"], "Moscow Kremlin")
+
+    def test_bbox_crossing_antimeridian(self):
+        """Test bbox with west > east wraps around the antimeridian"""
+        url = reverse("point-bbox")
+        response = self.client.get(
+            url, {"west": 170, "south": -25, "east": -165, "north": -10}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        point_names = {p["name"] for p in response.data["points"]}
+        self.assertEqual(point_names, {"Fiji", "Samoa"})
+
+    @override_settings(GEO_API={"BBOX_MAX_RESULTS": 1})
+    def test_bbox_result_cap(self):
+        """Test that bbox search enforces the configured result cap"""
+        url = reverse("point-bbox")
+        response = self.client.get(
+            url, {"west": 37, "south": 55, "east": 38, "north": 56}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["points_found"], 1)
+        self.assertTrue(response.data["truncated"])
+
+    def test_bbox_missing_parameters(self):
+        """Test bbox search without required parameters"""
+        url = reverse("point-bbox")
+        response = self.client.get(url, {"west": 37, "south": 55})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Missing", response.data["error"])
+
+    def test_bbox_south_greater_than_north(self):
+        """Test bbox with south > north"""
+        url = reverse("point-bbox")
+        response = self.client.get(
+            url, {"west": 37, "south": 56, "east": 38, "north": 55}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("South", response.data["error"])
+
+
+# ---------------- 🍰🍰🍰 POST /api/points/within/ 🍰🍰🍰 ------------------
+
+
+class GeoPointWithinTests(TestCase):
+    """Tests for point search inside a polygon"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+
+        for name, coords in [
+            ("Inside", [0.5, 0.5]),
+            ("In hole", [0.9, 0.9]),
+            ("In bbox only", [2.8, 2.8]),
+            ("Second polygon", [10.5, 10.5]),
+        ]:
+            GeoPoint.objects.create(
+                name=name,
+                coordinates={"type": "Point", "coordinates": coords},
+                created_by=self.user,
+            )
+
+        # Triangular district with a square hole
+        self.polygon = {
+            "type": "Polygon",
+            "coordinates": [
+                [[0, 0], [3, 0], [0, 3], [0, 0]],
+                [[0.6, 0.6], [0.6, 1.2], [1.2, 1.2], [1.2, 0.6], [0.6, 0.6]],
+            ],
+        }
+        self.url = reverse("point-within")
+
+    def post(self, data):
+        return self.client.post(
+            self.url, data=json.dumps(data), content_type="application/json"
+        )
+
+    def test_polygon_with_hole(self):
+        """Test that only points inside the polygon and outside holes match"""
+        response = self.post(self.polygon)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        point_names = [p["name"] for p in response.data["points"]]
+        self.assertEqual(point_names, ["Inside"])
+
+    def test_multipolygon_feature(self):
+        """Test MultiPolygon passed as a GeoJSON Feature"""
+        square = [[[10, 10], [11, 10], [11, 11], [10, 11], [10, 10]]]
+        response = self.post(
+            {
+                "type": "Feature",
+                "geometry": {
+                    "type": "MultiPolygon",
+                    "coordinates": [self.polygon["coordinates"], square],
+                },
+            }
+        )
+
+        point_names = [p["name"] for p in response.data["points"]]
+        self.assertEqual(point_names, ["Inside", "Second polygon"])
+
+    def test_prepared_polygon_is_cached(self):
+        """Test that repeated polygons are taken from the cache"""
+        self.post(self.polygon)
+        key = polygons.geometry_key(self.polygon)
+
+        self.assertIsNotNone(polygons.get_cached(key))
+
+    def test_many_edges_point_in_polygon(self):
+        """Test band-indexed ray casting on a polygon with many edges"""
+        import math
+
+        circle = [
+            [math.cos(a * math.pi / 500), math.sin(a * math.pi / 500)]
+            for a in range(1000)
+        ]
+        prepared = polygons.PreparedPolygon([circle + circle[:1]])
+
+        self.assertGreater(prepared.band_count, 100)
+        self.assertTrue(prepared.contains(0.99, 0))
+        self.assertTrue(prepared.contains(0, -0.99))
+        self.assertFalse(prepared.contains(0.72, 0.72))
+
+    def test_unclosed_ring(self):
+        """Test polygon with an unclosed ring should fail"""
+        response = self.post(
+            {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1]]]}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("closed", str(response.data["coordinates"]))
+
+    def test_wrong_geometry_type(self):
+        """Test geometry type other than Polygon/MultiPolygon should fail"""
+        response = self.post({"type": "Point", "coordinates": [0, 0]})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("type", response.data)
+
+
+# ---------------- 🍰🍰🍰 POST /api/points/along-route/ 🍰🍰🍰 ------------------
+
+
+class GeoPointAlongRouteTests(TestCase):
+    """Tests for corridor search along a route"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+
+        for name, coords in [
+            ("Near end", [37.8, 55.74]),
+            ("Near start", [37.2, 55.76]),
+            ("Far north", [37.5, 55.9]),
+            ("Before start", [36.9, 55.75]),
+        ]:
+            GeoPoint.objects.create(
+                name=name,
+                coordinates={"type": "Point", "coordinates": coords},
+                created_by=self.user,
+            )
+
+        self.data = {
+            "route": {
+                "type": "LineString",
+                "coordinates": [[37.0, 55.75], [37.5, 55.75], [38.0, 55.75]],
+            },
+            "buffer_km": 2,
+        }
+        self.url = reverse("point-along-route")
+
+    def post(self, data):
+        return self.client.post(
+            self.url, data=json.dumps(data), content_type="application/json"
+        )
+
+    def test_points_ordered_along_route(self):
+        """Test that points within the buffer are ordered along the route"""
+        response = self.post(self.data)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        point_names = [p["name"] for p in response.data["points"]]
+        self.assertEqual(point_names, ["Near start", "Near end"])
+
+        near_start = response.data["points"][0]
+        self.assertAlmostEqual(near_start["distance_km"], 1.11, places=1)
+        self.assertAlmostEqual(near_start["along_route_km"], 12.5, places=0)
+        self.assertAlmostEqual(response.data["route_length_km"], 62.6, places=0)
+
+    def test_point_segment_distance_beyond_ends(self):
+        """Test distance to a segment end for points beyond the segment"""
+        from .utils import haversine_distance, point_segment_distance
+
+        distance, along = point_segment_distance(55.75, 36.9, 55.75, 37.0, 55.75, 37.5)
+
+        self.assertAlmostEqual(distance, haversine_distance(55.75, 36.9, 55.75, 37.0))
+        self.assertEqual(along, 0)
+
+    def test_invalid_buffer(self):
+        """Test route search with non-positive buffer should fail"""
+        response = self.post({**self.data, "buffer_km": 0})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("buffer_km", response.data)
+
+    def test_route_not_linestring(self):
+        """Test route that is not a LineString should fail"""
+        response = self.post({**self.data, "route": {"type": "Point"}})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("LineString", str(response.data["route"]))
+
+
+# ------------- 🍰🍰🍰 POST /api/points/distance-matrix/ 🍰🍰🍰 ---------------
+
+
+class DistanceMatrixTests(TestCase):
+    """Tests for distance matrices between points and positions"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("distance-matrix")
+
+        self.moscow = GeoPoint.objects.create(
+            name="Moscow",
+            coordinates={"type": "Point", "coordinates": [37.6173, 55.7558]},
+            created_by=self.user,
+        )
+        self.spb = GeoPoint.objects.create(
+            name="SPB",
+            coordinates={"type": "Point", "coordinates": [30.3141, 59.9398]},
+            created_by=self.user,
+        )
+
+    def post(self, data):
+        return self.client.post(self.url, data, format="json")
+
+    def test_json_matrix(self):
+        """Test distances between point ids and positions"""
+        response = self.post(
+            {
+                "sources": [self.moscow.id, [0, 0]],
+                "destinations": [self.spb.id, [180, 0], [37.1818, 55.9825]],
+            }
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["X-Matrix-Rows"], "2")
+        self.assertEqual(response["X-Matrix-Columns"], "3")
+        data = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(data["unit"], "km")
+        self.assertEqual((data["sources"], data["destinations"]), (2, 3))
+
+        sources = [(55.7558, 37.6173), (0, 0)]
+        destinations = [(59.9398, 30.3141), (0, 180), (55.9825, 37.1818)]
+        for row, (lat, lon) in zip(data["rows"], sources):
+            for distance, destination in zip(row, destinations):
+                self.assertAlmostEqual(
+                    distance, haversine_distance(lat, lon, *destination), places=2
+                )
+
+    def test_destinations_default_to_sources(self):
+        """Test a square matrix with a zero diagonal"""
+        response = self.post({"sources": [self.moscow.id, self.spb.id]})
+
+        rows = json.loads(b"".join(response.streaming_content))["rows"]
+        self.assertEqual(rows[0][0], 0)
+        self.assertEqual(rows[1][1], 0)
+        self.assertEqual(rows[0][1], rows[1][0])
+        self.assertAlmostEqual(rows[0][1], 634, delta=5)
+
+    def test_binary_matrix(self):
+        """Test row-major little-endian float32 output"""
+        response = self.post(
+            {
+                "sources": [self.moscow.id, self.spb.id, [0, 0]],
+                "destinations": [self.spb.id, [37.6173, 55.7558]],
+                "format": "binary",
+            }
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/octet-stream")
+        values = array.array("f", b"".join(response.streaming_content))
+        self.assertEqual(len(values), 6)
+        self.assertAlmostEqual(values[0], values[3], places=2)
+        self.assertEqual(values[1], 0)
+        self.assertEqual(values[2], 0)
+        self.assertAlmostEqual(
+            values[5], haversine_distance(0, 0, 55.7558, 37.6173), places=1
+        )
+
+    def test_missing_points(self):
+        """Test that unknown point ids are reported"""
+        response = self.post({"sources": [self.moscow.id, 9999, 9998]})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["missing"], [9998, 9999])
+
+    @override_settings(GEO_API={"DISTANCE_MATRIX_MAX_CELLS": 3})
+    def test_size_ceiling(self):
+        """Test that matrices over the ceiling are rejected"""
+        response = self.post({"sources": [self.moscow.id, self.spb.id]})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("at most 3 cells", str(response.data))
+
+    def test_invalid_locations(self):
+        """Test errors for invalid sources, destinations and format"""
+        for data in [
+            {},
+            {"sources": []},
+            {"sources": [[200, 0]]},
+            {"sources": [True]},
+            {"sources": [[1, 2, 3]]},
+            {"sources": [1], "destinations": "abc"},
+            {"sources": [[0, 0]], "format": "csv"},
+        ]:
+            response = self.post(data)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+# ---------------- 🍰🍰🍰 GET /api/points/clusters/ 🍰🍰🍰 ------------------
+
+
+@override_settings(GEO_API={"CLUSTER_MAX_ZOOM": 10})
+class PointClusterTests(TestCase):
+    """Tests for precomputed point clusters"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+
+        # Two points in Moscow center and one in St. Petersburg
+        for name, coords in [
+            ("Kremlin", [37.6173, 55.7558]),
+            ("Red Square", [37.6208, 55.7539]),
+            ("Hermitage", [30.3141, 59.9398]),
+        ]:
+            self.client.post(
+                reverse("point-create"),
+                data=json.dumps(
+                    {
+                        "name": name,
+                        "coordinates": {"type": "Point", "coordinates": coords},
+                    }
+                ),
+                content_type="application/json",
+            )
+
+        self.url = reverse("point-clusters")
+        self.russia = {"west": 20, "south": 50, "east": 45, "north": 65}
+
+    def test_clusters_updated_on_create(self):
+        """Test that creating a point updates a cluster on every zoom level"""
+        # 11 zoom levels with a single cluster for the whole world on zoom 0
+        world = PointCluster.objects.get(zoom=0)
+        self.assertEqual(world.count, 3)
+        self.assertEqual(len(world.sample_ids), 3)
+        self.assertEqual(PointCluster.objects.filter(zoom=10).count(), 2)
+
+    def test_low_zoom_groups_nearby_points(self):
+        """Test that nearby points are merged into one cluster on low zoom"""
+        response = self.client.get(self.url, {**self.russia, "zoom": 4})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["points_total"], 3)
+        counts = sorted(c["count"] for c in response.data["clusters"])
+        self.assertEqual(counts, [1, 2])
+
+        moscow = max(response.data["clusters"], key=lambda c: c["count"])
+        self.assertAlmostEqual(moscow["latitude"], (55.7558 + 55.7539) / 2)
+
+    def test_clusters_updated_on_move_and_delete(self):
+        """Test that moving and deleting points keeps clusters consistent"""
+        point = GeoPoint.objects.get(name="Hermitage")
+        point.coordinates = {"type": "Point", "coordinates": [37.62, 55.75]}
+        point.save()
+        GeoPoint.objects.get(name="Red Square").delete()
+
+        response = self.client.get(self.url, {**self.russia, "zoom": 4})
+        self.assertEqual(
+            [(c["count"], c["sample_ids"]) for c in response.data["clusters"]],
+            [(2, [GeoPoint.objects.get(name="Kremlin").id, point.id])],
+        )
+
+    @override_settings(GEO_API={"CLUSTER_MAX_ZOOM": 10, "CLUSTER_SAMPLE_SIZE": 1})
+    def test_samples_refilled_on_delete(self):
+        """Test that a deleted sample point is replaced by another point"""
+        first, second = [
+            GeoPoint.objects.create(
+                name=name,
+                coordinates={"type": "Point", "coordinates": [151.2153, -33.8568]},
+                created_by=self.user,
+            )
+            for name in ("Opera House", "Opera House steps")
+        ]
+        first.delete()
+
+        samples = [
+            PointCluster.objects.get(zoom=zoom, cell_x=x, cell_y=y).sample_ids
+            for zoom, x, y in clustering.point_cells(-33.8568, 151.2153)
+        ]
+        self.assertEqual(samples, [[second.id]] * 11)
+
+    @override_settings(GEO_API={"CLUSTER_MAX_ZOOM": 0, "CLUSTER_GRID_SIZE": 1})
+    def test_centroid_across_antimeridian(self):
+        """Test that longitudes on both sides of 180° average near 180°"""
+        PointCluster.objects.all().delete()
+        for lon in (179, -179):
+            clustering.add_point(0, 10, lon)
+
+        response = self.client.get(
+            self.url, {"west": -180, "south": -80, "east": 180, "north": 80, "zoom": 0}
+        )
+        (cluster,) = response.data["clusters"]
+        self.assertAlmostEqual(abs(cluster["longitude"]), 180)
+        self.assertAlmostEqual(cluster["latitude"], 10)
+
+    def test_rebuild_matches_incremental_clusters(self):
+        """Test that rebuild_clusters recomputes the same aggregates"""
+        before = list(
+            PointCluster.objects.order_by("zoom", "cell_x", "cell_y").values_list(
+                "zoom", "cell_x", "cell_y", "count"
+            )
+        )
+        call_command("rebuild_clusters", stdout=io.StringIO())
+        after = list(
+            PointCluster.objects.order_by("zoom", "cell_x", "cell_y").values_list(
+                "zoom", "cell_x", "cell_y", "count"
+            )
+        )
+
+        self.assertEqual(before, after)
+
+    def test_viewport_too_large_for_zoom(self):
+        """Test that response size is bounded by the number of screen cells"""
+        response = self.client.get(self.url, {**self.russia, "zoom": 10})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("too large", response.data["error"])
+
+    def test_zoom_out_of_range(self):
+        """Test zoom above the highest precomputed level"""
+        response = self.client.get(self.url, {**self.russia, "zoom": 11})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Zoom", response.data["error"])
+
+
+# ---------------- 🍰🍰🍰 GET /api/points/heatmap/ 🍰🍰🍰 ------------------
+
+
+@override_settings(GEO_API={"HEATMAP_MAX_RESOLUTION": 10})
+class HeatmapTests(TestCase):
+    """Tests for pre-aggregated heatmap bins"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("point-heatmap")
+
+        self.kremlin = GeoPoint.objects.create(
+            name="Kremlin",
+            coordinates={"type": "Point", "coordinates": [37.6173, 55.7558]},
+            created_by=self.user,
+        )
+        self.red_square = GeoPoint.objects.create(
+            name="Red Square",
+            coordinates={"type": "Point", "coordinates": [37.6208, 55.7539]},
+            created_by=self.user,
+        )
+        self.spb = GeoPoint.objects.create(
+            name="Saint Petersburg",
+            coordinates={"type": "Point", "coordinates": [30.3141, 59.9398]},
+            created_by=self.user,
+        )
+        for text in ("Hello", "World"):
+            PointMessage.objects.create(point=self.kremlin, user=self.user, text=text)
+
+    def bins(self, bbox, resolution, messages=False):
+        response = self.client.get(
+            self.url,
+            {"bbox": bbox, "resolution": resolution, "messages": int(messages)},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["bins"]
+
+    def test_counts_per_bin(self):
+        """Test point and message counts at low and high resolution"""
+        bins = self.bins("20,50,45,65", 3, messages=True)
+        self.assertEqual(
+            [(item["points"], item["messages"]) for item in bins], [(3, 2)]
+        )
+
+        bins = self.bins("20,50,45,65", 10, messages=True)
+        self.assertEqual(
+            sorted((item["points"], item["messages"]) for item in bins),
+            [(1, 0), (2, 2)],
+        )
+        self.assertNotIn("messages", self.bins("20,50,45,65", 10)[0])
+
+    def test_bins_follow_moves_and_deletes(self):
+        """Test incremental updates when points move or are deleted"""
+        self.kremlin.coordinates = {"type": "Point", "coordinates": [30.31, 59.94]}
+        self.kremlin.save()
+
+        bins = self.bins("30,59,31,60", 10, messages=True)
+        self.assertEqual(
+            [(item["points"], item["messages"]) for item in bins], [(2, 2)]
+        )
+
+        self.kremlin.delete()
+        self.red_square.delete()
+        bins = self.bins("20,50,45,65", 10, messages=True)
+        self.assertEqual(
+            [(item["points"], item["messages"]) for item in bins], [(1, 0)]
+        )
+        self.assertEqual(HeatmapBin.objects.filter(points=0).count(), 0)
+
+    def test_rebuild_matches_incremental_bins(self):
+        """Test that rebuild_heatmap recreates the same bins"""
+        incremental = set(
+            HeatmapBin.objects.values_list(
+                "resolution", "cell_x", "cell_y", "points", "messages"
+            )
+        )
+        out = io.StringIO()
+        call_command("rebuild_heatmap", stdout=out)
+
+        self.assertEqual(
+            set(
+                HeatmapBin.objects.values_list(
+                    "resolution", "cell_x", "cell_y", "points", "messages"
+                )
+            ),
+            incremental,
+        )
+        self.assertIn(f"Rebuilt {len(incremental)} heatmap bins", out.getvalue())
+
+    def test_bin_center_and_antimeridian(self):
+        """Test bin centers and bboxes crossing the antimeridian"""
+        lat, lon = heatmap.bin_center(1, 1, 0)
+        self.assertAlmostEqual(lon, 90)
+        self.assertGreater(lat, 0)
+
+        GeoPoint.objects.create(
+            name="Fiji",
+            coordinates={"type": "Point", "coordinates": [178.4, -18.1]},
+            created_by=self.user,
+        )
+        self.assertEqual(len(self.bins("170,-20,-170,-10", 6)), 1)
+
+    def test_invalid_params(self):
+        """Test validation of bbox, resolution and viewport size"""
+        for params in (
+            {"bbox": "20,50,45,65"},
+            {"bbox": "20,50,45", "resolution": 4},
+            {"bbox": "20,50,45,65", "resolution": "high"},
+            {"bbox": "20,50,45,65", "resolution": 11},
+            {"bbox": "-180,-85,180,85", "resolution": 10},
+        ):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+# ---------------- 🍰🍰🍰 GET /api/tiles/{z}/{x}/{y}.mvt 🍰🍰🍰 ------------------
+
+
+class PointTileTests(TestCase):
+    """Tests for GeoPoint vector tiles"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.point_moscow = GeoPoint.objects.create(
+            name="Moscow Kremlin",
+            description="Test",
+            coordinates={"type": "Point", "coordinates": [37.6173, 55.7558]},
+            created_by=self.user,
+        )
+
+        # Tile containing Moscow on zoom 10
+        self.url = reverse("point-tile", kwargs={"z": 10, "x": 619, "y": 320})
+
+    def test_mvt_encoding(self):
+        """Test protobuf encoding of a single point feature"""
+        layer = mvt.encode_layer("points", [(7, 1, 2, {"name": "A"})], extent=4096)
+
+        feature = b"\x08\x07\x12\x02\x00\x00\x18\x01\x22\x03\x09\x02\x04"
+        self.assertIn(feature, layer)
+        self.assertEqual(mvt.encode_tile([layer])[:1], b"\x1a")
+
+    def test_tile_contains_point(self):
+        """Test that the tile is a binary MVT with the point"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], tiles.CONTENT_TYPE)
+        self.assertIn(b"Moscow Kremlin", response.content)
+        self.assertIn("max-age", response["Cache-Control"])
+
+    def test_empty_tile(self):
+        """Test that tiles without points are empty"""
+        url = reverse("point-tile", kwargs={"z": 10, "x": 0, "y": 0})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, b"")
+
+    def test_tile_invalidated_on_create(self):
+        """Test that creating a point invalidates cached tiles containing it"""
+        self.client.get(self.url)
+        GeoPoint.objects.create(
+            name="Red Square",
+            coordinates={"type": "Point", "coordinates": [37.6208, 55.7539]},
+            created_by=self.user,
+        )
+
+        response = self.client.get(self.url)
+        self.assertIn(b"Red Square", response.content)
+
+    def test_only_cached_zooms_invalidated(self):
+        """Test that invalidation skips zoom levels without cached tiles"""
+        self.client.get(self.url)
+        # Stored without going through get_tile(), so zoom 9 has no marker
+        unmarked = tiles.cache_key(9, 309, 160, with_messages=False)
+        cache.set(unmarked, b"stale")
+
+        tiles.invalidate_point(55.7539, 37.6208)
+
+        self.assertIsNone(cache.get(tiles.cache_key(10, 619, 320, False)))
+        self.assertEqual(cache.get(unmarked), b"stale")
+
+    @override_settings(GEO_API={"TILE_CACHE_TIMEOUT": None})
+    def test_unbounded_timeout_needs_shared_cache(self):
+        """Test the system check for tiles cached forever in a per-process cache"""
+        errors = checks.check_tile_cache(None)
+
+        self.assertEqual([error.id for error in errors], ["geo_api.W001"])
+
+    def test_message_counts_invalidated_on_message_create(self):
+        """Test message count tiles are invalidated when a message is added"""
+        response = self.client.get(self.url, {"messages": 1})
+        self.assertIn(b"message_count", response.content)
+        PointMessage.objects.create(point=self.point_moscow, user=self.user, text="Hi")
+
+        self.assertIsNone(cache.get(tiles.cache_key(10, 619, 320, True)))
+
+    def test_tile_not_modified(self):
+        """Test conditional GET with the tile ETag"""
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_tile_out_of_range(self):
+        """Test tile coordinates outside of the zoom level"""
+        url = reverse("point-tile", kwargs={"z": 2, "x": 4, "y": 0})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+# ---------------- 🍰🍰🍰 CONDITIONAL GET (ETag) 🍰🍰🍰 ------------------
+
+
+class SearchConditionalGetTests(TestCase):
+    """Tests for search ETags derived from write counters"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.point_moscow = GeoPoint.objects.create(
+            name="Moscow Kremlin",
+            coordinates={"type": "Point", "coordinates": [37.6173, 55.7558]},
+            created_by=self.user,
+        )
+
+        self.params = {"latitude": 55.7558, "longitude": 37.6173, "radius": 10}
+
+    def test_search_not_modified_without_scan(self):
+        """Test If-None-Match returns 304 with a single version query"""
+        url = reverse("point-search")
+        etag = self.client.get(url, self.params)["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, self.params, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_changes_on_write_in_area(self):
+        """Test that a new point inside the area changes the ETag"""
+        url = reverse("point-search")
+        etag = self.client.get(url, self.params)["ETag"]
+
+        GeoPoint.objects.create(
+            name="Red Square",
+            coordinates={"type": "Point", "coordinates": [37.6208, 55.7539]},
+            created_by=self.user,
+        )
+        response = self.client.get(url, self.params, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["points_found"], 2)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_etag_unchanged_on_write_elsewhere(self):
+        """Test that writes in other cells keep the area version"""
+        url = reverse("point-search")
+        etag = self.client.get(url, self.params)["ETag"]
+
+        GeoPoint.objects.create(
+            name="St. Petersburg",
+            coordinates={"type": "Point", "coordinates": [30.3141, 59.9398]},
+            created_by=self.user,
+        )
+        response = self.client.get(url, self.params, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_depends_on_search_params(self):
+        """Test that other params or another user's "me" get another ETag"""
+        url = reverse("point-search")
+        etag = self.client.get(url, {**self.params, "created_by": "me"})["ETag"]
+
+        for params, user in (
+            ({"max_results": 1}, self.user),
+            ({"name": "Moscow"}, self.user),
+            ({"created_by": "me"}, User.objects.create_user(username="other")),
+        ):
+            self.client.force_authenticate(user=user)
+            response = self.client.get(
+                url, {**self.params, **params}, HTTP_IF_NONE_MATCH=etag
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK, params)
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(
+            url, {**self.params, "created_by": "me"}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_message_search_etag_changes_on_new_message(self):
+        """Test that message search ETag changes when a message is added"""
+        url = reverse("message-search")
+        response = self.client.get(url, self.params)
+        self.assertIn("Last-Modified", response)
+
+        PointMessage.objects.create(point=self.point_moscow, user=self.user, text="Hi")
+        response = self.client.get(
+            url, self.params, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["messages_found"], 1)
+
+
+# ---------------- 🍰🍰🍰 SEARCH COALESCING 🍰🍰🍰 ------------------
+
+
+class SingleFlightTests(TestCase):
+    """Tests for sharing identical concurrent searches"""
+
+    def wait_for_waiters(self, flight, key, waiters):
+        deadline = time.monotonic() + 5
+        while flight._calls[key].waiters < waiters:
+            self.assertLess(time.monotonic(), deadline, "waiters did not join")
+            time.sleep(0.001)
+
+    def run_concurrently(self, flight, key, function, count):
+        results = []
+
+        def call():
+            try:
+                results.append(flight.do(key, function))
+            except ValueError as error:
+                results.append(error)
+
+        threads = [threading.Thread(target=call) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        return results
+
+    def test_threads_share_one_computation(self):
+        """Test that concurrent calls run the function once"""
+        flight = singleflight.SingleFlight()
+        runs = []
+
+        def compute():
+            runs.append(1)
+            self.wait_for_waiters(flight, "key", 4)
+            return ["result"]
+
+        results = self.run_concurrently(flight, "key", compute, 5)
+
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(sorted(shared for _, shared in results), [False] + [True] * 4)
+        self.assertTrue(all(result == ["result"] for result, _ in results))
+        self.assertEqual(flight._calls, {})
+
+        # Nothing is cached after the computation is done
+        self.assertEqual(flight.do("key", lambda: "again"), ("again", False))
+
+    def test_errors_are_shared(self):
+        """Test that waiters get the exception of the computation"""
+        flight = singleflight.SingleFlight()
+
+        def fail():
+            self.wait_for_waiters(flight, "key", 2)
+            raise ValueError("boom")
+
+        results = self.run_concurrently(flight, "key", fail, 3)
+
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+
+    def test_coroutines_share_one_computation(self):
+        """Test asyncio mode"""
+        flight = singleflight.SingleFlight()
+        runs = []
+
+        async def compute():
+            runs.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        async def main():
+            return await asyncio.gather(
+                *(flight.ado("key", compute) for _ in range(5)),
+                flight.ado("other", compute),
+            )
+
+        results = asyncio.run(main())
+
+        self.assertEqual(len(runs), 2)
+        self.assertEqual(
+            [shared for _, shared in results], [False, True, True, True, True, False]
+        )
+        self.assertEqual(flight._tasks, {})
+
+    def test_coalesced_searches_are_counted(self):
+        """Test the metric of requests collapsed into another search"""
+        metrics.SEARCHES_COALESCED.clear()
+        metrics.SEARCHES.clear()
+        key = ("point-search", None, 55.75, 37.6, 10.0)
+        views = [GeoPointSearchView() for _ in range(3)]
+
+        def search(stats):
+            self.wait_for_waiters(singleflight.searches, key, 2)
+            stats.matches = 1
+            return ["point"]
+
+        threads = [
+            threading.Thread(
+                target=view.coalesced_search, args=(key[0], key[2:], search)
+            )
+            for view in views
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(metrics.SEARCHES_COALESCED._values[("point-search",)], 2)
+        self.assertEqual(sum(view.search_stats is not None for view in views), 1)
+
+    @override_settings(GEO_API={"READ_REPLICAS": ["replica1"]})
+    def test_searches_on_other_databases_are_not_shared(self):
+        """Test that a replica search and a primary search run separately"""
+        cache.clear()
+        # Both searches have to start, or the barrier breaks
+        barrier = threading.Barrier(2, timeout=5)
+        results = []
+
+        def search(stats):
+            barrier.wait()
+            return routers.current_alias()
+
+        def run(user_id):
+            with routers.replica_reads(user_id):
+                results.append(
+                    GeoPointSearchView().coalesced_search(
+                        "point-search", (55.75, 37.6, 10.0), search
+                    )
+                )
+
+        routers.mark_write(1)
+        threads = [threading.Thread(target=run, args=(user,)) for user in (1, 2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(sorted(results, key=str), [None, "replica1"])
+
+    @override_settings(GEO_API={"SEARCH_COALESCING": False})
+    def test_coalescing_can_be_disabled(self):
+        """Test that searches run directly when coalescing is off"""
+        view = GeoPointSearchView()
+        result = view.coalesced_search("point-search", (1, 2, 3), lambda stats: [1])
+
+        self.assertEqual(result, [1])
+        self.assertIsNotNone(view.search_stats)
+        self.assertEqual(singleflight.searches._calls, {})
+
+
+# ---------------- 🍰🍰🍰 GET /metrics 🍰🍰🍰 ------------------
+
+
+class MetricsTests(TestCase):
+    """Tests for search metrics and Prometheus exposition"""
+
+    def setUp(self):
+        for metric in metrics.REGISTRY:
+            metric.clear()
+
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+
+        for name, coords in [("Kremlin", [37.6173, 55.7558]), ("SPB", [30.31, 59.94])]:
+            GeoPoint.objects.create(
+                name=name,
+                coordinates={"type": "Point", "coordinates": coords},
+                created_by=self.user,
+            )
+
+    def test_search_records_stats(self):
+        """Test that a search records candidates, evaluations and matches"""
+        self.client.get(
+            reverse("point-search"),
+            {"latitude": 55.7558, "longitude": 37.6173, "radius": 10},
+        )
+
+        # Only the point inside the radius bbox is read
+        endpoint = ("point-search",)
+        self.assertEqual(metrics.SEARCH_CANDIDATES._values[endpoint], 1)
+        self.assertEqual(metrics.SEARCH_DISTANCE_EVALUATIONS._values[endpoint], 1)
+        self.assertEqual(metrics.SEARCH_MATCHES._values[endpoint], 1)
+        self.assertEqual(metrics.SEARCH_SERIALIZATION_SECONDS._values[endpoint][2], 1)
+        self.assertEqual(metrics.REQUEST_DURATION._values[endpoint][2], 1)
+
+    def test_metrics_endpoint_prometheus_format(self):
+        """Test Prometheus text exposition of recorded metrics"""
+        self.client.get(
+            reverse("message-search"),
+            {"latitude": 55.7558, "longitude": 37.6173, "radius": 10},
+        )
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        content = response.content.decode()
+        self.assertIn("# TYPE geo_api_search_db_seconds histogram", content)
+        self.assertIn('geo_api_searches_total{endpoint="message-search"} 1', content)
+        self.assertIn(
+            'geo_api_search_db_seconds_bucket{endpoint="message-search",le="+Inf"} 1',
+            content,
+        )
+
+    @override_settings(GEO_API={"METRICS_TOKEN": "secret"})
+    def test_metrics_endpoint_token(self):
+        """Test that /metrics requires the bearer token when configured"""
+        url = reverse("metrics")
+
+        self.assertEqual(self.client.get(url).status_code, 401)
+        response = self.client.get(url, HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_metrics_endpoint_staff_only_without_token(self):
+        """Test that without a token /metrics is only served to staff users"""
+        url = reverse("metrics")
+
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_multiprocess_aggregation(self):
+        """Test that /metrics sums dumps of all worker processes"""
+        metrics.SEARCHES.inc("point-search", amount=2)
+
+        with tempfile.TemporaryDirectory() as directory:
+            other = {"geo_api_searches_total": metrics.SEARCHES.snapshot()}
+            with open(os.path.join(directory, "metrics-1.json"), "w") as file:
+                json.dump(other, file)
+
+            with override_settings(GEO_API={"METRICS_DIR": directory}):
+                content = metrics.render()
+
+        self.assertIn('geo_api_searches_total{endpoint="point-search"} 4', content)
+
+    def test_exited_process_dumps_folded(self):
+        """Test that dumps of exited processes are merged into one file"""
+        metrics.SEARCHES.inc("point-search", amount=2)
+        dump = {"geo_api_searches_total": metrics.SEARCHES.snapshot()}
+
+        with tempfile.TemporaryDirectory() as directory:
+            # Exited processes, pid_max is at most 2 ** 22
+            for pid in (2**22 + 1, 2**22 + 2):
+                with open(os.path.join(directory, f"metrics-{pid}.json"), "w") as file:
+                    json.dump(dump, file)
+
+            with override_settings(GEO_API={"METRICS_DIR": directory}):
+                content = metrics.render()
+                self.assertEqual(
+                    set(os.listdir(directory)),
+                    {
+                        "metrics-exited.json",
+                        "metrics-exited.json.lock",
+                        f"metrics-{os.getpid()}.json",
+                    },
+                )
+                self.assertEqual(metrics.render(), content)
+
+        self.assertIn('geo_api_searches_total{endpoint="point-search"} 6', content)
+
+
+# ------------- 🍰🍰🍰 GET /api/points/messages/stream/ (SSE) 🍰🍰🍰 ---------------
+
+
+class ImmediateLoop:
+    """Event loop stand-in delivering events synchronously"""
+
+    def call_soon_threadsafe(self, callback, *args):
+        callback(*args)
+
+
+class LiveBrokerTests(TestCase):
+    """Tests for the indexed broker of live message subscriptions"""
+
+    def setUp(self):
+        self.broker = live.Broker()
+        self.moscow = live.Subscription(55.7558, 37.6173, 10, loop=ImmediateLoop())
+        self.london = live.Subscription(51.5074, -0.1278, 10, loop=ImmediateLoop())
+        self.broker.subscribe(self.moscow)
+        self.broker.subscribe(self.london)
+
+    def test_only_nearby_subscribers_are_candidates(self):
+        """Test that a message is only checked against its cell's subscribers"""
+        matches = self.broker.matching(55.75, 37.62)
+
+        self.assertEqual([match[0] for match in matches], [self.moscow])
+        self.assertNotIn(self.london, self.broker._cells[live._cell(55.75, 37.62)])
+
+        # Same cell, but outside the circle
+        self.assertEqual(self.broker.matching(55.99, 37.99), [])
+
+    def test_wide_and_antimeridian_subscriptions(self):
+        """Test circles over many cells and across the antimeridian"""
+        wide = live.Subscription(0, 0, 5000, loop=ImmediateLoop())
+        fiji = live.Subscription(-17, 179.9, 50, loop=ImmediateLoop())
+        self.broker.subscribe(wide)
+        self.broker.subscribe(fiji)
+
+        self.assertIn(wide, self.broker._wide)
+        self.assertEqual([m[0] for m in self.broker.matching(10, 10)], [wide])
+        self.assertEqual([m[0] for m in self.broker.matching(-17, -179.9)], [fiji])
+
+    def test_unsubscribe_cleans_index(self):
+        """Test that unsubscribing removes empty cells, once"""
+        self.broker.unsubscribe(self.moscow)
+        self.broker.unsubscribe(self.moscow)
+        self.broker.unsubscribe(self.london)
+
+        self.assertEqual(len(self.broker), 0)
+        self.assertEqual(self.broker._cells, {})
+
+    def test_slow_subscriber_is_disconnected(self):
+        """Test that a full queue ends the stream instead of growing"""
+        event = {"change_seq": 1, "_position": (55.7558, 37.6173), "id": 1}
+
+        with override_settings(GEO_API={"LIVE_QUEUE_SIZE": 2}):
+            slow = live.Subscription(55.7558, 37.6173, 1, loop=ImmediateLoop())
+        self.broker.subscribe(slow)
+        for _ in range(3):
+            self.broker.publish(event)
+
+        self.assertTrue(slow.overflowed)
+        self.assertEqual(slow.queue.qsize(), 2)
+        self.assertIsNotNone(slow.queue.get_nowait())
+        self.assertIsNone(slow.queue.get_nowait())
+
+
+class MessageStreamTests(TestCase):
+    """Tests for the Server-Sent Events stream of new messages"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123"
+        )
+        self.url = reverse("message-stream")
+        self.params = {"latitude": 55.7558, "longitude": 37.6173, "radius": 10}
+
+        self.point_moscow = GeoPoint.objects.create(
+            name="Moscow Kremlin",
+            coordinates={"type": "Point", "coordinates": [37.6173, 55.7558]},
+            created_by=self.user,
+        )
+        self.point_spb = GeoPoint.objects.create(
+            name="Saint Petersburg",
+            coordinates={"type": "Point", "coordinates": [30.3351, 59.9343]},
+            created_by=self.user,
+        )
+
+    def create_messages(self, *points):
+        with self.captureOnCommitCallbacks(execute=True):
+            return [
+                PointMessage.objects.create(point=point, user=self.user, text="Hi")
+                for point in points
+            ]
+
+    async def test_stream_pushes_messages_in_area(self):
+        """Test that only messages inside the circle are pushed"""
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(self.url, self.params)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        content = aiter(response.streaming_content)
+        try:
+            self.assertTrue((await anext(content)).startswith(b"retry:"))
+
+            far, near = await sync_to_async(self.create_messages)(
+                self.point_spb, self.point_moscow
+            )
+            frame = (await asyncio.wait_for(anext(content), 5)).decode()
+        finally:
+            await content.aclose()
+
+        self.assertTrue(frame.startswith(f"id: {near.change_seq}\nevent: message\n"))
+        data = json.loads(frame.split("data: ", 1)[1])
+        self.assertEqual(data["id"], near.id)
+        self.assertEqual(data["distance_km"], 0)
+
+    async def test_reconnect_replays_missed_messages(self):
+        """Test that Last-Event-ID replays messages saved after it"""
+        seen, missed = await sync_to_async(self.create_messages)(
+            self.point_moscow, self.point_moscow
+        )
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(
+            self.url, self.params, headers={"Last-Event-ID": str(seen.change_seq)}
+        )
+
+        content = aiter(response.streaming_content)
+        try:
+            await anext(content)
+            frame = (await anext(content)).decode()
+        finally:
+            await content.aclose()
+
+        self.assertTrue(frame.startswith(f"id: {missed.change_seq}\n"))
+
+    async def test_stream_polls_queued_messages(self):
+        """Test that messages inserted by the queue worker reach subscribers"""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        config = {
+            "MESSAGE_INGEST": "queue",
+            "MESSAGE_QUEUE_PATH": os.path.join(directory.name, "queue.sqlite3"),
+            "LIVE_POLL_SECONDS": 0.01,
+        }
+
+        def run_worker():
+            # Draining does not publish to the broker, like in the worker
+            # process where nobody subscribes
+            ingest.enqueue(self.point_moscow, self.user, "Queued")
+            ingest.enqueue(self.point_spb, self.user, "Far")
+            try:
+                return ingest.drain()
+            finally:
+                ingest.get_queue().close()
+
+        with self.settings(GEO_API=config):
+            await self.async_client.aforce_login(self.user)
+            response = await self.async_client.get(self.url, self.params)
+
+            content = aiter(response.streaming_content)
+            try:
+                await anext(content)
+                self.assertEqual(await sync_to_async(run_worker)(), 2)
+                frame = (await asyncio.wait_for(anext(content), 5)).decode()
+            finally:
+                await content.aclose()
+
+        data = json.loads(frame.split("data: ", 1)[1])
+        self.assertEqual(data["text"], "Queued")
+
+    def test_requires_authentication_and_valid_params(self):
+        """Test errors returned before the stream is opened"""
+        response = self.client.get(self.url, self.params)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_login(self.user)
+        for params in (
+            {"latitude": 55.7558},
+            {**self.params, "radius": "abc"},
+            {**self.params, "radius": 1000},
+            {**self.params, "latitude": 91},
+        ):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+# ---------------- 🍰🍰🍰 GET /api/changes/ 🍰🍰🍰 ------------------
+
+
+class ChangeFeedTests(TestCase):
+    """Tests for the incremental change feed"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("changes")
+
+        self.point_moscow = GeoPoint.objects.create(
+            name="Moscow Kremlin",
+            coordinates={"type": "Point", "coordinates": [37.6173, 55.7558]},
+            created_by=self.user,
+        )
+        self.point_fiji = GeoPoint.objects.create(
+            name="Fiji",
+            coordinates={"type": "Point", "coordinates": [178.4, -18.1]},
+            created_by=self.user,
+        )
+        self.message = PointMessage.objects.create(
+            point=self.point_moscow, user=self.user, text="Hello"
+        )
+
+    def test_saves_take_increasing_sequence_values(self):
+        """Test that every save moves a row to the end of the sequence"""
+        self.assertLess(self.point_moscow.change_seq, self.point_fiji.change_seq)
+        self.assertLess(self.point_fiji.change_seq, self.message.change_seq)
+
+        self.point_moscow.name = "Kremlin"
+        self.point_moscow.save(update_fields=["name"])
+        self.point_moscow.refresh_from_db()
+
+        self.assertGreater(self.point_moscow.change_seq, self.message.change_seq)
+
+    def test_full_sync_in_pages(self):
+        """Test paging through all changes with the returned cursors"""
+        response = self.client.get(self.url, {"since": 0, "limit": 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["has_more"])
+        self.assertEqual(
+            [point["id"] for point in response.data["points"]],
+            [self.point_moscow.id, self.point_fiji.id],
+        )
+        self.assertEqual(response.data["messages"], [])
+
+        response = self.client.get(
+            self.url, {"since": response.data["next_cursor"], "limit": 2}
+        )
+
+        self.assertFalse(response.data["has_more"])
+        self.assertEqual(response.data["points"], [])
+        self.assertEqual(response.data["messages"][0]["id"], self.message.id)
+        self.assertEqual(response.data["next_cursor"], self.message.change_seq)
+
+    def test_only_changes_after_cursor(self):
+        """Test that an updated point is returned again after the cursor"""
+        cursor = self.message.change_seq
+        response = self.client.get(self.url, {"since": cursor})
+
+        self.assertEqual(response.data["points"], [])
+        self.assertEqual(response.data["next_cursor"], cursor)
+
+        self.point_fiji.description = "Updated"
+        self.point_fiji.save()
+        response = self.client.get(self.url, {"since": cursor})
+
+        self.assertEqual(len(response.data["points"]), 1)
+        self.assertEqual(response.data["points"][0]["description"], "Updated")
+
+    def test_bbox_filter(self):
+        """Test that the bbox limits points and messages, incl. antimeridian"""
+        response = self.client.get(self.url, {"bbox": "37,55,38,56"})
+
+        self.assertEqual(
+            [point["id"] for point in response.data["points"]],
+            [self.point_moscow.id],
+        )
+        self.assertEqual(len(response.data["messages"]), 1)
+
+        response = self.client.get(self.url, {"bbox": "170,-20,-170,-10"})
+
+        self.assertEqual(
+            [point["id"] for point in response.data["points"]], [self.point_fiji.id]
+        )
+        self.assertEqual(response.data["messages"], [])
+
+    def test_invalid_params(self):
+        """Test validation of cursor, limit and bbox"""
+        for params in (
+            {"since": "abc"},
+            {"since": -1},
+            {"limit": 0},
+            {"limit": 100000},
+            {"bbox": "1,2,3"},
+            {"bbox": "0,91,1,92"},
+        ):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+# ---------------- 🍰🍰🍰 /api/geofences/ 🍰🍰🍰 ------------------
+
+
+class GeofenceTests(TestCase):
+    """Tests for geofences and their matching on point creation"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123"
+        )
+        self.other_user = User.objects.create_user(
+            username="otheruser", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+
+        # Circle of 2 km around the Kremlin
+        self.kremlin = Geofence.objects.create(
+            name="Kremlin",
+            geometry={"type": "Point", "coordinates": [37.6173, 55.7558]},
+            radius_km=2,
+            created_by=self.user,
+        )
+        # Square around central Moscow, owned by another user
+        self.center = Geofence.objects.create(
+            name="Center",
+            geometry={
+                "type": "Polygon",
+                "coordinates": [
+                    [
+                        [37.5, 55.7],
+                        [37.7, 55.7],
+                        [37.7, 55.8],
+                        [37.5, 55.8],
+                        [37.5, 55.7],
+                    ]
+                ],
+            },
+            created_by=self.other_user,
+        )
+
+    def create_point(self, lon, lat):
+        return self.client.post(
+            reverse("point-create"),
+            {
+                "name": "New point",
+                "coordinates": {"type": "Point", "coordinates": [lon, lat]},
+            },
+            format="json",
+        )
+
+    def test_point_creation_returns_own_matches(self):
+        """Test that matches are recorded and own fences are returned"""
+        response = self.create_point(37.62, 55.75)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            response.data["geofences"], [{"id": self.kremlin.id, "name": "Kremlin"}]
+        )
+        point = GeoPoint.objects.get(pk=response.data["id"])
+        self.assertEqual(
+            sorted(point.geofence_matches.values_list("fence_id", flat=True)),
+            [self.kremlin.id, self.center.id],
+        )
+
+    def test_point_outside_fences(self):
+        """Test points inside the bbox but outside the circle"""
+        response = self.create_point(37.65, 55.79)
+
+        self.assertEqual(response.data["geofences"], [])
+        self.assertEqual(geofences.matching_fences(55.79, 37.65), [self.center])
+        self.assertEqual(geofences.matching_fences(-33.86, 151.2), [])
+
+    def test_index_cells_are_bounded(self):
+        """Test that small and huge fences take a few cells each"""
+        huge = Geofence.objects.create(
+            name="Eurasia",
+            geometry={"type": "Point", "coordinates": [60, 50]},
+            radius_km=500,
+            created_by=self.user,
+        )
+
+        for fence in (self.kremlin, self.center, huge):
+            cells = GeofenceCell.objects.filter(fence=fence)
+            self.assertLessEqual(cells.count(), 16)
+            self.assertEqual(len(set(cells.values_list("level", flat=True))), 1)
+
+        self.assertEqual(geofences.matching_fences(50, 60), [huge])
+
+    def test_antimeridian_circle(self):
+        """Test a circle crossing the antimeridian"""
+        fiji = Geofence.objects.create(
+            name="Fiji",
+            geometry={"type": "Point", "coordinates": [179.9, -17]},
+            radius_km=50,
+            created_by=self.user,
+        )
+
+        self.assertEqual(geofences.matching_fences(-17, -179.9), [fiji])
+
+    def test_update_reindexes_fence(self):
+        """Test that moving a fence moves its index cells"""
+        url = reverse("geofence-detail", kwargs={"pk": self.kremlin.pk})
+        response = self.client.patch(
+            url,
+            {"geometry": {"type": "Point", "coordinates": [30.3141, 59.9398]}},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(geofences.matching_fences(55.7558, 37.6173), [self.center])
+        self.assertEqual(geofences.matching_fences(59.94, 30.31), [self.kremlin])
+
+    def test_create_and_list_own_fences(self):
+        """Test the geofence API only shows the user's own fences"""
+        response = self.client.post(
+            reverse("geofence-list"),
+            {
+                "name": "Office",
+                "geometry": {"type": "Point", "coordinates": [37.6, 55.7]},
+                "radius_km": 0.5,
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.get(reverse("geofence-list"))
+        self.assertEqual(
+            [fence["name"] for fence in response.data], ["Kremlin", "Office"]
+        )
+
+        url = reverse("geofence-detail", kwargs={"pk": self.center.pk})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_geofences(self):
+        """Test geometry and radius validation"""
+        square = [[[0, 0], [1, 0], [1, 1], [0, 0]]]
+        for data in (
+            {"geometry": {"type": "Point", "coordinates": [37.6, 55.7]}},
+            {
+                "geometry": {"type": "Point", "coordinates": [37.6, 55.7]},
+                "radius_km": 10000,
+            },
+            {"geometry": {"type": "Point", "coordinates": [200, 55.7]}, "radius_km": 1},
+            {"geometry": {"type": "Polygon", "coordinates": square}, "radius_km": 1},
+            {"geometry": {"type": "Polygon", "coordinates": [[[0, 0], [1, 1]]]}},
+            {"geometry": {"type": "LineString", "coordinates": [[0, 0], [1, 1]]}},
+        ):
+            response = self.client.post(
+                reverse("geofence-list"), {"name": "Bad", **data}, format="json"
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, data)
+
+    def test_matches_endpoint(self):
+        """Test listing points matched by an own fence"""
+        point_id = self.create_point(37.62, 55.75).data["id"]
+
+        url = reverse("geofence-matches", kwargs={"pk": self.kremlin.pk})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["matches"][0]["id"], point_id)
+        self.assertIn("matched_at", response.data["matches"][0])
+
+        url = reverse("geofence-matches", kwargs={"pk": self.center.pk})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+
+# ---------------- 🍰🍰🍰 ADMIN 🍰🍰🍰 ------------------
+
+
+@override_settings(GEO_API={"ADMIN_COUNT_LIMIT": 5})
+class AdminTests(TestCase):
+    """Tests for admin change lists of large tables"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="admin", password="pass123", email="admin@example.com"
+        )
+        self.client.force_login(self.admin)
+
+        self.points = [
+            GeoPoint.objects.create(
+                name=f"Point {i}",
+                coordinates={"type": "Point", "coordinates": [37 + i * 0.1, 55]},
+                created_by=self.admin,
+            )
+            for i in range(8)
+        ]
+        for point in self.points:
+            PointMessage.objects.create(point=point, user=self.admin, text="Hi")
+
+        self.url = reverse("admin:geo_api_geopoint_changelist")
+
+    def changelist(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+
+        self.assertEqual(response.status_code, 200)
+        for query in queries.captured_queries:
+            if "COUNT(" in query["sql"]:
+                self.assertIn("LIMIT", query["sql"])
+        return response, queries
+
+    def ids(self, response):
+        return [obj.pk for obj in response.context["cl"].result_list]
+
+    def test_counts_are_bounded(self):
+        """Test that no query counts a whole table"""
+        response, _ = self.changelist(self.url)
+
+        cl = response.context["cl"]
+        self.assertEqual(cl.paginator.count, 5)
+        # Estimated total from the largest id
+        self.assertEqual(cl.result_count, self.points[-1].pk)
+
+    def test_keyset_pages(self):
+        """Test ?before= pages continue past the counted rows"""
+        GeoPointAdmin = type(admin.site._registry[GeoPoint])
+        GeoPointAdmin.list_per_page, per_page = 3, GeoPointAdmin.list_per_page
+
+        try:
+            response, _ = self.changelist(self.url)
+            newest = [point.pk for point in reversed(self.points)]
+            self.assertEqual(self.ids(response), newest[:3])
+            self.assertIn(f"before={newest[2]}", response.context["cl"].older_url)
+
+            response, _ = self.changelist(self.url, before=newest[2])
+            self.assertEqual(self.ids(response), newest[3:6])
+            self.assertContains(response, "Newest")
+        finally:
+            GeoPointAdmin.list_per_page = per_page
+
+        response = self.client.get(self.url, {"before": "abc"})
+        self.assertRedirects(response, f"{self.url}?e=1", fetch_redirect_response=False)
+
+    def test_related_objects_are_joined(self):
+        """Test that the number of queries doesn't grow with the rows"""
+        url = reverse("admin:geo_api_pointmessage_changelist")
+        _, queries = self.changelist(url)
+        queries_count = len(queries)
+
+        for point in self.points:
+            PointMessage.objects.create(point=point, user=self.admin, text="Again")
+        _, queries = self.changelist(url)
+
+        self.assertEqual(len(queries), queries_count)
+
+    def test_area_filter(self):
+        """Test bbox and radius filters over the bbox search"""
+        response, _ = self.changelist(self.url, bbox="37.15,54,37.45,56")
+        self.assertEqual(
+            sorted(self.ids(response)), [point.pk for point in self.points[2:5]]
+        )
+
+        # 0.1 degree of longitude at 55N is ~6.4 km
+        response, _ = self.changelist(self.url, near="55,37,7")
+        self.assertEqual(
+            sorted(self.ids(response)), [point.pk for point in self.points[:2]]
+        )
+
+        url = reverse("admin:geo_api_pointmessage_changelist")
+        response, _ = self.changelist(url, near="55,37,7")
+        self.assertEqual(len(self.ids(response)), 2)
+
+        response = self.client.get(self.url, {"bbox": "1,2,3"})
+        self.assertRedirects(response, f"{self.url}?e=1", fetch_redirect_response=False)
+
+    def test_forms_use_autocomplete(self):
+        """Test that foreign keys don't render every related row"""
+        response = self.client.get(reverse("admin:geo_api_pointmessage_add"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'class="admin-autocomplete', count=2)
+        self.assertNotContains(response, f">{self.points[0].name}<")
+
+
+class SqliteTuningTests(TestCase):
+    """Tests for pragmas applied to new SQLite connections"""
+
+    def test_apply_pragmas(self):
+        """Test that configured pragmas are set on the connection"""
+        original = sqlite.current_pragmas(connection, ["busy_timeout", "cache_size"])
+        self.addCleanup(sqlite.apply_pragmas, connection, original)
+
+        sqlite.apply_pragmas(connection, {"busy_timeout": 1234, "cache_size": -4096})
+
+        self.assertEqual(
+            sqlite.current_pragmas(connection, ["busy_timeout", "cache_size"]),
+            {"busy_timeout": 1234, "cache_size": -4096},
+        )
+
+    def test_pragmas_are_not_profiled(self):
+        """Test that connection setup is not counted as queries of a request"""
+        original = sqlite.current_pragmas(connection, ["cache_size"])
+        self.addCleanup(sqlite.apply_pragmas, connection, original)
+        statements = []
+
+        def record(execute, sql, params, many, context):
+            statements.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            with CaptureQueriesContext(connection) as queries:
+                sqlite.apply_pragmas(connection, {"cache_size": -4096})
+
+        self.assertEqual((statements, len(queries)), ([], 0))
+        self.assertEqual(
+            sqlite.current_pragmas(connection, ["cache_size"]), {"cache_size": -4096}
+        )
+
+    def test_invalid_pragmas(self):
+        """Test that pragma names and values can't inject SQL"""
+        for pragmas in (
+            {"cache_size; DROP TABLE x": 1},
+            {"journal_mode": "WAL; DROP TABLE x"},
+        ):
+            with self.assertRaises(ValueError):
+                sqlite.pragma_statements(pragmas)
+
+    def test_production_profile(self):
+        """Test the production profile: WAL and persistent checked connections"""
+        profile = settings.SQLITE_PROFILES["production"]
+
+        self.assertEqual(profile["PRAGMAS"]["journal_mode"], "WAL")
+        self.assertEqual(profile["PRAGMAS"]["synchronous"], "NORMAL")
+        self.assertGreater(profile["CONN_MAX_AGE"], 0)
+        self.assertTrue(profile["CONN_HEALTH_CHECKS"])
+        self.assertEqual(
+            sqlite.pragma_statements({"synchronous": "NORMAL"}),
+            ["PRAGMA synchronous = NORMAL"],
+        )
+
+
+# ---------------- 🍰🍰🍰 PROFILING & QUERY BUDGETS 🍰🍰🍰 ------------------
+
+
+class QueryBudgetTests(TestCase):
+    """Tests that every view stays within its declared SQL query budget"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.users = [
+            User.objects.create_user(username=f"user{i}", password="testpass123")
+            for i in range(3)
+        ]
+        # Session auth, so that authentication queries are counted too
+        self.client.login(username="user0", password="testpass123")
+
+    def create_points(self):
+        """
+        Points with messages of different users, for the read views. Write
+        views are tested without them: the first write into an empty cell
+        also creates its clusters, heatmap bins and counters, and the budget
+        must cover that
+        """
+        self.points = []
+        for i in range(6):
+            point = GeoPoint.objects.create(
+                name=f"Point {i}",
+                coordinates={"type": "Point", "coordinates": [37.6 + i / 100, 55.75]},
+                created_by=self.users[i % 3],
+            )
+            PointMessage.objects.create(
+                point=point, user=self.users[i % 3], text=f"Message {i}"
+            )
+            self.points.append(point)
+
+    def assertWithinQueryBudget(self, method, url, **kwargs):
+        view_class = resolve(url.split("?")[0]).func.view_class
+
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, **kwargs)
+
+        self.assertLess(response.status_code, 400)
+        self.assertLessEqual(
+            len(queries),
+            view_class.query_budget,
+            f"{view_class.__name__}: "
+            + "\n".join(query["sql"] for query in queries.captured_queries),
+        )
+
+    def test_search_views(self):
+        """Test searches do not issue a query per matching row (N+1)"""
+        self.create_points()
+        params = "latitude=55.75&longitude=37.6&radius=50"
+        self.assertWithinQueryBudget("get", f"{reverse('point-search')}?{params}")
+        self.assertWithinQueryBudget("get", f"{reverse('message-search')}?{params}")
+        self.assertWithinQueryBudget(
+            "get", f"{reverse('message-search')}?{params}&q=message"
+        )
+        self.assertWithinQueryBudget(
+            "get", f"{reverse('message-search')}?{params}&q=message&include_archived=1"
+        )
+        filters = f"{params}&created_by=me&created_after=2020-01-01&name=point"
+        self.assertWithinQueryBudget("get", f"{reverse('point-search')}?{filters}")
+        self.assertWithinQueryBudget("get", f"{reverse('message-search')}?{filters}")
+        self.assertWithinQueryBudget("get", f"{reverse('message-feed')}?{params}")
+
+    def test_map_views(self):
+        """Test bbox, clusters and tiles query budgets"""
+        self.create_points()
+        bbox = "west=37&south=55&east=38&north=56"
+        self.assertWithinQueryBudget("get", f"{reverse('point-bbox')}?{bbox}")
+        self.assertWithinQueryBudget(
+            "get", f"{reverse('point-clusters')}?{bbox}&zoom=8"
+        )
+        self.assertWithinQueryBudget("get", f"{reverse('changes')}?bbox=37,55,38,56")
+        self.assertWithinQueryBudget(
+            "get", f"{reverse('point-heatmap')}?bbox=37,55,38,56&resolution=10"
+        )
+        url = reverse("point-tile", kwargs={"z": 10, "x": 619, "y": 320})
+        self.assertWithinQueryBudget("get", f"{url}?messages=1")
+        self.assertWithinQueryBudget(
+            "post",
+            reverse("point-along-route"),
+            data=json.dumps(
+                {
+                    "route": {
+                        "type": "LineString",
+                        "coordinates": [[37, 55], [38, 56]],
+                    },
+                    "buffer_km": 50,
+                }
+            ),
+            content_type="application/json",
+        )
+        self.assertWithinQueryBudget(
+            "post",
+            reverse("point-within"),
+            data=json.dumps(
+                {
+                    "type": "Polygon",
+                    "coordinates": [[[37, 55], [38, 55], [38, 56], [37, 55]]],
+                }
+            ),
+            content_type="application/json",
+        )
+        self.assertWithinQueryBudget(
+            "post",
+            reverse("distance-matrix"),
+            data=json.dumps(
+                {"sources": [point.id for point in self.points] + [[37, 55]]}
+            ),
+            content_type="application/json",
+        )
+
+    def test_create_views(self):
+        """Test point and message creation query budgets on an empty database"""
+        self.assertWithinQueryBudget(
+            "post",
+            reverse("point-create"),
+            data=json.dumps(
+                {"name": "New", "coordinates": {"type": "Point", "coordinates": [1, 1]}}
+            ),
+            content_type="application/json",
+        )
+        self.assertWithinQueryBudget(
+            "post",
+            f"{reverse('point-create')}?dedupe=merge",
+            data=json.dumps(
+                {
+                    "name": "Newer",
+                    "coordinates": {"type": "Point", "coordinates": [-120, -40]},
+                }
+            ),
+            content_type="application/json",
+        )
+        self.assertWithinQueryBudget(
+            "post",
+            reverse("message-create"),
+            data=json.dumps({"point": GeoPoint.objects.first().id, "text": "New"}),
+            content_type="application/json",
+        )
+
+    def test_first_message_for_new_point(self):
+        """Test the first message of a new point fits the budget"""
+        point = GeoPoint.objects.create(
+            name="Remote",
+            coordinates={"type": "Point", "coordinates": [120, -30]},
+            created_by=self.users[1],
+        )
+        self.assertWithinQueryBudget(
+            "post",
+            reverse("message-create"),
+            data=json.dumps({"point": point.id, "text": "First"}),
+            content_type="application/json",
+        )
+
+    def test_geofence_views(self):
+        """Test geofence API query budgets"""
+        self.create_points()
+        data = {
+            "name": "Fence",
+            "geometry": {"type": "Point", "coordinates": [37.6, 55.75]},
+            "radius_km": 5,
+        }
+        self.assertWithinQueryBudget(
+            "post",
+            reverse("geofence-list"),
+            data=json.dumps(data),
+            content_type="application/json",
+        )
+        self.assertWithinQueryBudget("get", reverse("geofence-list"))
+
+        fence = Geofence.objects.get()
+        self.assertWithinQueryBudget(
+            "patch",
+            reverse("geofence-detail", kwargs={"pk": fence.pk}),
+            data=json.dumps({"radius_km": 10}),
+            content_type="application/json",
+        )
+        self.assertWithinQueryBudget(
+            "get", reverse("geofence-matches", kwargs={"pk": fence.pk})
+        )
+
+    @override_settings(GEO_API={"PROFILING": True, "PROFILING_SQL": True})
+    def test_server_timing_headers(self):
+        """Test Server-Timing and SQL summary headers"""
+        self.create_points()
+        response = self.client.get(
+            reverse("point-search"),
+            {"latitude": 55.75, "longitude": 37.6, "radius": 50},
+        )
+
+        self.assertRegex(
+            response["Server-Timing"],
+            r"^db;dur=[\d.]+, compute;dur=[\d.]+, render;dur=[\d.]+, total;dur=",
+        )
+        self.assertEqual(response["X-SQL-Summary"], "queries=5; duplicates=0")
+
+    @override_settings(GEO_API={"QUERY_BUDGET_LOG": True})
+    def test_budget_exceeded_is_logged(self):
+        """Test that requests over the view's budget are logged"""
+        url = reverse("point-bbox")
+        view_class = resolve(url).func.view_class
+        view_class.query_budget, budget = 0, view_class.query_budget
+
+        try:
+            with self.assertLogs("geo_api.profiling", "WARNING") as logs:
+                self.client.get(url, {"west": 37, "south": 55, "east": 38, "north": 56})
+        finally:
+            view_class.query_budget = budget
+
+        self.assertIn("GeoPointBBoxView", logs.output[0])
+
+
 # ------------------ 🍰🍰🍰 MODELS (__str__) 🍰🍰🍰 ------------------
 
 
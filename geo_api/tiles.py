@@ -0,0 +1,164 @@
+"""
+Vector tiles with GeoPoints, cached per (z, x, y).
+
+Tiles are rendered in-process (see mvt.py) and stored in the Django cache
+for GEO_API["TILE_CACHE_TIMEOUT"] seconds. When a point is created, moved
+or changed, every cached tile that contains it (including neighbours within
+the tile buffer) is invalidated, on every zoom level that has cached tiles,
+see signals.py. Invalidation only reaches other processes through a shared
+cache backend; with the default per-process cache they serve their copy
+until it expires.
+"""
+
+import math
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from . import mvt
+from .conf import get_setting
+from .search import bbox_queryset
+from .utils import mercator_xy
+
+CONTENT_TYPE = "application/vnd.mapbox-vector-tile"
+
+EXTENT = 4096
+
+# Points this close to a tile edge (in tile units) are also drawn in the
+# neighbouring tile, so that symbols are not clipped at tile borders
+BUFFER = 64
+
+LAYER_NAME = "points"
+
+
+def tile_bounds(z, x, y, buffer=0):
+    """
+    Return (west, south, east, north) of a tile in degrees,
+    extended by `buffer` tile units on every side
+    """
+    n = 2**z
+    pad = buffer / EXTENT
+
+    def lon(tile_x):
+        return tile_x / n * 360.0 - 180.0
+
+    def lat(tile_y):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * tile_y / n))))
+
+    return (
+        max(lon(x - pad), -180.0),
+        lat(min(y + 1 + pad, n)),
+        min(lon(x + 1 + pad), 180.0),
+        lat(max(y - pad, 0)),
+    )
+
+
+def point_tiles(lat, lon):
+    """
+    Return every (z, x, y) tile that draws the point, for all zoom levels
+    """
+    mx, my = mercator_xy(lat, lon)
+    pad = BUFFER / EXTENT
+    tiles = []
+
+    for z in range(get_setting("TILE_MAX_ZOOM") + 1):
+        n = 2**z
+        tx, ty = mx * n, my * n
+        xs = {min(max(int(tx + dx), 0), n - 1) for dx in (-pad, 0, pad)}
+        ys = {min(max(int(ty + dy), 0), n - 1) for dy in (-pad, 0, pad)}
+        tiles.extend((z, x, y) for x in xs for y in ys)
+
+    return tiles
+
+
+def _variant(with_messages):
+    return "messages" if with_messages else "points"
+
+
+def cache_key(z, x, y, with_messages):
+    return f"geo_api:tile:{_variant(with_messages)}:{z}:{x}:{y}"
+
+
+def zoom_key(z, with_messages):
+    """
+    Key marking that some tiles of the zoom level may be cached
+    """
+    return f"geo_api:tile-zoom:{_variant(with_messages)}:{z}"
+
+
+def invalidate_point(lat, lon, messages_only=False):
+    """
+    Drop cached tiles containing the point.
+    Use messages_only when only message counts have changed
+    """
+    variants = (True,) if messages_only else (True, False)
+    markers = {
+        zoom_key(z, with_messages): (z, with_messages)
+        for z in range(get_setting("TILE_MAX_ZOOM") + 1)
+        for with_messages in variants
+    }
+    cached = {markers[key] for key in cache.get_many(list(markers))}
+    if not cached:
+        return
+
+    cache.delete_many(
+        [
+            cache_key(z, x, y, with_messages)
+            for z, x, y in point_tiles(lat, lon)
+            for with_messages in variants
+            if (z, with_messages) in cached
+        ]
+    )
+
+
+def render_tile(z, x, y, with_messages=False):
+    """
+    Encode the GeoPoints of a tile as a Mapbox Vector Tile
+    """
+    n = 2**z
+    queryset = bbox_queryset(*tile_bounds(z, x, y, buffer=BUFFER)).order_by("id")
+    if with_messages:
+        queryset = queryset.annotate(message_count=Count("messages"))
+
+    fields = ["id", "name", "latitude", "longitude"]
+    if with_messages:
+        fields.append("message_count")
+
+    features = []
+    for row in queryset.values(*fields)[: get_setting("TILE_MAX_FEATURES")]:
+        mx, my = mercator_xy(row["latitude"], row["longitude"])
+        properties = {"name": row["name"]}
+        if with_messages:
+            properties["message_count"] = row["message_count"]
+
+        features.append(
+            (
+                row["id"],
+                round((mx * n - x) * EXTENT),
+                round((my * n - y) * EXTENT),
+                properties,
+            )
+        )
+
+    if not features:
+        return b""
+
+    return mvt.encode_tile([mvt.encode_layer(LAYER_NAME, features, EXTENT)])
+
+
+def get_tile(z, x, y, with_messages=False):
+    """
+    Return the encoded tile from cache, rendering it on a cache miss
+    """
+    key = cache_key(z, x, y, with_messages)
+    tile = cache.get(key)
+
+    if tile is None:
+        tile = render_tile(z, x, y, with_messages)
+        timeout = get_setting("TILE_CACHE_TIMEOUT")
+        # The marker outlives every tile of the zoom, since it is refreshed
+        # whenever one is stored
+        cache.set(zoom_key(z, with_messages), True, timeout)
+        cache.set(key, tile, timeout)
+
+    return tile
@@ -3,16 +3,66 @@ from .views import (
     GeoPointCreateView,
     PointMessageCreateView,
     GeoPointSearchView,
+    GeoPointBBoxView,
+    GeoPointWithinView,
+    GeoPointAlongRouteView,
+    DistanceMatrixView,
+    PointClusterView,
+    HeatmapView,
+    PointTileView,
     PointMessageSearchView,
+    PointMessageFeedView,
+    ChangeFeedView,
+    MessageStreamView,
+    GeofenceListCreateView,
+    GeofenceDetailView,
+    GeofenceMatchListView,
 )
 
 urlpatterns = [
     path("points/", GeoPointCreateView.as_view(), name="point-create"),
     path("points/messages/", PointMessageCreateView.as_view(), name="message-create"),
     path("points/search/", GeoPointSearchView.as_view(), name="point-search"),
+    path("points/bbox/", GeoPointBBoxView.as_view(), name="point-bbox"),
+    path("points/within/", GeoPointWithinView.as_view(), name="point-within"),
+    path(
+        "points/along-route/",
+        GeoPointAlongRouteView.as_view(),
+        name="point-along-route",
+    ),
+    path(
+        "points/distance-matrix/",
+        DistanceMatrixView.as_view(),
+        name="distance-matrix",
+    ),
+    path("points/clusters/", PointClusterView.as_view(), name="point-clusters"),
+    path("points/heatmap/", HeatmapView.as_view(), name="point-heatmap"),
+    path(
+        "tiles/<int:z>/<int:x>/<int:y>.mvt",
+        PointTileView.as_view(),
+        name="point-tile",
+    ),
     path(
         "points/messages/search/",
         PointMessageSearchView.as_view(),
         name="message-search",
     ),
+    path(
+        "points/messages/feed/",
+        PointMessageFeedView.as_view(),
+        name="message-feed",
+    ),
+    path(
+        "points/messages/stream/",
+        MessageStreamView.as_view(),
+        name="message-stream",
+    ),
+    path("changes/", ChangeFeedView.as_view(), name="changes"),
+    path("geofences/", GeofenceListCreateView.as_view(), name="geofence-list"),
+    path("geofences/<int:pk>/", GeofenceDetailView.as_view(), name="geofence-detail"),
+    path(
+        "geofences/<int:pk>/matches/",
+        GeofenceMatchListView.as_view(),
+        name="geofence-matches",
+    ),
 ]
@@ -1,4 +1,9 @@
+import json
 import math
+import re
+
+# Mean Earth radius in kilometers
+EARTH_RADIUS_KM = 6371.0
 
 
 def haversine_distance(lat1, lon1, lat2, lon2):
@@ -40,3 +45,161 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     distance = R * c
 
     return distance
+
+
+def normalize_name(name):
+    """
+    Case- and punctuation-insensitive form of a name
+    """
+    return " ".join(re.findall(r"\w+", name.casefold()))
+
+
+def point_lon_lat(coordinates):
+    """
+    Extract (longitude, latitude) from a stored GeoJSON Point.
+    Coordinates may be stored either as a dict or as a JSON string
+    """
+    if isinstance(coordinates, str):
+        coordinates = json.loads(coordinates)
+
+    # GeoJSON: [longitude, latitude]
+    lon, lat = coordinates["coordinates"]
+
+    return float(lon), float(lat)
+
+
+# Web Mercator is undefined at the poles, so latitudes are clipped
+MERCATOR_MAX_LATITUDE = 85.05112878
+
+
+def mercator_xy(lat, lon):
+    """
+    Project a point to normalized Web Mercator coordinates.
+    Both x and y are in [0, 1], (0, 0) is the north-west corner of the map
+    """
+    lat = max(-MERCATOR_MAX_LATITUDE, min(MERCATOR_MAX_LATITUDE, lat))
+    lat_rad = math.radians(lat)
+
+    x = (lon + 180.0) / 360.0
+    y = (1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0
+
+    return x, y
+
+
+def mercator_lat_lon(x, y):
+    """
+    Inverse of mercator_xy: (lat, lon) of normalized Web Mercator coordinates
+    """
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1.0 - 2.0 * y))))
+
+    return lat, x * 360.0 - 180.0
+
+
+def mercator_cell(lat, lon, cells):
+    """
+    Return (x, y) of the grid cell containing the point,
+    for a Web Mercator grid of `cells` x `cells`
+    """
+    x, y = mercator_xy(lat, lon)
+
+    return min(int(x * cells), cells - 1), min(int(y * cells), cells - 1)
+
+
+def mercator_bbox_cells(cells, west, south, east, north):
+    """
+    Cells of a `cells` x `cells` Web Mercator grid covered by the bbox.
+    Returns (x_ranges, y_range, number of cells); x is split in two
+    ranges when the bbox crosses the antimeridian (west > east)
+    """
+    x_min, y_min = mercator_cell(north, west, cells)
+    x_max, y_max = mercator_cell(south, east, cells)
+
+    if west <= east:
+        x_ranges = [(x_min, x_max)]
+    else:
+        x_ranges = [(x_min, cells - 1), (0, x_max)]
+
+    width = sum(x_to - x_from + 1 for x_from, x_to in x_ranges)
+
+    return x_ranges, (y_min, y_max), width * (y_max - y_min + 1)
+
+
+def radius_bbox(lat, lon, radius_km):
+    """
+    Return (west, south, east, north) bounding box of a search circle.
+    West > east when the box crosses the antimeridian, and the box spans
+    all longitudes when the circle contains a pole
+    """
+    angular_radius = radius_km / EARTH_RADIUS_KM
+    dlat = math.degrees(angular_radius)
+    south, north = lat - dlat, lat + dlat
+
+    if south <= -90 or north >= 90:
+        return -180.0, max(south, -90.0), 180.0, min(north, 90.0)
+
+    ratio = math.sin(angular_radius) / math.cos(math.radians(lat))
+    if ratio >= 1:
+        return -180.0, south, 180.0, north
+
+    dlon = math.degrees(math.asin(ratio))
+    west, east = lon - dlon, lon + dlon
+
+    if west < -180:
+        west += 360
+    if east > 180:
+        east -= 360
+
+    return west, south, east, north
+
+
+def initial_bearing(lat1, lon1, lat2, lon2):
+    """
+    Initial bearing (in radians) of the great circle path from point 1 to 2
+    """
+    lat1_rad, lat2_rad = math.radians(lat1), math.radians(lat2)
+    dlon = math.radians(lon2 - lon1)
+
+    y = math.sin(dlon) * math.cos(lat2_rad)
+    x = math.cos(lat1_rad) * math.sin(lat2_rad) - math.sin(lat1_rad) * math.cos(
+        lat2_rad
+    ) * math.cos(dlon)
+
+    return math.atan2(y, x)
+
+
+def point_segment_distance(lat, lon, lat1, lon1, lat2, lon2):
+    """
+    Distance (km) from a point to the great circle segment 1-2, and the
+    position (km from point 1) of the closest point of the segment
+
+    Uses cross-track / along-track distances:
+    dxt = asin(sin(δ13) ⋅ sin(θ13 − θ12))
+    dat = acos(cos(δ13) / cos(dxt))
+    where δ13 is the angular distance and θ13 the bearing from 1 to the point
+    """
+    segment_km = haversine_distance(lat1, lon1, lat2, lon2)
+    start_km = haversine_distance(lat1, lon1, lat, lon)
+
+    if segment_km == 0 or start_km == 0:
+        return start_km, 0.0
+
+    delta13 = start_km / EARTH_RADIUS_KM
+    theta = initial_bearing(lat1, lon1, lat, lon) - initial_bearing(
+        lat1, lon1, lat2, lon2
+    )
+
+    # The point is "behind" the start of the segment
+    if math.cos(theta) <= 0:
+        return start_km, 0.0
+
+    cross_track = math.asin(max(-1.0, min(1.0, math.sin(delta13) * math.sin(theta))))
+    along_track = math.acos(
+        max(-1.0, min(1.0, math.cos(delta13) / math.cos(cross_track)))
+    )
+    along_km = along_track * EARTH_RADIUS_KM
+
+    # The point is beyond the end of the segment
+    if along_km >= segment_km:
+        return haversine_distance(lat2, lon2, lat, lon), segment_km
+
+    return abs(cross_track) * EARTH_RADIUS_KM, along_km
@@ -0,0 +1,100 @@
+"""
+Cheap data versions for conditional GET on searches.
+
+Every GeoPoint / PointMessage write bumps the counter of the coarse grid
+cell it falls into, plus a global counter of its kind (see signals.py).
+The version of a searched area is the sum of the counters of the cells it
+covers, so it changes whenever anything inside the area changes and is
+read with a single indexed query, without running the search itself.
+ETags also hash the normalized search parameters: the same data gives
+different results for other filters or users (created_by=me).
+"""
+
+import hashlib
+import math
+
+from django.db.models import F, Max, Sum
+from django.utils import timezone
+
+from .conf import get_setting
+from .models import WriteCounter
+
+POINTS = "points"
+MESSAGES = "messages"
+
+
+def _columns():
+    return math.ceil(360 / get_setting("VERSION_CELL_DEGREES"))
+
+
+def _rows():
+    return math.ceil(180 / get_setting("VERSION_CELL_DEGREES"))
+
+
+def _cell(lat, lon):
+    size = get_setting("VERSION_CELL_DEGREES")
+    cell_x = min(int((lon + 180) // size), _columns() - 1)
+    cell_y = min(int((lat + 90) // size), _rows() - 1)
+    return cell_x, cell_y
+
+
+def _cell_key(kind, cell_x, cell_y):
+    return f"{kind}:{cell_x}:{cell_y}"
+
+
+def bump(kind, lat, lon):
+    """
+    Increment the counters of the cell containing (lat, lon) and of the kind
+    """
+    now = timezone.now()
+
+    for key in (_cell_key(kind, *_cell(lat, lon)), kind):
+        counters = WriteCounter.objects.filter(key=key)
+        if counters.update(version=F("version") + 1, updated_at=now):
+            continue
+
+        # First write to this cell: create the counter (unless created
+        # concurrently by another request) and increment it
+        WriteCounter.objects.bulk_create(
+            [WriteCounter(key=key, version=0)], ignore_conflicts=True
+        )
+        counters.update(version=F("version") + 1, updated_at=now)
+
+
+def area_keys(kinds, west, south, east, north):
+    """
+    Counter keys covering the bbox, or global keys for very large areas
+    """
+    x_min, y_min = _cell(south, west)
+    x_max, y_max = _cell(north, east)
+
+    if west <= east:
+        columns = list(range(x_min, x_max + 1))
+    else:
+        columns = list(range(x_min, _columns())) + list(range(0, x_max + 1))
+
+    rows = range(y_min, y_max + 1)
+    if len(columns) * len(rows) > get_setting("VERSION_MAX_CELLS"):
+        return list(kinds)
+
+    return [
+        _cell_key(kind, cell_x, cell_y)
+        for kind in kinds
+        for cell_x in columns
+        for cell_y in rows
+    ]
+
+
+def area_version(kinds, west, south, east, north, params=()):
+    """
+    Return (etag, last_modified) of the data of given kinds inside the bbox,
+    as searched with the normalized `params`
+    """
+    version = WriteCounter.objects.filter(
+        key__in=area_keys(kinds, west, south, east, north)
+    ).aggregate(total=Sum("version"), last_modified=Max("updated_at"))
+
+    digest = hashlib.md5(repr(tuple(params)).encode()).hexdigest()[:16]
+    etag = '"%s-%d-%s"' % ("+".join(kinds), version["total"] or 0, digest)
+
+    return etag, version["last_modified"]
@@ -1,13 +1,168 @@
 from rest_framework import generics, permissions
+from django.db import connection
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views import View
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 from django.contrib.auth.models import User
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from asgiref.sync import sync_to_async
+import hashlib
 import json
+import operator
+import time
+from functools import reduce
 
-from .models import GeoPoint, PointMessage
-from .serializers import GeoPointSerializer, PointMessageSerializer
-from .utils import haversine_distance
+from . import (
+    archive,
+    changes,
+    clustering,
+    dedupe,
+    feed,
+    fulltext,
+    geofences,
+    heatmap,
+    ingest,
+    live,
+    matrix,
+    metrics,
+    polygons,
+    routers,
+    routes,
+    singleflight,
+    tiles,
+    versions,
+)
+from .conf import get_setting
+from .filters import FILTER_FIRST, SearchFilters
+from .routers import ReplicaReadsMixin
+from .search import (
+    LatitudeWalk,
+    Nearest,
+    bbox_queryset,
+    parse_bbox,
+    parse_max_results,
+    validate_bbox,
+)
+
+from .models import (
+    Geofence,
+    GeofenceMatch,
+    GeoPoint,
+    MessageLocation,
+    PointMessage,
+)
+from .serializers import (
+    DistanceMatrixSerializer,
+    GeofenceSerializer,
+    GeoPointSerializer,
+    PointMessageSerializer,
+    PolygonSearchSerializer,
+    RouteSearchSerializer,
+)
+from .utils import haversine_distance, radius_bbox
+
+# Every view declares `query_budget`: the maximum number of SQL queries per
+# request, including authentication (2 queries with session auth). Budgets
+# of write views cover the first write into an empty area, which also
+# creates clusters, heatmap bins and version counters.
+# Budgets are enforced by QueryBudgetTests and logged by ProfilingMiddleware
+
+BBOX_PARAMS = ("west", "south", "east", "north")
+
+
+def not_modified_response(request, kinds, params):
+    """
+    Return (304 response or None, etag, last_modified) for a radius search
+    with normalized params (center, radius, ...), based on write counters
+    of the searched area (see versions.py)
+    """
+    center_lat, center_lon, radius_km = params[:3]
+    etag, last_modified = versions.area_version(
+        kinds, *radius_bbox(center_lat, center_lon, radius_km), params=params
+    )
+    timestamp = last_modified.timestamp() if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+    return response, etag, last_modified
+
+
+def set_version_headers(response, etag, last_modified):
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+
+    return response
+
+
+def point_summary(point):
+    """
+    Point representation in bbox and polygon search results
+    """
+    return {
+        "id": point.id,
+        "name": point.name,
+        "description": point.description,
+        "coordinates": {
+            "type": "Point",
+            "coordinates": [point.longitude, point.latitude],
+        },
+        "created_by": point.created_by.username,
+    }
+
+
+class SearchMetricsMixin:
+    """
+    Record search statistics collected by the view into `self.search_stats`
+    after the response is rendered, so serialization time is included
+    """
+
+    search_stats = None
+
+    def coalesced_search(self, endpoint, params, search):
+        """
+        Run search(stats) once for concurrent requests with the same
+        normalized params reading the same database, unless
+        GEO_API["SEARCH_COALESCING"] is off. Only the request that ran the
+        search records its statistics
+        """
+        stats = metrics.SearchStats(endpoint)
+        if not get_setting("SEARCH_COALESCING"):
+            self.search_stats = stats
+            return search(stats)
+
+        # A sticky writer must not get the result of a replica read, and
+        # the search runs with the routing of the request that leads it
+        result, shared = singleflight.searches.do(
+            (endpoint, routers.current_alias(), *params), lambda: search(stats)
+        )
+        if shared:
+            metrics.SEARCHES_COALESCED.inc(endpoint)
+        else:
+            self.search_stats = stats
+
+        return result
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        stats = self.search_stats
+        if stats is not None:
+            # Django renders the response right after the view returns
+            render_started = time.perf_counter()
+
+            def record_stats(rendered_response):
+                stats.serialization_seconds += time.perf_counter() - render_started
+                stats.record()
+
+            response.add_post_render_callback(record_stats)
+
+        return response
 
 
 class GeoPointCreateView(generics.CreateAPIView):
@@ -18,12 +173,70 @@ class GeoPointCreateView(generics.CreateAPIView):
     queryset = GeoPoint.objects.all()
     serializer_class = GeoPointSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 16
+
+    def create(self, request, *args, **kwargs):
+        # 1. Check how near-duplicates of an existing point are handled
+        mode = request.query_params.get("dedupe", get_setting("DEDUPE_ON_CREATE"))
+        if mode not in dedupe.MODES:
+            return Response(
+                {"error": f"Dedupe must be one of: {', '.join(dedupe.MODES)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # 2. Validate the point
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # 3. Return (or merge into) an existing point of the same place
+        if mode != dedupe.OFF:
+            data = serializer.validated_data
+            lon, lat = data["coordinates"]["coordinates"]
+            duplicate = dedupe.find_duplicate(lat, lon, data["name"])
+            if duplicate is not None:
+                if mode == dedupe.MERGE:
+                    dedupe.fill_description(duplicate, data.get("description"))
+                return self.duplicate_response(duplicate)
+
+        # 4. Create the point
+        self.perform_create(serializer)
+        response = Response(
+            serializer.data,
+            status=status.HTTP_201_CREATED,
+            headers=self.get_success_headers(serializer.data),
+        )
+
+        # 5. Report the caller's own geofences containing the new point
+        response.data["geofences"] = [
+            {"id": fence.id, "name": fence.name}
+            for fence in self.geofences
+            if fence.created_by_id == self.request.user.id
+        ]
+
+        return response
+
+    def duplicate_response(self, point):
+        """
+        200 response with an existing point instead of a new one
+        """
+        data = self.get_serializer(point).data
+        data["duplicate"] = True
+        data["geofences"] = [
+            {"id": match.fence.id, "name": match.fence.name}
+            for match in GeofenceMatch.objects.filter(
+                point=point, fence__created_by=self.request.user
+            ).select_related("fence")
+        ]
+
+        return Response(data, status=status.HTTP_200_OK)
 
     def perform_create(self, serializer):
         """
         Automatically set created_by as current user
+        and record the geofences containing the point
         """
-        serializer.save(created_by=self.request.user)
+        point = serializer.save(created_by=self.request.user)
+        self.geofences = geofences.record_matches(point)
 
 
 class PointMessageCreateView(generics.CreateAPIView):
@@ -35,6 +248,28 @@ class PointMessageCreateView(generics.CreateAPIView):
     queryset = PointMessage.objects.all()
     serializer_class = PointMessageSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 16
+
+    def create(self, request, *args, **kwargs):
+        if not ingest.enabled():
+            return super().create(request, *args, **kwargs)
+
+        # Write-behind: validate, queue and let the worker insert it
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        provisional_id = ingest.enqueue(data["point"], request.user, data["text"])
+
+        return Response(
+            {
+                "provisional_id": provisional_id,
+                "point": data["point"].id,
+                "user": request.user.id,
+                "text": data["text"],
+                "status": "queued",
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
 
     def perform_create(self, serializer):
         """
@@ -43,12 +278,13 @@ class PointMessageCreateView(generics.CreateAPIView):
         serializer.save(user=self.request.user)
 
 
-class GeoPointSearchView(APIView):
+class GeoPointSearchView(ReplicaReadsMixin, SearchMetricsMixin, APIView):
     """
     View for searching points within radius (GET /api/points/search/)
     """
 
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 7
 
     def get(self, request):
         # 1. Get query params from request
@@ -98,10 +334,110 @@ class GeoPointSearchView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # 6. Search for points
-        points_in_radius = []
+        # 6. Check the optional limit, capped by the server
+        max_results, error = parse_max_results(request.query_params.get("max_results"))
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 7. Check the optional author, creation time and name filters
+        filters, error = SearchFilters.parse(request.query_params, request.user)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 8. Answer 304 if nothing has changed in the searched area
+        params = (center_lat, center_lon, radius_km, max_results, *filters.key())
+        not_modified, etag, last_modified = not_modified_response(
+            request, [versions.POINTS], params
+        )
+        if not_modified:
+            return not_modified
+
+        # 9. Search for the nearest points. Identical concurrent searches
+        # share one run
+        points_in_radius, truncated = self.coalesced_search(
+            "point-search",
+            params,
+            lambda stats: self.search(
+                center_lat, center_lon, radius_km, max_results, filters, stats
+            ),
+        )
 
-        for point in GeoPoint.objects.all():
+        # 10. Return results
+        response = Response(
+            {
+                "search_center": {"latitude": center_lat, "longitude": center_lon},
+                "radius_km": radius_km,
+                **({"filters": filters.as_dict()} if filters else {}),
+                "max_results": max_results,
+                "points_found": len(points_in_radius),
+                "truncated": truncated,
+                "points": points_in_radius,
+            }
+        )
+
+        return set_version_headers(response, etag, last_modified)
+
+    def search(self, center_lat, center_lon, radius_km, max_results, filters, stats):
+        """
+        Up to max_results points nearest to the center within radius, as
+        response items ordered by distance, and whether more points may
+        match. Points are read outward by latitude and reading stops once
+        no unread point can be nearer than the current farthest result.
+        With selective filters, the filtered points in the bbox are read
+        through the filter's index instead
+        """
+        nearest = Nearest(max_results)
+        points = bbox_queryset(*radius_bbox(center_lat, center_lon, radius_km))
+
+        if filters:
+            filtered = points.filter(filters.point_q())
+            with stats.time_db():
+                plan = filters.plan(filtered, points, max_results)
+
+            if plan == FILTER_FIRST:
+                with stats.time_python(), connection.execute_wrapper(stats.db_wrapper):
+                    candidates = filtered.select_related("created_by").iterator(
+                        chunk_size=get_setting("SEARCH_CHUNK_SIZE")
+                    )
+                    self.collect(
+                        candidates, center_lat, center_lon, radius_km, nearest, stats
+                    )
+                return nearest.items(), nearest.offered > max_results
+
+            points = filtered
+
+        walk = LatitudeWalk(
+            points.select_related("created_by"), center_lat, max_results
+        )
+        chunks = iter(walk)
+        stopped_early = False
+
+        while True:
+            with stats.time_db():
+                candidates = next(chunks, None)
+            if candidates is None:
+                break
+
+            with stats.time_python(), connection.execute_wrapper(stats.db_wrapper):
+                self.collect(
+                    candidates, center_lat, center_lon, radius_km, nearest, stats
+                )
+
+            min_distance = walk.min_distance_km()
+            if min_distance > radius_km:
+                break
+            if min_distance > nearest.bound():
+                stopped_early = True
+                break
+
+        return nearest.items(), stopped_early or nearest.offered > max_results
+
+    def collect(self, candidates, center_lat, center_lon, radius_km, nearest, stats):
+        """
+        Offer candidate points within radius to `nearest` as response items
+        """
+        for point in candidates:
+            stats.candidates += 1
             try:
                 point_coords = point.coordinates
                 if isinstance(point_coords, str):
@@ -109,13 +445,18 @@ class GeoPointSearchView(APIView):
 
                 point_lon, point_lat = point_coords["coordinates"]
 
+                stats.distance_evaluations += 1
                 distance = haversine_distance(
                     center_lat, center_lon, point_lat, point_lon
                 )
 
-                # If distance is within radius, add to results
+                # Keep the point if it is within radius and among the
+                # nearest ones found so far
                 if distance <= radius_km:
-                    points_in_radius.append(
+                    stats.matches += 1
+                    nearest.push(
+                        distance,
+                        point.id,
                         {
                             "id": point.id,
                             "name": point.name,
@@ -123,37 +464,684 @@ class GeoPointSearchView(APIView):
                             "distance_km": round(distance, 2),
                             "coordinates": point_coords,
                             "created_by": point.created_by.username,
-                        }
+                        },
                     )
 
             except (KeyError, ValueError, json.JSONDecodeError):
                 # Skip points with invalid coordinates
                 continue
 
+
+class GeoPointBBoxView(APIView):
+    """
+    View for searching points inside a viewport rectangle
+        (GET /api/points/bbox/?west=&south=&east=&north=)
+    Viewports crossing the antimeridian are passed with west > east
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 3
+
+    def get(self, request):
+        # 1. Get query params from request
+        params = [request.query_params.get(name) for name in BBOX_PARAMS]
+
+        # 2. Check that all params are present
+        if not all(params):
+            return Response(
+                {
+                    "error": "Missing required parameters",
+                    "required": list(BBOX_PARAMS),
+                    "example": "/api/points/bbox/?west=37.3&south=55.5&east=37.9&north=56.0",
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # 3. Try to convert params to floats
+        try:
+            west, south, east, north = (float(param) for param in params)
+        except ValueError:
+            return Response(
+                {"error": "Parameters must be valid numbers"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # 4. Check that bbox is valid
+        error = validate_bbox(west, south, east, north)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 5. Indexed range query over latitude/longitude columns
+        max_results = get_setting("BBOX_MAX_RESULTS")
+        points = list(
+            bbox_queryset(west, south, east, north)
+            .select_related("created_by")
+            .order_by("id")[: max_results + 1]
+        )
+        truncated = len(points) > max_results
+        points = points[:max_results]
+
+        # 6. Return results
+        return Response(
+            {
+                "bbox": {"west": west, "south": south, "east": east, "north": north},
+                "points_found": len(points),
+                "truncated": truncated,
+                "points": [point_summary(point) for point in points],
+            }
+        )
+
+
+class GeoPointWithinView(SearchMetricsMixin, APIView):
+    """
+    View for searching points inside a GeoJSON Polygon or MultiPolygon
+        (POST /api/points/within/)
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 4
+
+    def post(self, request):
+        # 1. Get the geometry from request body (a Feature is accepted too)
+        geometry = request.data
+        if isinstance(geometry, dict) and geometry.get("type") == "Feature":
+            geometry = geometry.get("geometry")
+
+        if not isinstance(geometry, dict):
+            return Response(
+                {"error": "Request body must be a GeoJSON Polygon or MultiPolygon"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # 2. Take the prepared polygon from cache, or validate and prepare it
+        key = polygons.geometry_key(geometry)
+        prepared = polygons.get_cached(key)
+
+        if prepared is None:
+            serializer = PolygonSearchSerializer(data=geometry)
+            serializer.is_valid(raise_exception=True)
+            prepared = polygons.PreparedGeometry(serializer.validated_data)
+            polygons.cache_prepared(key, prepared)
+
+        # 3. Prefilter candidates by polygon bboxes through the lat/lon index
+        stats = self.search_stats = metrics.SearchStats("point-within")
+        queryset = reduce(
+            operator.or_, (bbox_queryset(*bbox) for bbox in prepared.bboxes)
+        )
+
+        with stats.time_db():
+            candidates = list(queryset.values_list("id", "longitude", "latitude"))
+
+        # 4. Exact point-in-polygon test of the candidates
+        with stats.time_python():
+            matched_ids = [
+                point_id
+                for point_id, lon, lat in candidates
+                if prepared.contains(lon, lat)
+            ]
+
+        stats.candidates = stats.distance_evaluations = len(candidates)
+        stats.matches = len(matched_ids)
+
+        max_results = get_setting("POLYGON_MAX_RESULTS")
+        matched_ids.sort()
+        truncated = len(matched_ids) > max_results
+
+        with stats.time_db():
+            points = list(
+                GeoPoint.objects.filter(id__in=matched_ids[:max_results])
+                .select_related("created_by")
+                .order_by("id")
+            )
+
+        # 5. Return results
+        return Response(
+            {
+                "points_found": len(points),
+                "truncated": truncated,
+                "points": [point_summary(point) for point in points],
+            }
+        )
+
+
+class GeoPointAlongRouteView(SearchMetricsMixin, APIView):
+    """
+    View for searching points within a distance of a route
+        (POST /api/points/along-route/)
+    Results are ordered by position along the route
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 3
+
+    def post(self, request):
+        # 1. Validate route and buffer
+        serializer = RouteSearchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        buffer_km = serializer.validated_data["buffer_km"]
+        route = routes.Route(
+            serializer.validated_data["route"]["coordinates"], buffer_km
+        )
+
+        # 2. Prefilter candidates by extended segment bboxes (lat/lon index)
+        stats = self.search_stats = metrics.SearchStats("point-along-route")
+
+        with stats.time_db():
+            candidates = list(route.candidates_queryset().select_related("created_by"))
+
+        # 3. Measure candidates against nearby route segments
+        found = []
+        with stats.time_python():
+            for point in candidates:
+                stats.candidates += 1
+                location = route.locate(point.latitude, point.longitude, stats)
+                if location is not None:
+                    found.append((location[1], location[0], point))
+
+        stats.matches = len(found)
+        found.sort(key=lambda item: (item[0], item[2].id))
+
+        max_results = get_setting("ROUTE_MAX_RESULTS")
+        truncated = len(found) > max_results
+
+        # 4. Return results
+        return Response(
+            {
+                "buffer_km": buffer_km,
+                "route_length_km": round(route.length_km, 2),
+                "points_found": len(found[:max_results]),
+                "truncated": truncated,
+                "points": [
+                    {
+                        **point_summary(point),
+                        "distance_km": round(distance, 3),
+                        "along_route_km": round(along, 3),
+                    }
+                    for along, distance, point in found[:max_results]
+                ],
+            }
+        )
+
+
+class DistanceMatrixView(APIView):
+    """
+    Distances in km between sets of points or positions
+        (POST /api/points/distance-matrix/)
+    Rows are streamed as JSON, or as float32 with "format": "binary"
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 3
+
+    def post(self, request):
+        # 1. Validate the locations and the size of the matrix
+        serializer = DistanceMatrixSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        # 2. Load the positions of all the points in one query
+        (sources, destinations), missing = matrix.load_positions(
+            data["sources"], data["destinations"]
+        )
+        if missing:
+            return Response(
+                {"error": "Points not found", "missing": missing},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # 3. Stream the matrix row by row
+        if data["format"] == matrix.BINARY:
+            response = StreamingHttpResponse(
+                matrix.binary_chunks(sources, destinations),
+                content_type="application/octet-stream",
+            )
+        else:
+            response = StreamingHttpResponse(
+                matrix.json_chunks(sources, destinations),
+                content_type="application/json",
+            )
+
+        response["X-Matrix-Rows"] = len(sources)
+        response["X-Matrix-Columns"] = len(destinations)
+        return response
+
+
+class PointClusterView(APIView):
+    """
+    View for clustered points inside a viewport
+        (GET /api/points/clusters/?west=&south=&east=&north=&zoom=)
+    Returns precomputed grid clusters, so response size is bounded
+    by the number of screen cells, not by the number of points
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 3
+
+    def get(self, request):
+        # 1. Get query params from request
+        params = [request.query_params.get(name) for name in BBOX_PARAMS]
+        zoom = request.query_params.get("zoom")
+
+        # 2. Check that all params are present
+        if not all(params) or not zoom:
+            return Response(
+                {
+                    "error": "Missing required parameters",
+                    "required": [*BBOX_PARAMS, "zoom"],
+                    "example": "/api/points/clusters/?west=37.3&south=55.5&east=37.9&north=56.0&zoom=10",
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # 3. Try to convert params to numbers
+        try:
+            west, south, east, north = (float(param) for param in params)
+            zoom = int(zoom)
+        except ValueError:
+            return Response(
+                {"error": "Parameters must be valid numbers"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # 4. Check that bbox and zoom are valid
+        error = validate_bbox(west, south, east, north)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        max_zoom = get_setting("CLUSTER_MAX_ZOOM")
+        if not (0 <= zoom <= max_zoom):
+            return Response(
+                {"error": f"Zoom must be between 0 and {max_zoom}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # 5. Check that the viewport is not too large for this zoom
+        x_ranges, y_range, cells = clustering.viewport_cells(
+            zoom, west, south, east, north
+        )
+        if cells > get_setting("CLUSTER_MAX_CELLS"):
+            return Response(
+                {"error": "Viewport is too large for this zoom level"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # 6. Read precomputed clusters
+        clusters = []
+        for cluster in clustering.clusters_queryset(zoom, x_ranges, y_range):
+            latitude, longitude = clustering.centroid(cluster)
+            clusters.append(
+                {
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "count": cluster.count,
+                    "sample_ids": cluster.sample_ids,
+                }
+            )
+
         # 7. Return results
         return Response(
             {
-                "search_center": {"latitude": center_lat, "longitude": center_lon},
-                "radius_km": radius_km,
-                "points_found": len(points_in_radius),
-                "points": points_in_radius,
+                "bbox": {"west": west, "south": south, "east": east, "north": north},
+                "zoom": zoom,
+                "clusters_found": len(clusters),
+                "points_total": sum(cluster["count"] for cluster in clusters),
+                "clusters": clusters,
+            }
+        )
+
+
+class HeatmapView(APIView):
+    """
+    View for point (and message) density in a viewport
+        (GET /api/points/heatmap/?bbox=west,south,east,north&resolution=)
+    Returns pre-aggregated grid bins, so the cost does not depend on the
+    number of points. Pass ?messages=1 to add message counts
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 3
+
+    def get(self, request):
+        # 1. Get query params from request
+        bbox = request.query_params.get("bbox")
+        resolution = request.query_params.get("resolution")
+        with_messages = request.query_params.get("messages") in ("1", "true")
+
+        # 2. Check that all params are present
+        if not bbox or not resolution:
+            return Response(
+                {
+                    "error": "Missing required parameters",
+                    "required": ["bbox", "resolution"],
+                    "example": "/api/points/heatmap/?bbox=37.3,55.5,37.9,56.0&resolution=10",
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # 3. Check that bbox and resolution are valid
+        bbox, error = parse_bbox(bbox)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        max_resolution = get_setting("HEATMAP_MAX_RESOLUTION")
+        try:
+            resolution = int(resolution)
+        except ValueError:
+            resolution = -1
+
+        if not (0 <= resolution <= max_resolution):
+            return Response(
+                {"error": f"Resolution must be between 0 and {max_resolution}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # 4. Check that the viewport is not too large for this resolution
+        x_ranges, y_range, cells = heatmap.viewport_cells(resolution, *bbox)
+        if cells > get_setting("HEATMAP_MAX_CELLS"):
+            return Response(
+                {"error": "Bbox is too large for this resolution"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # 5. Read pre-aggregated bins
+        bins = []
+        for heatmap_bin in heatmap.bins_queryset(
+            resolution, x_ranges, y_range, with_messages
+        ):
+            lat, lon = heatmap.bin_center(
+                resolution, heatmap_bin.cell_x, heatmap_bin.cell_y
+            )
+            bins.append(
+                {
+                    "latitude": round(lat, 6),
+                    "longitude": round(lon, 6),
+                    "points": heatmap_bin.points,
+                    **({"messages": heatmap_bin.messages} if with_messages else {}),
+                }
+            )
+
+        # 6. Return results
+        west, south, east, north = bbox
+        return Response(
+            {
+                "bbox": {"west": west, "south": south, "east": east, "north": north},
+                "resolution": resolution,
+                "bins_found": len(bins),
+                "max_points": max((item["points"] for item in bins), default=0),
+                "bins": bins,
+            }
+        )
+
+
+class PointTileView(APIView):
+    """
+    View for GeoPoints as Mapbox Vector Tiles (GET /api/tiles/{z}/{x}/{y}.mvt)
+    Pass ?messages=1 to add message counts to point properties
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 3
+
+    def get(self, request, z, x, y):
+        # 1. Check that the tile exists
+        max_zoom = get_setting("TILE_MAX_ZOOM")
+        if not (0 <= z <= max_zoom):
+            return Response(
+                {"error": f"Zoom must be between 0 and {max_zoom}"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        if not (0 <= x < 2**z and 0 <= y < 2**z):
+            return Response(
+                {"error": "Tile coordinates are out of range for this zoom"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        # 2. Get the tile from cache or render it
+        with_messages = request.query_params.get("messages") in ("1", "true")
+        tile = tiles.get_tile(z, x, y, with_messages)
+
+        # 3. Let clients revalidate cached tiles with If-None-Match
+        etag = '"%s"' % hashlib.md5(tile).hexdigest()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(tile, content_type=tiles.CONTENT_TYPE)
+
+        response["ETag"] = etag
+        patch_cache_control(
+            response, private=True, max_age=get_setting("TILE_HTTP_MAX_AGE")
+        )
+
+        return response
+
+
+class ChangeFeedView(APIView):
+    """
+    Points and messages created or updated after a cursor
+        (GET /api/changes/?since=<cursor>&bbox=west,south,east,north&limit=)
+    Start with since=0 and pass `next_cursor` back until `has_more` is false
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 4
+
+    def get(self, request):
+        # 1. Parse the cursor and the page size
+        try:
+            since = int(request.query_params.get("since", 0))
+            limit = int(
+                request.query_params.get("limit", get_setting("CHANGES_PAGE_SIZE"))
+            )
+        except ValueError:
+            return Response(
+                {"error": "Parameters since and limit must be integers"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if since < 0:
+            return Response(
+                {"error": "Cursor must not be negative"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        max_limit = get_setting("CHANGES_MAX_PAGE_SIZE")
+        if not (1 <= limit <= max_limit):
+            return Response(
+                {"error": f"Limit must be between 1 and {max_limit}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # 2. Parse the optional bbox
+        bbox = request.query_params.get("bbox")
+        if bbox:
+            bbox, error = parse_bbox(bbox)
+            if error:
+                return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 3. Read the next page from the change_seq indexes
+        points, messages, next_cursor, has_more = changes.changes_page(
+            since, limit, bbox or None
+        )
+
+        # 4. Return changes with the cursor of the next page
+        return Response(
+            {
+                "cursor": since,
+                "next_cursor": next_cursor,
+                "has_more": has_more,
+                "points": [
+                    {
+                        **point_summary(point),
+                        "updated_at": point.updated_at,
+                        "change_seq": point.change_seq,
+                    }
+                    for point in points
+                ],
+                "messages": [
+                    {
+                        "id": message.id,
+                        "point_id": message.point_id,
+                        "text": message.text,
+                        "created_at": message.created_at,
+                        "change_seq": message.change_seq,
+                        "user": {
+                            "id": message.user.id,
+                            "username": message.user.username,
+                        },
+                    }
+                    for message in messages
+                ],
             }
         )
 
 
-class PointMessageSearchView(APIView):
+class MetricsView(View):
+    """
+    Metrics in Prometheus text format (GET /metrics)
+    Protected with a bearer token if GEO_API["METRICS_TOKEN"] is set,
+    otherwise only available to staff users
+    """
+
+    def get(self, request):
+        token = get_setting("METRICS_TOKEN")
+        if token:
+            if request.headers.get("Authorization") != f"Bearer {token}":
+                return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+        elif not request.user.is_staff:
+            return HttpResponse(status=status.HTTP_403_FORBIDDEN)
+
+        return HttpResponse(
+            metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+
+
+class MessageStreamView(View):
+    """
+    Live stream of new messages within radius of a point, as Server-Sent Events
+        (GET /api/points/messages/stream/?latitude=&longitude=&radius=)
+    Needs an ASGI server (see core/asgi.py). Reconnecting clients send
+    Last-Event-ID and get the messages they missed
+    """
+
+    query_budget = 3
+
+    async def get(self, request):
+        # 1. Authenticate with the DRF authentication classes
+        user = await sync_to_async(authenticated_user)(request)
+        if user is None:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        # 2. Get and validate query parameters
+        try:
+            center_lat = float(request.GET["latitude"])
+            center_lon = float(request.GET["longitude"])
+            radius_km = float(request.GET["radius"])
+        except KeyError:
+            return JsonResponse(
+                {
+                    "error": "Missing required parameters",
+                    "required": ["latitude", "longitude", "radius (km)"],
+                    "example": "/api/points/messages/stream/?latitude=55.7558&longitude=37.6173&radius=10",
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        except ValueError:
+            return JsonResponse(
+                {"error": "Parameters must be valid numbers"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if not (-90 <= center_lat <= 90 and -180 <= center_lon <= 180):
+            return JsonResponse(
+                {"error": "Coordinates are out of range"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        max_radius = get_setting("LIVE_MAX_RADIUS_KM")
+        if not (0 < radius_km <= max_radius):
+            return JsonResponse(
+                {"error": f"Radius must be between 0 and {max_radius} km"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        last_event_id = request.headers.get("Last-Event-ID")
+        try:
+            last_event_id = int(last_event_id) if last_event_id else None
+        except ValueError:
+            last_event_id = None
+
+        # 3. Limit the number of open connections of this process
+        if len(live.broker) >= get_setting("LIVE_MAX_SUBSCRIBERS"):
+            return JsonResponse(
+                {"error": "Too many live subscribers, try again later"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+
+        # 4. Stream events until the client disconnects. Queued messages are
+        # inserted by the worker process, out of reach of this broker
+        response = StreamingHttpResponse(
+            live.stream(
+                center_lat,
+                center_lon,
+                radius_km,
+                last_event_id,
+                polling=ingest.enabled(),
+            ),
+            content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+
+        return response
+
+
+def authenticated_user(request):
+    """
+    Authenticate a plain Django request like DRF views do.
+    Returns None for anonymous or invalid credentials
+    """
+    drf_request = Request(
+        request,
+        authenticators=[
+            authentication()
+            for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+        ],
+    )
+    try:
+        user = drf_request.user
+    except APIException:
+        return None
+
+    return user if user and user.is_authenticated else None
+
+
+class PointMessageSearchView(ReplicaReadsMixin, SearchMetricsMixin, APIView):
     """
     Search messages within radius of a point (GET /api/points/messages/search/)
     Returns messages whose associated points are within given radius
+    Pass ?q= to keep only messages containing all the keywords and
+    ?include_archived=1 to search archived messages too. Messages can be
+    filtered by author (?created_by=<user id> or me), posting time
+    (?created_after=, ?created_before=) and point name prefix (?name=)
     """
 
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 11
 
     def get(self, request):
         # 1. Get query parameters
         latitude = request.query_params.get("latitude")
         longitude = request.query_params.get("longitude")
         radius = request.query_params.get("radius")
+        words = fulltext.keywords(request.query_params.get("q", ""))
+        include_archived = request.query_params.get("include_archived") in (
+            "1",
+            "true",
+        )
 
         # 2. Validate parameters
         if not all([latitude, longitude, radius]):
@@ -197,10 +1185,274 @@ class PointMessageSearchView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # 6. Search for messages
-        messages_in_radius = []
+        # 6. Check the optional limit, capped by the server
+        max_results, error = parse_max_results(request.query_params.get("max_results"))
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 7. Check the optional author, posting time and point name filters
+        filters, error = SearchFilters.parse(request.query_params, request.user)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 8. Answer 304 if nothing has changed in the searched area.
+        # Messages embed point data, so point writes change the version too.
+        # Queued messages past the staleness bound are inserted first; the
+        # replicas may not have them yet, so the search then reads the primary
+        if ingest.ensure_fresh():
+            routers.read_primary()
+        params = (
+            center_lat,
+            center_lon,
+            radius_km,
+            max_results,
+            include_archived,
+            *filters.key(),
+            *sorted(set(words)),
+        )
+        not_modified, etag, last_modified = not_modified_response(
+            request, [versions.POINTS, versions.MESSAGES], params
+        )
+        if not_modified:
+            return not_modified
+
+        # 9. Search for the nearest messages. Identical concurrent searches
+        # share one run
+        messages_in_radius, truncated = self.coalesced_search(
+            "message-search",
+            params,
+            lambda stats: self.search(
+                center_lat,
+                center_lon,
+                radius_km,
+                words,
+                max_results,
+                include_archived,
+                filters,
+                stats,
+            ),
+        )
+
+        # 10. Return results
+        response = Response(
+            {
+                "search_center": {"latitude": center_lat, "longitude": center_lon},
+                "radius_km": radius_km,
+                **({"q": " ".join(words)} if words else {}),
+                **({"filters": filters.as_dict()} if filters else {}),
+                "include_archived": include_archived,
+                "max_results": max_results,
+                "messages_found": len(messages_in_radius),
+                "truncated": truncated,
+                "messages": messages_in_radius,
+            }
+        )
+
+        return set_version_headers(response, etag, last_modified)
+
+    def search(
+        self,
+        center_lat,
+        center_lon,
+        radius_km,
+        words,
+        max_results,
+        include_archived,
+        filters,
+        stats,
+    ):
+        """
+        Up to max_results messages of points nearest to the center within
+        radius, as response items ordered by distance, and whether more
+        messages may match. Hot messages are read from the message
+        locations table alone; archived ones are read with the hot ones of
+        the same points when include_archived is set
+        """
+        if include_archived:
+            return self.search_with_archive(
+                center_lat, center_lon, radius_km, words, max_results, filters, stats
+            )
+
+        nearest = Nearest(max_results)
+        bbox_locations = bbox_queryset(
+            *radius_bbox(center_lat, center_lon, radius_km),
+            queryset=MessageLocation.objects.all(),
+        )
+        locations = bbox_locations.filter(filters.location_q())
+
+        # Start from the FTS hits, from the filtered rows or from the
+        # outward walk over the bbox, whichever is estimated to be smallest
+        with stats.time_db():
+            text_first = (
+                bool(words)
+                and fulltext.plan(words, bbox_locations) == fulltext.TEXT_FIRST
+            )
+            filter_first = (
+                not text_first
+                and bool(filters)
+                and filters.plan(locations, bbox_locations, max_results) == FILTER_FIRST
+            )
+
+        with stats.time_python(), connection.execute_wrapper(stats.db_wrapper):
+            if text_first or filter_first:
+                # FTS hits and filtered rows come in no spatial order: all
+                # of them are checked, but only the nearest are kept
+                candidates = locations
+                if words:
+                    candidates = fulltext.filter_text_first(candidates, words)
+                self.collect_locations(
+                    candidates.iterator(chunk_size=get_setting("SEARCH_CHUNK_SIZE")),
+                    center_lat,
+                    center_lon,
+                    radius_km,
+                    nearest,
+                    stats,
+                )
+                return nearest.items(), nearest.offered > max_results
+
+            # Otherwise read rows outward from the center until no unread
+            # one can be nearer than the farthest message kept
+            walk = LatitudeWalk(locations, center_lat, max_results)
+            for chunk in walk:
+                if words:
+                    matching = fulltext.matching_ids(
+                        words, [location.pk for location in chunk]
+                    )
+                    chunk = [location for location in chunk if location.pk in matching]
+
+                self.collect_locations(
+                    chunk, center_lat, center_lon, radius_km, nearest, stats
+                )
 
-        for message in PointMessage.objects.select_related("point", "user").all():
+                min_distance = walk.min_distance_km()
+                if min_distance > radius_km:
+                    break
+                if min_distance > nearest.bound():
+                    return nearest.items(), True
+
+        return nearest.items(), nearest.offered > max_results
+
+    def search_with_archive(
+        self, center_lat, center_lon, radius_km, words, max_results, filters, stats
+    ):
+        """
+        Like search(), with archived messages. Archives are stored per
+        point, so points are read outward from the center, then the hot and
+        archived messages of those in the radius
+        """
+        nearest = Nearest(max_results)
+        bbox_points = bbox_queryset(
+            *radius_bbox(center_lat, center_lon, radius_km)
+        ).filter(filters.point_name_q())
+        messages = PointMessage.objects.select_related("point", "user").filter(
+            filters.message_q()
+        )
+
+        with stats.time_python(), connection.execute_wrapper(stats.db_wrapper):
+            walk = LatitudeWalk(
+                bbox_points.only("id", "latitude", "longitude"),
+                center_lat,
+                max_results,
+            )
+            skipped = False
+            for points in walk:
+                point_ids = []
+                for point in points:
+                    distance = haversine_distance(
+                        center_lat, center_lon, point.latitude, point.longitude
+                    )
+                    if distance > radius_km:
+                        continue
+                    if distance > nearest.bound():
+                        # Its messages can't beat the farthest kept one
+                        skipped = True
+                        continue
+                    point_ids.append(point.id)
+
+                if point_ids:
+                    self.collect(
+                        self.point_messages(messages, point_ids, words, filters),
+                        center_lat,
+                        center_lon,
+                        radius_km,
+                        nearest,
+                        stats,
+                    )
+
+                min_distance = walk.min_distance_km()
+                if min_distance > radius_km:
+                    break
+                if min_distance > nearest.bound():
+                    return nearest.items(), True
+
+        return nearest.items(), skipped or nearest.offered > max_results
+
+    def point_messages(self, messages, point_ids, words, filters):
+        """
+        Messages of the points containing all the keywords, hot ones
+        checked by FTS lookups, then archived ones admitted by the filters
+        """
+        candidates = messages.filter(point_id__in=point_ids)
+        if words:
+            candidates = list(candidates)
+            matching = fulltext.matching_ids(
+                words, [message.id for message in candidates]
+            )
+            yield from (message for message in candidates if message.id in matching)
+        else:
+            yield from candidates.iterator(chunk_size=get_setting("SEARCH_CHUNK_SIZE"))
+
+        yield from (
+            message
+            for message in archive.point_messages(point_ids, words)
+            if filters.admits_message(message)
+        )
+
+    def collect_locations(
+        self, candidates, center_lat, center_lon, radius_km, nearest, stats
+    ):
+        """
+        Offer candidate message locations within radius to `nearest` as
+        response items
+        """
+        for location in candidates:
+            stats.candidates += 1
+            stats.distance_evaluations += 1
+            distance = haversine_distance(
+                center_lat, center_lon, location.latitude, location.longitude
+            )
+
+            if distance <= radius_km:
+                stats.matches += 1
+                nearest.push(
+                    distance,
+                    location.pk,
+                    {
+                        "id": location.pk,
+                        "text": location.text,
+                        "created_at": location.created_at,
+                        "distance_km": round(distance, 2),
+                        "point": {
+                            "id": location.point_id,
+                            "name": location.point_name,
+                            "coordinates": {
+                                "type": "Point",
+                                "coordinates": [location.longitude, location.latitude],
+                            },
+                        },
+                        "user": {
+                            "id": location.user_id,
+                            "username": location.username,
+                        },
+                    },
+                )
+
+    def collect(self, candidates, center_lat, center_lon, radius_km, nearest, stats):
+        """
+        Offer candidate messages within radius to `nearest` as response items
+        """
+        for message in candidates:
+            stats.candidates += 1
             try:
                 # Get point coordinates
                 point_coords = message.point.coordinates
@@ -211,13 +1463,17 @@ class PointMessageSearchView(APIView):
                 point_lon, point_lat = point_coords["coordinates"]
 
                 # Calculate distance from search center to point
+                stats.distance_evaluations += 1
                 distance = haversine_distance(
                     center_lat, center_lon, point_lat, point_lon
                 )
 
-                # If point is within radius, include the message
+                # If point is within radius, offer the message
                 if distance <= radius_km:
-                    messages_in_radius.append(
+                    stats.matches += 1
+                    nearest.push(
+                        distance,
+                        message.id,
                         {
                             "id": message.id,
                             "text": message.text,
@@ -228,23 +1484,236 @@ class PointMessageSearchView(APIView):
                                 "name": message.point.name,
                                 "coordinates": point_coords,
                             },
-                            "user": {
-                                "id": message.user.id,
-                                "username": message.user.username,
-                            },
-                        }
+                            # Archived messages of deleted users have none
+                            "user": (
+                                {
+                                    "id": message.user.id,
+                                    "username": message.user.username,
+                                }
+                                if message.user is not None
+                                else None
+                            ),
+                            **(
+                                {"archived": True}
+                                if isinstance(message, archive.ArchivedMessage)
+                                else {}
+                            ),
+                        },
                     )
 
             except (KeyError, ValueError, json.JSONDecodeError):
                 # Skip messages with invalid point coordinates
                 continue
 
-        # 7. Return results
+
+class PointMessageFeedView(SearchMetricsMixin, APIView):
+    """
+    Messages around a position ranked by distance and age
+        (GET /api/points/messages/feed/?latitude=&longitude=&radius=&limit=)
+    Pass `next_cursor` back as ?cursor= with the same position and radius
+    for the next page, until it is null
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 7
+
+    def get(self, request):
+        # 1. Get query parameters
+        latitude = request.query_params.get("latitude")
+        longitude = request.query_params.get("longitude")
+        radius = request.query_params.get("radius")
+
+        # 2. Validate parameters
+        if not all([latitude, longitude, radius]):
+            return Response(
+                {
+                    "error": "Missing required parameters",
+                    "required": ["latitude", "longitude", "radius (km)"],
+                    "example": "/api/points/messages/feed/?latitude=55.7558&longitude=37.6173&radius=10",
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # 3. Try to convert params to numbers
+        try:
+            center_lat = float(latitude)
+            center_lon = float(longitude)
+            radius_km = float(radius)
+            limit = int(
+                request.query_params.get("limit", get_setting("FEED_PAGE_SIZE"))
+            )
+        except ValueError:
+            return Response(
+                {"error": "Parameters must be valid numbers"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # 4. Check that coordinates, radius and limit are valid
+        if not (-90 <= center_lat <= 90):
+            return Response(
+                {"error": "Latitude must be between -90 and 90 degrees"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if not (-180 <= center_lon <= 180):
+            return Response(
+                {"error": "Longitude must be between -180 and 180 degrees"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if radius_km <= 0:
+            return Response(
+                {"error": "Radius must be a positive number"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        max_limit = get_setting("SEARCH_MAX_RESULTS")
+        if not (1 <= limit <= max_limit):
+            return Response(
+                {"error": f"Limit must be between 1 and {max_limit}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # 5. Parse the cursor of a next page. A new feed measures ages
+        # from now
+        cursor = request.query_params.get("cursor")
+        if cursor:
+            cursor = feed.Cursor.decode(cursor)
+            if cursor is None:
+                return Response(
+                    {"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST
+                )
+        else:
+            cursor = feed.Cursor(feed.first_page_time())
+
+        # 6. Rank the messages, after inserting queued messages past the
+        # staleness bound. Identical concurrent requests share one run
+        ingest.ensure_fresh()
+        page, next_cursor = self.coalesced_search(
+            "message-feed",
+            (
+                center_lat,
+                center_lon,
+                radius_km,
+                limit,
+                cursor.now,
+                cursor.score,
+                cursor.message_id,
+            ),
+            lambda stats: self.search(
+                center_lat, center_lon, radius_km, limit, cursor, stats
+            ),
+        )
+
+        # 7. Return the page with the cursor of the next one
         return Response(
             {
                 "search_center": {"latitude": center_lat, "longitude": center_lon},
                 "radius_km": radius_km,
-                "messages_found": len(messages_in_radius),
-                "messages": messages_in_radius,
+                "limit": limit,
+                "messages_found": len(page),
+                "has_more": next_cursor is not None,
+                "next_cursor": next_cursor.encode() if next_cursor else None,
+                "messages": [
+                    {
+                        "id": message.id,
+                        "text": message.text,
+                        "created_at": message.created_at,
+                        "score": round(score, 4),
+                        "distance_km": round(distance, 2),
+                        "point": {
+                            "id": message.point.id,
+                            "name": message.point.name,
+                            "coordinates": {
+                                "type": "Point",
+                                "coordinates": [
+                                    message.point.longitude,
+                                    message.point.latitude,
+                                ],
+                            },
+                        },
+                        "user": {
+                            "id": message.user.id,
+                            "username": message.user.username,
+                        },
+                    }
+                    for message, score, distance in page
+                ],
+            }
+        )
+
+    def search(self, center_lat, center_lon, radius_km, limit, cursor, stats):
+        with stats.time_python(), connection.execute_wrapper(stats.db_wrapper):
+            return feed.Feed(
+                center_lat, center_lon, radius_km, limit, cursor, stats
+            ).page()
+
+
+class GeofenceListCreateView(generics.ListCreateAPIView):
+    """
+    View for listing and creating geofences of the current user
+        (GET, POST /api/geofences/)
+    """
+
+    serializer_class = GeofenceSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 5
+
+    def get_queryset(self):
+        return Geofence.objects.filter(created_by=self.request.user).order_by("id")
+
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
+
+
+class GeofenceDetailView(generics.RetrieveUpdateDestroyAPIView):
+    """
+    View for a geofence of the current user (GET, PUT, PATCH, DELETE
+        /api/geofences/{id}/)
+    """
+
+    serializer_class = GeofenceSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 8
+
+    def get_queryset(self):
+        return Geofence.objects.filter(created_by=self.request.user)
+
+
+class GeofenceMatchListView(APIView):
+    """
+    Points created inside a geofence of the current user, newest first
+        (GET /api/geofences/{id}/matches/)
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 4
+
+    def get(self, request, pk):
+        # 1. Check that the fence belongs to the user
+        if not Geofence.objects.filter(pk=pk, created_by=request.user).exists():
+            return Response(
+                {"error": "Geofence not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        # 2. Read the latest matches
+        max_results = get_setting("GEOFENCE_MATCHES_MAX_RESULTS")
+        matches = list(
+            GeofenceMatch.objects.filter(fence_id=pk)
+            .select_related("point__created_by")
+            .order_by("-id")[: max_results + 1]
+        )
+        truncated = len(matches) > max_results
+        matches = matches[:max_results]
+
+        # 3. Return results
+        return Response(
+            {
+                "matches_found": len(matches),
+                "truncated": truncated,
+                "matches": [
+                    {**point_summary(match.point), "matched_at": match.created_at}
+                    for match in matches
+                ],
             }
         )